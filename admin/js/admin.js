@@ -16,6 +16,7 @@ class AdminPanel {
         this.initializeForms();
         this.loadDashboardData();
         this.bindEvents();
+        this.connectChangeFeed();
     }
 
     bindEvents() {
@@ -55,6 +56,11 @@ class AdminPanel {
         document.getElementById('markAllRead')?.addEventListener('click', () => {
             this.markAllContactsRead();
         });
+
+        // Export contacts
+        document.getElementById('exportContacts')?.addEventListener('click', () => {
+            this.exportContacts();
+        });
     }
 
     initializeNavigation() {
@@ -195,7 +201,8 @@ class AdminPanel {
     async loadProducts() {
         try {
             this.showLoading('productsTable');
-            const products = await this.apiRequest('/admin/products');
+            const products = await this.apiRequestAll('/admin/products');
+            this.products = products;
             this.renderProductsTable(products);
         } catch (error) {
             console.error('Error loading products:', error);
@@ -267,6 +274,7 @@ class AdminPanel {
         try {
             this.showLoading('contactsTable');
             const contacts = await this.apiRequest('/admin/contacts');
+            this.contacts = contacts;
             this.renderContactsTable(contacts);
         } catch (error) {
             console.error('Error loading contacts:', error);
@@ -428,13 +436,24 @@ class AdminPanel {
     }
 
     // API methods
+    // The admin token is stored as localStorage.admin_token by the login
+    // page (/admin/login.html, where logout() sends the browser), which is
+    // not part of this panel yet. Until it is, requests go out without one
+    // and the change feed below does not connect.
+    authHeaders() {
+        const headers = { 'Content-Type': 'application/json' };
+        const token = localStorage.getItem('admin_token');
+        if (token) {
+            headers.Authorization = `Bearer ${token}`;
+        }
+        return headers;
+    }
+
     async apiRequest(endpoint, method = 'GET', data = null) {
         const url = `${this.API_BASE_URL}${endpoint}`;
         const options = {
             method,
-            headers: {
-                'Content-Type': 'application/json'
-            }
+            headers: this.authHeaders()
         };
 
         if (data) {
@@ -450,6 +469,32 @@ class AdminPanel {
         return response.json();
     }
 
+    // Fetch every page of a cursor-paginated admin list by following the
+    // X-Next-Cursor header until the server stops sending one
+    async apiRequestAll(endpoint, pageSize = 500) {
+        const items = [];
+        let cursor = null;
+
+        do {
+            const params = new URLSearchParams({ limit: pageSize });
+            if (cursor) {
+                params.set('cursor', cursor);
+            }
+            const response = await fetch(`${this.API_BASE_URL}${endpoint}?${params}`, {
+                headers: this.authHeaders()
+            });
+
+            if (!response.ok) {
+                throw new Error(`HTTP error! status: ${response.status}`);
+            }
+
+            items.push(...await response.json());
+            cursor = response.headers.get('X-Next-Cursor');
+        } while (cursor);
+
+        return items;
+    }
+
     // Product actions
     async editProduct(id) {
         // Implement edit product functionality
@@ -502,6 +547,129 @@ class AdminPanel {
         }
     }
 
+    // Download the inbox as CSV. Large inboxes come in several responses
+    // chained with X-Next-Cursor; only the first one has the header row, so
+    // the parts are joined into one file.
+    async exportContacts() {
+        try {
+            const parts = [];
+            let cursor = null;
+
+            do {
+                const params = new URLSearchParams({ format: 'csv' });
+                if (cursor) {
+                    params.set('cursor', cursor);
+                }
+                const response = await fetch(`${this.API_BASE_URL}/admin/contacts/export?${params}`, {
+                    headers: this.authHeaders()
+                });
+
+                if (!response.ok) {
+                    throw new Error(`HTTP error! status: ${response.status}`);
+                }
+
+                parts.push(await response.blob());
+                cursor = response.headers.get('X-Next-Cursor');
+            } while (cursor);
+
+            const link = document.createElement('a');
+            link.href = URL.createObjectURL(new Blob(parts, { type: 'text/csv' }));
+            link.download = `contacts-${new Date().toISOString().slice(0, 10)}.csv`;
+            link.click();
+            URL.revokeObjectURL(link.href);
+        } catch (error) {
+            console.error('Error exporting contacts:', error);
+            this.showAlert('Failed to export contacts.', 'error');
+        }
+    }
+
+    // Live updates: the server pushes every change as a server-sent event
+    // (GET /admin/events). Events with rows are patched into the loaded
+    // tables; bulk changes only carry ids, so that list is reloaded. The
+    // browser reconnects on its own and is sent what it missed, or a
+    // "resync" event when that is no longer available.
+    //
+    // EventSource can't send the admin token, so the stream is opened with a
+    // short-lived stream token in the URL instead. Once that has expired a
+    // reconnect is refused and EventSource gives up; a new token is fetched
+    // then and the stream reopened from the last event seen.
+    async connectChangeFeed() {
+        if (!localStorage.getItem('admin_token') || !window.EventSource) return;
+
+        let streamToken;
+        try {
+            ({ token: streamToken } = await this.apiRequest('/admin/events/token', 'POST'));
+        } catch (error) {
+            // Signed out, or the feed is disabled: the pages load as they are opened
+            console.error('Change feed unavailable:', error);
+            return;
+        }
+
+        const params = new URLSearchParams({ token: streamToken });
+        if (this.lastEventId) {
+            params.set('last_event_id', this.lastEventId);
+        }
+        const feed = new EventSource(`${this.API_BASE_URL}/admin/events?${params}`);
+        this.changeFeed = feed;
+        ['products', 'cases', 'content', 'media', 'contacts'].forEach(topic => {
+            feed.addEventListener(topic, (e) => {
+                this.lastEventId = e.lastEventId;
+                this.applyChange(JSON.parse(e.data));
+            });
+        });
+        feed.addEventListener('resync', () => {
+            this.lastEventId = null;
+            this.loadPageData(this.currentPage);
+        });
+        feed.addEventListener('error', () => {
+            if (feed.readyState === EventSource.CLOSED && this.changeFeed === feed) {
+                setTimeout(() => this.connectChangeFeed(), 1000);
+            }
+        });
+    }
+
+    applyChange(change) {
+        if (change.topic === 'contacts' && change.unread !== undefined) {
+            this.updateElement('contactCount', change.unread);
+            this.updateElement('contactBadge', change.unread);
+        }
+
+        const page = { products: 'products', contacts: 'contacts', cases: 'applications', media: 'media' }[change.topic];
+        const list = { products: 'products', contacts: 'contacts' }[change.topic];
+        if (!list || !this[list]) {
+            if (page && page === this.currentPage) {
+                this.loadPageData(page);
+            }
+            return;
+        }
+        if (!change.rows && change.action !== 'deleted') {
+            this[list] = null;
+            if (page === this.currentPage) {
+                this.loadPageData(page);
+            }
+            return;
+        }
+
+        const ids = new Set(change.ids);
+        const rows = this[list].filter(row => !ids.has(row.id));
+        if (change.action === 'created') {
+            // Contacts are listed newest first
+            this[list] = list === 'contacts' ? [...change.rows, ...rows] : [...rows, ...change.rows];
+        } else if (change.action === 'updated') {
+            const updated = new Map(change.rows.map(row => [row.id, row]));
+            this[list] = this[list].map(row => updated.get(row.id) || row);
+        } else {
+            this[list] = rows;
+        }
+
+        if (list === 'products') {
+            this.renderProductsTable(this.products);
+            this.updateElement('productCount', this.products.length);
+        } else {
+            this.renderContactsTable(this.contacts);
+        }
+    }
+
     // Utility methods
     updateElement(id, content) {
         const element = document.getElementById(id);
@@ -637,6 +805,8 @@ class AdminPanel {
     logout() {
         if (confirm('Are you sure you want to logout?')) {
             // Implement logout logic
+            this.changeFeed?.close();
+            this.changeFeed = null;
             localStorage.removeItem('admin_token');
             window.location.href = '/admin/login.html';
         }
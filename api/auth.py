@@ -1,27 +1,137 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+from typing import Optional, Tuple
 import os
-from dotenv import load_dotenv
+import time
 
-load_dotenv()
+from .cache import TTLCache
+from .config import settings
+from .metrics import LatencyStats
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# python-jose (with cryptography) and passlib are imported on first use, so
+# routes that never touch a token or a password don't pay for them on a cold
+# start.
+
+# Password hashing. Hashes below BCRYPT_ROUNDS are flagged by needs_update()
+# and upgraded on the next successful login.
+BCRYPT_ROUNDS = settings.bcrypt_rounds
+_pwd_context = None
+
+def pwd_context():
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+
+        _pwd_context = CryptContext(
+            schemes=["bcrypt"],
+            deprecated="auto",
+            bcrypt__rounds=BCRYPT_ROUNDS,
+            bcrypt__min_rounds=BCRYPT_ROUNDS,
+        )
+    return _pwd_context
 
 # JWT settings
-SECRET_KEY = os.getenv("SECRET_KEY")
-if not SECRET_KEY:
-    raise RuntimeError("SECRET_KEY environment variable is not set. Please configure a strong secret key.")
-ALGORITHM = os.getenv("ALGORITHM", "HS256")
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
+settings.require("SECRET_KEY")
+SECRET_KEY = settings.secret_key
+ALGORITHM = settings.algorithm
+ACCESS_TOKEN_EXPIRE_MINUTES = settings.access_token_expire_minutes
+
+# AUTH_MODE=stateless (default) trusts the id/role claims of a valid token and
+# only checks that its token version is current and the user still active,
+# from user_state_cache; the database is hit at most once per user per
+# AUTH_CACHE_TTL_SECONDS. AUTH_MODE=db loads the user row on every request.
+AUTH_MODE = settings.auth_mode
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return pwd_context().hash(password)
+
+# bcrypt costs 100-300 ms of CPU per call, so the request path never runs it on
+# the event loop. Calls go to a small dedicated thread pool (the bcrypt C code
+# releases the GIL, so threads give real parallelism) behind an admission
+# limit: once PASSWORD_HASH_MAX_PENDING calls are queued or running, further
+# logins are shed with HashingOverloaded instead of piling up behind them.
+PASSWORD_HASH_WORKERS = settings.password_hash_workers
+PASSWORD_HASH_MAX_PENDING = settings.password_hash_max_pending
+
+_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+_hash_pending = 0
+hash_queue_stats = LatencyStats()
+hash_run_stats = LatencyStats()
+hash_rejections = 0
+
+# Verified against when the email is unknown, so that a miss costs the same
+# bcrypt work as a wrong password and response timing doesn't reveal which
+# accounts exist. Precomputed for the default cost; other costs build one
+# lazily (inside the worker) on first use.
+_DEFAULT_DUMMY_HASH = "$2b$12$q/KuSX954fAYEIpzKXlqzuFiny/9SvKnfJVB.GSX45TiDfncrI.fS"
+_dummy_hash = _DEFAULT_DUMMY_HASH if BCRYPT_ROUNDS == 12 else None
+
+def _get_dummy_hash() -> str:
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = pwd_context().hash(os.urandom(16).hex())
+    return _dummy_hash
+
+class HashingOverloaded(Exception):
+    pass
+
+async def _run_hashing(fn, *args):
+    global _hash_pending, hash_rejections
+    if _hash_pending >= PASSWORD_HASH_MAX_PENDING:
+        hash_rejections += 1
+        raise HashingOverloaded()
+    _hash_pending += 1
+    submitted = time.perf_counter()
+
+    def job():
+        started = time.perf_counter()
+        hash_queue_stats.record((started - submitted) * 1000)
+        try:
+            return fn(*args)
+        finally:
+            hash_run_stats.record((time.perf_counter() - started) * 1000)
+
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor, job)
+    finally:
+        _hash_pending -= 1
+
+def _verify_and_rehash(plain_password: str, hashed_password: Optional[str]) -> Tuple[bool, Optional[str]]:
+    if hashed_password is None:
+        pwd_context().verify(plain_password, _get_dummy_hash())
+        return False, None
+    if not pwd_context().verify(plain_password, hashed_password):
+        return False, None
+    # Upgrade hashes made with an older scheme or cost factor while we have
+    # the plaintext
+    if pwd_context().needs_update(hashed_password):
+        return True, pwd_context().hash(plain_password)
+    return True, None
+
+async def verify_password_async(plain_password: str, hashed_password: Optional[str]) -> Tuple[bool, Optional[str]]:
+    """Verify off the event loop.
+
+    Returns ``(valid, new_hash)``; ``new_hash`` is set when the stored hash
+    should be replaced. Pass ``hashed_password=None`` for unknown users.
+    """
+    return await _run_hashing(_verify_and_rehash, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_hashing(get_password_hash, password)
+
+def hashing_stats() -> dict:
+    return {
+        "workers": PASSWORD_HASH_WORKERS,
+        "max_pending": PASSWORD_HASH_MAX_PENDING,
+        "pending": _hash_pending,
+        "rejected": hash_rejections,
+        "queue_time": hash_queue_stats.snapshot(),
+        "hash_time": hash_run_stats.snapshot(),
+    }
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -30,12 +140,53 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
+    from jose import jwt
+
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 def verify_token(token: str) -> Optional[dict]:
+    from jose import JWTError, jwt
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         return payload
     except JWTError:
         return None
+
+def token_claims(user) -> dict:
+    return {"sub": user.email, "uid": user.id, "role": user.role, "tv": user.token_version or 0}
+
+# EventSource can't send an Authorization header, so the change feed's token
+# goes in the URL, where access logs keep it. It is a separate token that is
+# only good for opening the stream and expires quickly; an API token is never
+# accepted there.
+STREAM_TOKEN_SCOPE = "events"
+STREAM_TOKEN_SECONDS = 60
+
+def create_stream_token(user) -> str:
+    return create_access_token(
+        {**token_claims(user), "scope": STREAM_TOKEN_SCOPE}, timedelta(seconds=STREAM_TOKEN_SECONDS)
+    )
+
+class TokenUser:
+    """The authenticated user as described by the token claims."""
+
+    __slots__ = ("id", "email", "role", "token_version")
+
+    def __init__(self, id: int, email: str, role: Optional[str], token_version: int = 0):
+        self.id = id
+        self.email = email
+        self.role = role
+        self.token_version = token_version
+
+    @classmethod
+    def from_claims(cls, payload: dict) -> "TokenUser":
+        return cls(payload["uid"], payload.get("sub"), payload.get("role"), payload.get("tv", 0))
+
+# user id -> (token_version, is_active). Revocation on this instance drops the
+# entry immediately; other instances notice within the TTL.
+user_state_cache = TTLCache(
+    maxsize=settings.auth_cache_max_entries,
+    ttl=settings.auth_cache_ttl_seconds,
+)
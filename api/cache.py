@@ -0,0 +1,115 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+from .config import settings
+from .events import on_change
+
+# Sentinel so that cached falsy values (empty lists) still count as hits
+MISSING = object()
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries also expire after ``ttl`` seconds.
+
+    Keys are tuples whose first element is a namespace (``"products"``,
+    ``"cases"``, ``"content"``) so that a write can drop every entry that
+    belongs to the table it touched.
+    """
+
+    def __init__(self, maxsize: int = 512, ttl: float = 300.0, enabled: bool = True):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.enabled = enabled
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        if not self.enabled:
+            return default
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        if not self.enabled or self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, namespace: str) -> int:
+        with self._lock:
+            stale = [key for key in self._data if isinstance(key, tuple) and key and key[0] == namespace]
+            for key in stale:
+                del self._data[key]
+            self.invalidations += len(stale)
+            return len(stale)
+
+    def discard(self, key: Hashable) -> None:
+        with self._lock:
+            if self._data.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self.invalidations += len(self._data)
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+# Shared read-through cache for the public catalog endpoints. Each serverless
+# instance has its own copy; admin writes on this instance invalidate it
+# immediately and the TTL bounds staleness on the others.
+response_cache = TTLCache(
+    maxsize=settings.cache_max_entries,
+    ttl=settings.cache_ttl_seconds,
+    enabled=settings.cache_enabled,
+)
+
+# Cached payloads assembled from several tables (see /api/bootstrap)
+COMPOSITE_NAMESPACES = ("bootstrap",)
+
+
+@on_change
+def _invalidate_responses(namespace: str) -> None:
+    response_cache.invalidate(namespace)
+    for composite in COMPOSITE_NAMESPACES:
+        response_cache.invalidate(composite)
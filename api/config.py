@@ -0,0 +1,163 @@
+import os
+import tempfile
+
+from dotenv import load_dotenv
+
+# Every environment variable the API reads, parsed once per process into
+# ``settings``. .env is loaded here and nowhere else. Attribute names are the
+# variable names in lower case; modules keep their own constants (e.g.
+# auth.AUTH_MODE, ingest.MODE) as aliases of these fields. DEPLOYMENT-GUIDE.md
+# describes each variable.
+#
+# This module imports nothing heavy, so api.main can read its settings
+# without pulling in the database, auth or schema modules.
+
+TRUE_VALUES = ("1", "true", "yes")
+
+AUTH_MODES = ("stateless", "db")
+POOL_MODES = ("null", "queue", "pgbouncer")
+CONTACT_INGEST_MODES = ("sync", "spool", "queue")
+SNAPSHOT_AUTO_PUBLISH_MODES = ("off", "local", "webhook")
+CHANGE_FEED_MODES = ("auto", "memory", "postgres", "off")
+
+
+def _str(name, default=None):
+    return os.getenv(name, default)
+
+
+def _lower(name, default):
+    return os.getenv(name, default).lower()
+
+
+def _int(name, default):
+    return int(os.getenv(name, default))
+
+
+def _float(name, default):
+    return float(os.getenv(name, default))
+
+
+def _bool(name, default):
+    return os.getenv(name, default).lower() in TRUE_VALUES
+
+
+def _choice(name, default, choices):
+    value = _lower(name, default)
+    if value not in choices:
+        raise RuntimeError(f"{name} must be one of {', '.join(choices)}; got {value!r}")
+    return value
+
+
+class Settings:
+    """The API's configuration, read from the environment (and .env)."""
+
+    def __init__(self):
+        self.serverless = bool(os.getenv("VERCEL") or os.getenv("AWS_LAMBDA_FUNCTION_NAME"))
+
+        # Database (api.database)
+        self.database_url = _str("DATABASE_URL")
+        self.async_database_url = _str("ASYNC_DATABASE_URL")
+        self.db_async = _lower("DB_ASYNC", "auto")
+        self.db_pool_mode = _choice("DB_POOL_MODE", "auto", ("auto",) + POOL_MODES)
+        self.db_pool_size = _int("DB_POOL_SIZE", 5)
+        self.db_max_overflow = _int("DB_MAX_OVERFLOW", 5)
+        self.db_pool_timeout = _float("DB_POOL_TIMEOUT", 10)
+        self.db_pool_recycle = _int("DB_POOL_RECYCLE", 300)
+        self.db_schema_check = _bool("DB_SCHEMA_CHECK", "false")
+        self.database_replica_urls = tuple(
+            url.strip() for url in _str("DATABASE_REPLICA_URLS", "").split(",") if url.strip()
+        )
+        self.db_read_your_writes_seconds = _float("DB_READ_YOUR_WRITES_SECONDS", 5)
+        self.db_replica_retry_seconds = _float("DB_REPLICA_RETRY_SECONDS", 30)
+        self.db_replica_connect_timeout = _float("DB_REPLICA_CONNECT_TIMEOUT", 3)
+        self.admin_email = _str("ADMIN_EMAIL")
+        self.admin_password = _str("ADMIN_PASSWORD")
+
+        # Authentication (api.auth)
+        self.secret_key = _str("SECRET_KEY")
+        self.algorithm = _str("ALGORITHM", "HS256")
+        self.access_token_expire_minutes = _int("ACCESS_TOKEN_EXPIRE_MINUTES", 30)
+        self.auth_mode = _choice("AUTH_MODE", "stateless", AUTH_MODES)
+        self.auth_cache_max_entries = _int("AUTH_CACHE_MAX_ENTRIES", 1024)
+        self.auth_cache_ttl_seconds = _float("AUTH_CACHE_TTL_SECONDS", 60)
+        self.bcrypt_rounds = _int("BCRYPT_ROUNDS", 12)
+        self.password_hash_workers = _int("PASSWORD_HASH_WORKERS", 2)
+        self.password_hash_max_pending = _int("PASSWORD_HASH_MAX_PENDING", 16)
+
+        # Response cache (api.cache) and compression (api.compression)
+        self.cache_enabled = _bool("CACHE_ENABLED", "true")
+        self.cache_max_entries = _int("CACHE_MAX_ENTRIES", 512)
+        self.cache_ttl_seconds = _float("CACHE_TTL_SECONDS", 300)
+        self.compress_enabled = _bool("COMPRESS_ENABLED", "true")
+        self.compress_min_bytes = _int("COMPRESS_MIN_BYTES", 1024)
+
+        # Request timing (api.timing)
+        self.server_timing = _bool("SERVER_TIMING", "true")
+        self.request_log = _lower("REQUEST_LOG", "slow")
+        self.slow_request_ms = _float("SLOW_REQUEST_MS", 500)
+        self.query_warn_threshold = _int("QUERY_WARN_THRESHOLD", 10)
+
+        # Rate limiting (api.ratelimit)
+        self.rate_limit_backend = _lower("RATE_LIMIT_BACKEND", "memory")
+        self.rate_limit_max_keys = _int("RATE_LIMIT_MAX_KEYS", 10000)
+        self.redis_url = _str("REDIS_URL")
+        # Vercel's edge sets X-Forwarded-For itself, so it is trusted there
+        self.trust_proxy_headers = _bool("TRUST_PROXY_HEADERS", "true" if os.getenv("VERCEL") else "false")
+        self.login_rate_limit = _int("LOGIN_RATE_LIMIT", 5)
+        self.login_rate_window_seconds = _int("LOGIN_RATE_WINDOW_SECONDS", 900)
+        self.contact_rate_limit = _int("CONTACT_RATE_LIMIT", 5)
+        self.contact_rate_window_seconds = _int("CONTACT_RATE_WINDOW_SECONDS", 600)
+
+        # Search (api.search)
+        self.search_backend = _lower("SEARCH_BACKEND", "auto")
+        self.search_index_ttl_seconds = _float("SEARCH_INDEX_TTL_SECONDS", 300)
+
+        # Contact ingestion (api.ingest)
+        self.contact_ingest = _choice("CONTACT_INGEST", "sync", CONTACT_INGEST_MODES)
+        self.contact_batch_size = _int("CONTACT_BATCH_SIZE", 200)
+        self.contact_flush_interval_seconds = _float("CONTACT_FLUSH_INTERVAL_SECONDS", 2)
+        self.contact_spool_dir = _str("CONTACT_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "asatec-contact-spool"))
+        self.contact_spool_fsync = _bool("CONTACT_SPOOL_FSYNC", "true")
+        self.contact_dedup_window_seconds = _int("CONTACT_DEDUP_WINDOW_SECONDS", 86400)
+        self.contact_notify_webhook_url = _str("CONTACT_NOTIFY_WEBHOOK_URL")
+
+        # Contact export (api.export)
+        self.contact_export_page_rows = _int("CONTACT_EXPORT_PAGE_ROWS", 50000)
+        self.contact_export_chunk_rows = _int("CONTACT_EXPORT_CHUNK_ROWS", 1000)
+        self.contact_export_max_seconds = _float("CONTACT_EXPORT_MAX_SECONDS", 25)
+
+        # Admin change feed (api.feed)
+        self.change_feed = _choice("CHANGE_FEED", "auto", CHANGE_FEED_MODES)
+        self.change_feed_listen_url = _str("CHANGE_FEED_LISTEN_URL")
+        # Vercel ends functions after 30 s; EventSource reconnects on its own
+        self.change_feed_stream_seconds = _float("CHANGE_FEED_STREAM_SECONDS", 25 if self.serverless else 300)
+        self.change_feed_heartbeat_seconds = _float("CHANGE_FEED_HEARTBEAT_SECONDS", 15)
+
+        # Media (api.media)
+        self.media_root = _str("MEDIA_ROOT", os.path.join(tempfile.gettempdir(), "asatec-media"))
+        self.media_public_url = _str("MEDIA_PUBLIC_URL", "/api/media/files").rstrip("/")
+        self.media_max_bytes = _int("MEDIA_MAX_BYTES", 25 * 1024 * 1024)
+        self.media_variant_widths = tuple(sorted({
+            int(width) for width in _str("MEDIA_VARIANT_WIDTHS", "320,640,1024,1600").split(",")
+        }))
+        self.media_display_width = _int("MEDIA_DISPLAY_WIDTH", 1024)
+        self.media_webp_quality = _int("MEDIA_WEBP_QUALITY", 80)
+        self.media_jpeg_quality = _int("MEDIA_JPEG_QUALITY", 82)
+        self.media_workers = _int("MEDIA_WORKERS", 2)
+        self.media_max_pixels = _int("MEDIA_MAX_PIXELS", 50_000_000)
+
+        # Static snapshots (api.snapshots); None means frontend/snapshots
+        self.snapshot_dir = _str("SNAPSHOT_DIR")
+        self.snapshot_auto_publish = _choice("SNAPSHOT_AUTO_PUBLISH", "off", SNAPSHOT_AUTO_PUBLISH_MODES)
+        self.snapshot_webhook_url = _str("SNAPSHOT_WEBHOOK_URL")
+        self.snapshot_debounce_seconds = _float("SNAPSHOT_DEBOUNCE_SECONDS", 2)
+
+    def require(self, *names: str) -> None:
+        """Raise unless each of the named variables is set."""
+        missing = [name for name in names if not getattr(self, name.lower())]
+        if missing:
+            raise RuntimeError(f"Required environment variables are not set: {', '.join(missing)}")
+
+
+load_dotenv()
+settings = Settings()
@@ -1,8 +1,72 @@
+from sqlalchemy import Integer, bindparam, column, delete, func, insert, select, tuple_, update, values
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from .models import *
 from .schemas import *
 from .auth import get_password_hash
-from typing import List, Optional
+from .events import emit_change
+from . import feed, media
+from typing import List, Optional, Sequence
+import json
+
+# Commit a write: its admin change feed event goes out in the same
+# transaction, and whatever is derived from the table (response cache,
+# static snapshots) is told once it is committed
+def _commit(db: Session, namespace: str, action: str, rows=None, ids=()):
+    feed.publish(db, namespace, action, rows=rows, ids=ids)
+    # Detach the (loaded) rows so committing does not expire the caller's copies
+    for row in rows or ():
+        if row in db:
+            db.expunge(row)
+    db.commit()
+    emit_change(namespace)
+
+class VersionConflict(Exception):
+    """The row exists, but not at any of the versions the client expected."""
+
+    def __init__(self, current_version: int):
+        super().__init__(current_version)
+        self.current_version = current_version
+
+# Single-statement writes: UPDATE ... RETURNING and DELETE ... RETURNING
+# replace SELECT + modify + refresh SELECT; the caller commits. ``expected_versions``
+# (from If-Match) makes the write conditional on the row's version; the
+# extra lookup to tell "changed" from "missing" only runs when nothing matched.
+def _check_conflict(db: Session, model, row_id: int):
+    current = db.execute(select(model.version).where(model.id == row_id)).scalar()
+    if current is not None:
+        raise VersionConflict(current)
+
+def _update_returning(db: Session, model, row_id: int, changes: dict, expected_versions: Optional[List[int]] = None):
+    statement = update(model).where(model.id == row_id)
+    if expected_versions is not None:
+        statement = statement.where(model.version.in_(expected_versions))
+    if "version" in model.__table__.c:
+        changes = {**changes, "version": model.version + 1}
+    statement = statement.values(changes).returning(model).execution_options(synchronize_session=False)
+    row = db.execute(statement).scalars().first()
+    if row is None:
+        db.rollback()
+        if expected_versions is not None:
+            _check_conflict(db, model, row_id)
+        return None
+    # Detached so committing does not expire the returned state (and reload
+    # it when the response is serialized)
+    db.expunge(row)
+    return row
+
+def _delete_returning(db: Session, model, row_id: int, expected_versions: Optional[List[int]] = None) -> bool:
+    table = model.__table__
+    statement = delete(table).where(table.c.id == row_id)
+    if expected_versions is not None:
+        statement = statement.where(table.c.version.in_(expected_versions))
+    deleted = db.execute(statement.returning(table.c.id)).scalar()
+    if deleted is None:
+        db.rollback()
+        if expected_versions is not None:
+            _check_conflict(db, model, row_id)
+        return False
+    return True
 
 # User CRUD operations
 def get_user_by_email(db: Session, email: str):
@@ -11,6 +75,20 @@ def get_user_by_email(db: Session, email: str):
 def get_user_by_id(db: Session, user_id: int):
     return db.query(User).filter(User.id == user_id).first()
 
+def update_user_password_hash(db: Session, user_id: int, password_hash: str):
+    db.query(User).filter(User.id == user_id).update({User.password_hash: password_hash}, synchronize_session=False)
+    db.commit()
+
+def get_user_auth_state(db: Session, user_id: int):
+    # Just what token validation needs, without loading the whole row
+    return db.query(User.token_version, User.is_active).filter(User.id == user_id).first()
+
+def revoke_user_tokens(db: Session, user_id: int):
+    db.query(User).filter(User.id == user_id).update(
+        {User.token_version: User.token_version + 1}, synchronize_session=False
+    )
+    db.commit()
+
 def create_user(db: Session, user: UserCreate):
     hashed_password = get_password_hash(user.password)
     db_user = User(
@@ -33,62 +111,99 @@ def get_page_content_by_name(db: Session, page_name: str):
     ).first()
 
 def get_all_page_content(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(PageContent).offset(skip).limit(limit).all()
+    return db.query(PageContent).order_by(PageContent.page_name).offset(skip).limit(limit).all()
 
 def create_page_content(db: Session, content: PageContentCreate):
     db_content = PageContent(**content.dict())
     db.add(db_content)
-    db.commit()
+    db.flush()
     db.refresh(db_content)
+    _commit(db, "content", "created", rows=[db_content])
     return db_content
 
-def update_page_content(db: Session, content_id: int, content_update: PageContentUpdate):
-    db_content = db.query(PageContent).filter(PageContent.id == content_id).first()
+def update_page_content(db: Session, content_id: int, content_update: PageContentUpdate, expected_versions: Optional[List[int]] = None):
+    db_content = _update_returning(db, PageContent, content_id, content_update.dict(exclude_unset=True), expected_versions)
     if db_content:
-        update_data = content_update.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(db_content, field, value)
-        db.commit()
-        db.refresh(db_content)
+        _commit(db, "content", "updated", rows=[db_content])
     return db_content
 
-def delete_page_content(db: Session, content_id: int):
-    db_content = db.query(PageContent).filter(PageContent.id == content_id).first()
-    if db_content:
-        db.delete(db_content)
-        db.commit()
+def delete_page_content(db: Session, content_id: int, expected_versions: Optional[List[int]] = None):
+    if _delete_returning(db, PageContent, content_id, expected_versions):
+        _commit(db, "content", "deleted", ids=[content_id])
         return True
     return False
 
 # Product CRUD operations
-def get_all_products(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(Product).filter(Product.is_active == True).order_by(Product.sort_order).offset(skip).limit(limit).all()
+# List queries take an optional keyset position ``after`` (the sort key of the
+# last row already seen). With it the database seeks straight to the next page
+# through the (sort_order, id) / (created_at, id) indexes instead of reading
+# and discarding ``skip`` rows; ``skip`` is kept for existing callers.
+def _catalog_filters(query, model, facet_column, values: Optional[Sequence[str]], is_featured: Optional[bool]):
+    # One value uses the (facet, sort_order, id) index as an equality prefix
+    if values:
+        query = query.filter(facet_column == values[0] if len(values) == 1 else facet_column.in_(values))
+    if is_featured is not None:
+        query = query.filter(model.is_featured == is_featured)
+    return query
+
+def _catalog_facets(db: Session, model, facet_column, name: str) -> dict:
+    """Active row counts per facet value, with the featured subset, in one query.
+
+    FILTER aggregates count the featured rows in the same pass. The groups
+    come off the (facet, sort_order, id, is_featured) index in order, so
+    there is no sort, and Postgres can answer from the index alone.
+    """
+    rows = db.execute(
+        select(facet_column, func.count(), func.count().filter(model.is_featured == True))
+        .where(model.is_active == True)
+        .group_by(facet_column)
+        .order_by(facet_column)
+    ).all()
+    return {
+        "total": sum(count for _, count, _ in rows),
+        "featured": sum(featured for _, _, featured in rows),
+        name: [{"value": value, "count": count, "featured": featured} for value, count, featured in rows],
+    }
+
+def get_all_products(
+    db: Session, skip: int = 0, limit: int = 100, after: Optional[tuple] = None, include_inactive: bool = False,
+    categories: Optional[Sequence[str]] = None, is_featured: Optional[bool] = None,
+):
+    query = db.query(Product)
+    if not include_inactive:
+        query = query.filter(Product.is_active == True)
+    query = _catalog_filters(query, Product, Product.category, categories, is_featured)
+    if after is not None:
+        query = query.filter(tuple_(Product.sort_order, Product.id) > tuple_(*after))
+    return query.order_by(Product.sort_order, Product.id).offset(skip).limit(limit).all()
+
+def get_product_facets(db: Session) -> dict:
+    return _catalog_facets(db, Product, Product.category, "categories")
 
 def get_product_by_id(db: Session, product_id: int):
     return db.query(Product).filter(Product.id == product_id, Product.is_active == True).first()
 
 def create_product(db: Session, product: ProductCreate):
-    db_product = Product(**product.dict())
+    values = product.dict()
+    _display_images(db, [values])
+    db_product = Product(**values)
     db.add(db_product)
-    db.commit()
+    db.flush()
     db.refresh(db_product)
+    _commit(db, "products", "created", rows=[db_product])
     return db_product
 
-def update_product(db: Session, product_id: int, product_update: ProductUpdate):
-    db_product = db.query(Product).filter(Product.id == product_id).first()
+def update_product(db: Session, product_id: int, product_update: ProductUpdate, expected_versions: Optional[List[int]] = None):
+    changes = product_update.dict(exclude_unset=True)
+    _display_images(db, [changes])
+    db_product = _update_returning(db, Product, product_id, changes, expected_versions)
     if db_product:
-        update_data = product_update.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(db_product, field, value)
-        db.commit()
-        db.refresh(db_product)
+        _commit(db, "products", "updated", rows=[db_product])
     return db_product
 
-def delete_product(db: Session, product_id: int):
-    db_product = db.query(Product).filter(Product.id == product_id).first()
-    if db_product:
-        db.delete(db_product)
-        db.commit()
+def delete_product(db: Session, product_id: int, expected_versions: Optional[List[int]] = None):
+    if _delete_returning(db, Product, product_id, expected_versions):
+        _commit(db, "products", "deleted", ids=[product_id])
         return True
     return False
 
@@ -100,45 +215,412 @@ def create_contact_submission(db: Session, contact: ContactSubmissionCreate):
     db.refresh(db_contact)
     return db_contact
 
-def get_all_contact_submissions(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(ContactSubmission).order_by(ContactSubmission.created_at.desc()).offset(skip).limit(limit).all()
+# Contact ingestion (api.ingest). One multi-row INSERT ... ON CONFLICT
+# (dedup_hash) DO NOTHING RETURNING per batch: a resubmission is skipped
+# without failing the rest of the batch, and only new rows come back.
+def _insert_contacts(db: Session, rows: List[dict]) -> List[ContactSubmission]:
+    if not rows:
+        return []
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    statement = (
+        dialect_insert(ContactSubmission).values(rows)
+        .on_conflict_do_nothing(index_elements=[ContactSubmission.dedup_hash])
+        .returning(ContactSubmission)
+    )
+    inserted = db.execute(statement).scalars().all()
+    for row in inserted:
+        db.expunge(row)
+    return inserted
+
+def insert_contact_submissions(db: Session, rows: List[dict]) -> List[ContactSubmission]:
+    inserted = _insert_contacts(db, rows)
+    if inserted:
+        _publish_contacts(db, "created", rows=inserted)
+    db.commit()
+    return inserted
+
+def get_contact_submission_by_dedup_hash(db: Session, dedup_hash: str):
+    return db.query(ContactSubmission).filter(ContactSubmission.dedup_hash == dedup_hash).first()
+
+def enqueue_contact_submission(db: Session, dedup_hash: str, payload: str, received_at):
+    db.execute(insert(ContactQueueEntry).values(dedup_hash=dedup_hash, payload=payload, received_at=received_at))
+    db.commit()
+
+def _queue_batch(limit: int):
+    return (
+        select(ContactQueueEntry.id, ContactQueueEntry.dedup_hash, ContactQueueEntry.payload, ContactQueueEntry.received_at)
+        .order_by(ContactQueueEntry.id).limit(limit).with_for_update(skip_locked=True)
+    )
+
+def drain_contact_queue(db: Session, limit: int = 500):
+    """Move up to ``limit`` queued submissions into contact_submissions.
+
+    Returns (drained, inserted rows). SKIP LOCKED lets concurrent drainers
+    take disjoint batches on Postgres; the insert and the delete commit
+    together, so a failed drain leaves the entries queued.
+    """
+    entries = db.execute(_queue_batch(limit)).all()
+    if not entries:
+        db.rollback()
+        return 0, []
+    rows = [
+        {**json.loads(entry.payload), "dedup_hash": entry.dedup_hash, "created_at": entry.received_at}
+        for entry in entries
+    ]
+    inserted = _insert_contacts(db, rows)
+    db.execute(delete(ContactQueueEntry).where(ContactQueueEntry.id.in_([entry.id for entry in entries])))
+    if inserted:
+        _publish_contacts(db, "created", rows=inserted)
+    db.commit()
+    return len(entries), inserted
+
+def count_queued_contacts(db: Session) -> int:
+    return db.execute(select(func.count()).select_from(ContactQueueEntry)).scalar()
+
+def get_all_contact_submissions(db: Session, skip: int = 0, limit: int = 100, after: Optional[tuple] = None):
+    query = db.query(ContactSubmission)
+    if after is not None:
+        query = query.filter(tuple_(ContactSubmission.created_at, ContactSubmission.id) < tuple_(*after))
+    return query.order_by(ContactSubmission.created_at.desc(), ContactSubmission.id.desc()).offset(skip).limit(limit).all()
 
 def mark_contact_as_read(db: Session, contact_id: int):
-    db_contact = db.query(ContactSubmission).filter(ContactSubmission.id == contact_id).first()
+    db_contact = _update_returning(db, ContactSubmission, contact_id, {"is_read": True})
     if db_contact:
-        db_contact.is_read = True
+        _publish_contacts(db, "updated", rows=[db_contact])
         db.commit()
-        db.refresh(db_contact)
     return db_contact
 
+# Contacts don't feed the response cache, so they are committed without
+# emit_change; their change feed events carry the unread count for the
+# dashboard badge
+def _publish_contacts(db: Session, action: str, rows=None):
+    if not feed.ENABLED:
+        return
+    unread = db.execute(
+        select(func.count()).select_from(ContactSubmission).where(ContactSubmission.is_read == False)
+    ).scalar()
+    feed.publish(db, "contacts", action, rows=rows, unread=unread)
+
+# Contact export (api.export): plain column rows in inbox order, newest first.
+# ``since`` is inclusive, ``until`` exclusive. A page is bounded by
+# (created_at, id) keys: ``after`` is the last key of the previous page and
+# ``through`` the last key of this one.
+CONTACT_EXPORT_FIELDS = ("id", "created_at", "name", "email", "phone", "company", "subject", "message", "is_read")
+
+def contact_export_statement(since=None, until=None, is_read: Optional[bool] = None,
+                             after: Optional[tuple] = None, through: Optional[tuple] = None):
+    key = tuple_(ContactSubmission.created_at, ContactSubmission.id)
+    statement = select(*(getattr(ContactSubmission, field) for field in CONTACT_EXPORT_FIELDS))
+    if since is not None:
+        statement = statement.where(ContactSubmission.created_at >= since)
+    if until is not None:
+        statement = statement.where(ContactSubmission.created_at < until)
+    if is_read is not None:
+        statement = statement.where(ContactSubmission.is_read == is_read)
+    if after is not None:
+        statement = statement.where(key < tuple_(*after))
+    if through is not None:
+        statement = statement.where(key >= tuple_(*through))
+    return statement.order_by(ContactSubmission.created_at.desc(), ContactSubmission.id.desc())
+
+def get_contact_export_boundary(db: Session, limit: int, since=None, until=None,
+                                is_read: Optional[bool] = None, after: Optional[tuple] = None):
+    """Key of the ``limit``-th row of an export page, or None if no row follows it.
+
+    Only (created_at, id) is read, off the inbox indexes, so the page end is
+    known before any row is streamed.
+    """
+    statement = contact_export_statement(since, until, is_read, after).with_only_columns(
+        ContactSubmission.created_at, ContactSubmission.id
+    )
+    keys = db.execute(statement.offset(limit - 1).limit(2)).all()
+    return tuple(keys[0]) if len(keys) == 2 else None
+
 # Application Case CRUD operations
-def get_all_application_cases(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(ApplicationCase).filter(ApplicationCase.is_active == True).order_by(ApplicationCase.sort_order).offset(skip).limit(limit).all()
+def get_all_application_cases(
+    db: Session, skip: int = 0, limit: int = 100, after: Optional[tuple] = None, include_inactive: bool = False,
+    industries: Optional[Sequence[str]] = None, is_featured: Optional[bool] = None,
+):
+    query = db.query(ApplicationCase)
+    if not include_inactive:
+        query = query.filter(ApplicationCase.is_active == True)
+    query = _catalog_filters(query, ApplicationCase, ApplicationCase.industry, industries, is_featured)
+    if after is not None:
+        query = query.filter(tuple_(ApplicationCase.sort_order, ApplicationCase.id) > tuple_(*after))
+    return query.order_by(ApplicationCase.sort_order, ApplicationCase.id).offset(skip).limit(limit).all()
+
+def get_application_case_facets(db: Session) -> dict:
+    return _catalog_facets(db, ApplicationCase, ApplicationCase.industry, "industries")
 
 def get_application_case_by_id(db: Session, case_id: int):
     return db.query(ApplicationCase).filter(ApplicationCase.id == case_id, ApplicationCase.is_active == True).first()
 
 def create_application_case(db: Session, case: ApplicationCaseCreate):
-    db_case = ApplicationCase(**case.dict())
+    values = case.dict()
+    _display_images(db, [values])
+    db_case = ApplicationCase(**values)
     db.add(db_case)
-    db.commit()
+    db.flush()
     db.refresh(db_case)
+    _commit(db, "cases", "created", rows=[db_case])
     return db_case
 
-def update_application_case(db: Session, case_id: int, case_update: ApplicationCaseUpdate):
-    db_case = db.query(ApplicationCase).filter(ApplicationCase.id == case_id).first()
+def update_application_case(db: Session, case_id: int, case_update: ApplicationCaseUpdate, expected_versions: Optional[List[int]] = None):
+    changes = case_update.dict(exclude_unset=True)
+    _display_images(db, [changes])
+    db_case = _update_returning(db, ApplicationCase, case_id, changes, expected_versions)
     if db_case:
-        update_data = case_update.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(db_case, field, value)
-        db.commit()
-        db.refresh(db_case)
+        _commit(db, "cases", "updated", rows=[db_case])
     return db_case
 
-def delete_application_case(db: Session, case_id: int):
-    db_case = db.query(ApplicationCase).filter(ApplicationCase.id == case_id).first()
-    if db_case:
-        db.delete(db_case)
-        db.commit()
+def delete_application_case(db: Session, case_id: int, expected_versions: Optional[List[int]] = None):
+    if _delete_returning(db, ApplicationCase, case_id, expected_versions):
+        _commit(db, "cases", "deleted", ids=[case_id])
         return True
     return False
+
+# Media CRUD operations
+# Files and variants are handled by api.media; these only keep the rows.
+MEDIA_KINDS = {"image": "image/%", "document": "application/%"}
+
+def get_all_media_items(db: Session, skip: int = 0, limit: int = 100, kind: Optional[str] = None):
+    query = db.query(MediaItem)
+    if kind is not None:
+        query = query.filter(MediaItem.mime_type.like(MEDIA_KINDS[kind]))
+    return query.order_by(MediaItem.created_at.desc(), MediaItem.id.desc()).offset(skip).limit(limit).all()
+
+def get_media_item_by_id(db: Session, media_id: int):
+    return db.query(MediaItem).filter(MediaItem.id == media_id).first()
+
+def get_media_item_by_hash(db: Session, content_hash: str):
+    return db.query(MediaItem).filter(MediaItem.content_hash == content_hash).first()
+
+def get_media_types(db: Session) -> List[dict]:
+    rows = db.execute(
+        select(MediaItem.mime_type, func.count()).group_by(MediaItem.mime_type).order_by(MediaItem.mime_type)
+    ).all()
+    return [{"mime_type": mime_type, "count": count} for mime_type, count in rows]
+
+def create_media_item(db: Session, values: dict):
+    """Insert a MediaItem; returns (item, created).
+
+    Two uploads of the same file can race past the hash lookup; the loser
+    hits the unique content_hash index and gets the winner's row.
+    """
+    db_item = MediaItem(**values)
+    db.add(db_item)
+    try:
+        db.flush()
+    except IntegrityError:
+        db.rollback()
+        return get_media_item_by_hash(db, values["content_hash"]), False
+    db.refresh(db_item)
+    _commit(db, "media", "created", rows=[db_item])
+    return db_item, True
+
+def update_media_item(db: Session, media_id: int, media_update: MediaItemUpdate):
+    changes = media_update.dict(exclude_unset=True)
+    if not changes:
+        return get_media_item_by_id(db, media_id)
+    db_item = _update_returning(db, MediaItem, media_id, changes)
+    if db_item:
+        _commit(db, "media", "updated", rows=[db_item])
+    return db_item
+
+def set_media_variants(db: Session, media_id: int, width: int, height: int, variants: List[dict]):
+    db.execute(update(MediaItem).where(MediaItem.id == media_id).values(width=width, height=height, variants=variants))
+    _commit(db, "media", "updated", ids=[media_id])
+
+def delete_media_item(db: Session, media_id: int):
+    """Delete the row; returns (file_path, variants) so the caller can remove the files."""
+    table = MediaItem.__table__
+    deleted = db.execute(delete(table).where(table.c.id == media_id).returning(table.c.file_path, table.c.variants)).first()
+    if deleted is None:
+        db.rollback()
+        return None
+    _commit(db, "media", "deleted", ids=[media_id])
+    return deleted
+
+# An image_url pointing at an uploaded original is stored as the URL of its
+# display-size variant, so public pages never link the full-size upload.
+# One lookup per write, and only when such a URL is present.
+def _display_images(db: Session, rows: List[dict]) -> None:
+    hashes = {media.original_hash(row.get("image_url")) for row in rows} - {None}
+    if not hashes:
+        return
+    found = db.execute(select(MediaItem.content_hash, MediaItem.variants).where(MediaItem.content_hash.in_(hashes))).all()
+    display = {content_hash: media.display_variant(variants) for content_hash, variants in found}
+    for row in rows:
+        variant = display.get(media.original_hash(row.get("image_url")))
+        if variant is not None:
+            row["image_url"] = media.url(variant["key"])
+
+def media_display_urls(db: Session) -> int:
+    """Point existing product / case images at uploaded originals to their display variants."""
+    changed = 0
+    for model in (Product, ApplicationCase):
+        rows = [
+            {"id": row_id, "image_url": image_url}
+            for row_id, image_url in db.execute(select(model.id, model.image_url).where(model.image_url.like("%/originals/%")))
+        ]
+        before = [row["image_url"] for row in rows]
+        _display_images(db, rows)
+        rows = [row for row, old in zip(rows, before) if row["image_url"] != old]
+        if rows:
+            _update_rows(db, model.__table__, rows)
+            changed += len(rows)
+    if changed:
+        feed.publish(db, "products", "bulk")
+        feed.publish(db, "cases", "bulk")
+    db.commit()
+    if changed:
+        emit_change("products")
+        emit_change("cases")
+    return changed
+
+# Bulk operations
+# A bulk request is applied in one transaction with a fixed number of
+# statements: one DELETE ... RETURNING, one UPDATE per distinct set of changed
+# fields and one multi-row INSERT ... RETURNING, whatever the item count.
+# Unknown ids are reported per item and do not abort the rest.
+def _dedupe_by_id(rows: List[dict]) -> List[dict]:
+    # The last change for an id wins, as it would with sequential requests
+    return list({row["id"]: row for row in rows}.values())
+
+def _version_bump(table) -> dict:
+    return {"version": table.c.version + 1} if "version" in table.c else {}
+
+def _update_from_values(table, fields, group: List[dict]):
+    # UPDATE ... FROM (VALUES (...), (...)) AS v (id, ...) RETURNING id
+    data = values(
+        column("id", Integer), *[column(field, table.c[field].type) for field in fields], name="v"
+    ).data([(row["id"], *[row[field] for field in fields]) for row in group])
+    return (
+        update(table)
+        .where(table.c.id == data.c.id)
+        .values({**{field: data.c[field] for field in fields}, **_version_bump(table)})
+        .returning(table.c.id)
+    )
+
+def _update_rows(db: Session, table, rows: List[dict]) -> set:
+    """Apply ``rows`` (dicts of id + changed fields); return the ids that matched."""
+    matched = set()
+    groups = {}
+    for row in _dedupe_by_id(rows):
+        fields = tuple(sorted(field for field in row if field != "id"))
+        groups.setdefault(fields, []).append(row)
+    if () in groups:
+        # Nothing to change, but still report whether the id exists
+        ids = [row["id"] for row in groups.pop(())]
+        matched |= set(db.execute(select(table.c.id).where(table.c.id.in_(ids))).scalars())
+    for fields, group in groups.items():
+        if db.get_bind().dialect.name == "postgresql":
+            matched |= set(db.execute(_update_from_values(table, fields, group)).scalars())
+        else:
+            # SQLite cannot alias VALUES columns: find the existing ids, then
+            # one executemany UPDATE
+            ids = [row["id"] for row in group]
+            existing = set(db.execute(select(table.c.id).where(table.c.id.in_(ids))).scalars())
+            params = [
+                {"match_id": row["id"], **{f"new_{field}": row[field] for field in fields}}
+                for row in group if row["id"] in existing
+            ]
+            if params:
+                statement = (
+                    update(table)
+                    .where(table.c.id == bindparam("match_id"))
+                    .values({**{field: bindparam(f"new_{field}") for field in fields}, **_version_bump(table)})
+                )
+                db.execute(statement, params)
+            matched |= existing
+    return matched
+
+def _bulk_apply(db: Session, model, request, namespace: str) -> List[dict]:
+    table = model.__table__
+    results = []
+    try:
+        if request.delete:
+            statement = delete(table).where(table.c.id.in_(request.delete)).returning(table.c.id)
+            deleted = set(db.execute(statement).scalars())
+            for index, item_id in enumerate(request.delete):
+                results.append({"op": "delete", "index": index, "id": item_id,
+                                "status": "deleted" if item_id in deleted else "not_found"})
+        if request.update:
+            rows = [item.dict(exclude_unset=True) for item in request.update]
+            _display_images(db, rows)
+            matched = _update_rows(db, table, rows)
+            for index, row in enumerate(rows):
+                results.append({"op": "update", "index": index, "id": row["id"],
+                                "status": "updated" if row["id"] in matched else "not_found"})
+        if request.create:
+            rows = [item.dict() for item in request.create]
+            _display_images(db, rows)
+            # Batched into multi-row INSERTs on Postgres; SQLite cannot
+            # guarantee RETURNING order, so SQLAlchemy inserts row by row there
+            statement = insert(table).returning(table.c.id, sort_by_parameter_order=True)
+            created = db.execute(statement, rows).scalars().all()
+            for index, item_id in enumerate(created):
+                results.append({"op": "create", "index": index, "id": item_id, "status": "created"})
+        _commit(db, namespace, "bulk", ids=[result["id"] for result in results if result["status"] != "not_found"])
+    except Exception:
+        db.rollback()
+        raise
+    return results
+
+def _reorder(db: Session, model, items: List[ReorderItem], namespace: str) -> List[dict]:
+    rows = [{"id": item.id, "sort_order": item.sort_order} for item in items]
+    try:
+        matched = _update_rows(db, model.__table__, rows)
+        _commit(db, namespace, "reordered", ids=sorted(matched))
+    except Exception:
+        db.rollback()
+        raise
+    return [
+        {"op": "reorder", "index": index, "id": row["id"],
+         "status": "updated" if row["id"] in matched else "not_found"}
+        for index, row in enumerate(rows)
+    ]
+
+def bulk_page_content(db: Session, request: PageContentBulkRequest):
+    return _bulk_apply(db, PageContent, request, "content")
+
+def bulk_products(db: Session, request: ProductBulkRequest):
+    return _bulk_apply(db, Product, request, "products")
+
+def reorder_products(db: Session, items: List[ReorderItem]):
+    return _reorder(db, Product, items, "products")
+
+def bulk_application_cases(db: Session, request: ApplicationCaseBulkRequest):
+    return _bulk_apply(db, ApplicationCase, request, "cases")
+
+def reorder_application_cases(db: Session, items: List[ReorderItem]):
+    return _reorder(db, ApplicationCase, items, "cases")
+
+# Page bootstrap
+# Everything a public page renders on load, read in one session (and so on one
+# connection) instead of one request per resource. List queries select only
+# the requested columns plus what the ETag needs (id and the timestamps).
+_VALIDATOR_FIELDS = ("id", "created_at", "updated_at")
+
+def _select_fields(db: Session, model, fields, limit: int):
+    if limit <= 0:
+        return []
+    columns = [model.__table__.c[name] for name in dict.fromkeys((*_VALIDATOR_FIELDS, *fields))]
+    statement = (
+        select(*columns)
+        .where(model.is_active == True)
+        .order_by(model.sort_order, model.id)
+        .limit(limit)
+    )
+    return [dict(row) for row in db.execute(statement).mappings()]
+
+def get_page_bootstrap(db: Session, page_name: str, product_fields, case_fields,
+                       products_limit: int = 100, cases_limit: int = 100):
+    return {
+        "content": get_page_content_by_name(db, page_name),
+        "products": _select_fields(db, Product, product_fields, products_limit),
+        "cases": _select_fields(db, ApplicationCase, case_fields, cases_limit),
+    }
@@ -0,0 +1,111 @@
+import functools
+
+from starlette.concurrency import run_in_threadpool
+
+from . import crud, database
+from .replicas import is_unavailable
+from .search import search as full_text_search
+
+# Awaitable versions of the functions in api.crud for the request path.
+#
+# With an AsyncSession the sync function runs through AsyncSession.run_sync:
+# SQLAlchemy drives it in a greenlet and every round-trip is awaited on the
+# async driver, so the event loop is free while queries are in flight. With
+# a plain Session (DB_ASYNC=false) it runs in the threadpool instead. Either
+# way the query logic lives in one place, api.crud.
+
+# An empty tuple when DB_ASYNC is off, so sqlalchemy.ext.asyncio isn't
+# imported just for this check
+_ASYNC_SESSION = database.AsyncSession if database.DB_ASYNC else ()
+
+async def _call(fn, db, *args, **kwargs):
+    if isinstance(db, _ASYNC_SESSION):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
+
+# A read session (database.get_read_db) whose replica can't be reached is
+# moved to the primary and the call retried there. Only sessions still on
+# their replica qualify, and those haven't written anything.
+async def _fail_over(db, exc) -> bool:
+    replica = db.info.get("replica")
+    if replica is None or not is_unavailable(exc):
+        return False
+    replica.mark_failed(exc)
+    if isinstance(db, _ASYNC_SESSION):
+        await db.rollback()
+    else:
+        await run_in_threadpool(db.rollback)
+    db.info.pop("replica", None)
+    db.info.pop("replica_bind", None)
+    return True
+
+def _adapt(fn):
+    @functools.wraps(fn)
+    async def wrapper(db, *args, **kwargs):
+        try:
+            return await _call(fn, db, *args, **kwargs)
+        except Exception as exc:
+            if not await _fail_over(db, exc):
+                raise
+        return await _call(fn, db, *args, **kwargs)
+    return wrapper
+
+# User CRUD operations
+get_user_by_email = _adapt(crud.get_user_by_email)
+get_user_by_id = _adapt(crud.get_user_by_id)
+update_user_password_hash = _adapt(crud.update_user_password_hash)
+get_user_auth_state = _adapt(crud.get_user_auth_state)
+revoke_user_tokens = _adapt(crud.revoke_user_tokens)
+create_user = _adapt(crud.create_user)
+
+# Page Content CRUD operations
+get_page_content_by_name = _adapt(crud.get_page_content_by_name)
+get_all_page_content = _adapt(crud.get_all_page_content)
+create_page_content = _adapt(crud.create_page_content)
+update_page_content = _adapt(crud.update_page_content)
+delete_page_content = _adapt(crud.delete_page_content)
+bulk_page_content = _adapt(crud.bulk_page_content)
+
+# Product CRUD operations
+get_all_products = _adapt(crud.get_all_products)
+get_product_facets = _adapt(crud.get_product_facets)
+get_product_by_id = _adapt(crud.get_product_by_id)
+create_product = _adapt(crud.create_product)
+update_product = _adapt(crud.update_product)
+delete_product = _adapt(crud.delete_product)
+bulk_products = _adapt(crud.bulk_products)
+reorder_products = _adapt(crud.reorder_products)
+
+# Contact Submission CRUD operations
+create_contact_submission = _adapt(crud.create_contact_submission)
+insert_contact_submissions = _adapt(crud.insert_contact_submissions)
+get_contact_submission_by_dedup_hash = _adapt(crud.get_contact_submission_by_dedup_hash)
+enqueue_contact_submission = _adapt(crud.enqueue_contact_submission)
+get_all_contact_submissions = _adapt(crud.get_all_contact_submissions)
+mark_contact_as_read = _adapt(crud.mark_contact_as_read)
+get_contact_export_boundary = _adapt(crud.get_contact_export_boundary)
+
+# Application Case CRUD operations
+get_all_application_cases = _adapt(crud.get_all_application_cases)
+get_application_case_facets = _adapt(crud.get_application_case_facets)
+get_application_case_by_id = _adapt(crud.get_application_case_by_id)
+create_application_case = _adapt(crud.create_application_case)
+update_application_case = _adapt(crud.update_application_case)
+delete_application_case = _adapt(crud.delete_application_case)
+bulk_application_cases = _adapt(crud.bulk_application_cases)
+reorder_application_cases = _adapt(crud.reorder_application_cases)
+
+# Media CRUD operations
+get_all_media_items = _adapt(crud.get_all_media_items)
+get_media_item_by_id = _adapt(crud.get_media_item_by_id)
+get_media_item_by_hash = _adapt(crud.get_media_item_by_hash)
+get_media_types = _adapt(crud.get_media_types)
+create_media_item = _adapt(crud.create_media_item)
+update_media_item = _adapt(crud.update_media_item)
+delete_media_item = _adapt(crud.delete_media_item)
+
+# Page bootstrap
+get_page_bootstrap = _adapt(crud.get_page_bootstrap)
+
+# Search (api.search)
+search = _adapt(full_text_search)
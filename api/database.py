@@ -1,71 +1,383 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Boolean
+from sqlalchemy import create_engine, event, text, Column, Integer, String, Text, DateTime, Boolean
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import NullPool
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import NullPool, QueuePool
+from sqlalchemy.sql import Select, functions
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from typing import Union
+import logging
+import math
 import os
-from dotenv import load_dotenv
+import time
 
-load_dotenv()
+from .config import TRUE_VALUES, settings
+from .metrics import LatencyStats
+from .replicas import Replica, ReplicaSet, primary_required
+from .timing import record_phase, record_query
 
 # Neon database URL - optimized for serverless
-DATABASE_URL = os.getenv("DATABASE_URL")
+settings.require("DATABASE_URL")
+DATABASE_URL = settings.database_url
 
-if not DATABASE_URL:
-    raise ValueError("DATABASE_URL environment variable is required")
+# Connection strategy, selected with DB_POOL_MODE:
+#   null      - new connection per session; nothing outlives a cold invocation
+#   queue     - small QueuePool kept warm, for warm instances or long-running uvicorn
+#   pgbouncer - no client-side pool; an external pgbouncer (or Neon's "-pooler"
+#               endpoint) owns the pooling, so we must not hold connections
+#   auto      - null on Vercel/Lambda, queue everywhere else (default)
+def _resolve_pool_mode():
+    mode = settings.db_pool_mode
+    if mode == "auto":
+        return "null" if settings.serverless else "queue"
+    return mode
 
-# Configure engine for serverless environment (Neon)
+POOL_MODE = _resolve_pool_mode()
+
+class PoolMetrics:
+    """Checkout latency and connection counters for one engine.
+
+    Checkout time is the pool wait for QueuePool and the full TCP+TLS+auth
+    handshake for NullPool.
+    """
+
+    def __init__(self):
+        self.checkout = LatencyStats()
+        self.connects = 0
+        self.checkouts = 0
+
+    def snapshot(self, target_engine):
+        return {
+            "pool": target_engine.pool.status(),
+            "connects": self.connects,
+            "checkouts": self.checkouts,
+            "checkout_latency": self.checkout.snapshot(),
+        }
+
+def _timed_pool(pool_cls, metrics):
+    class TimedPool(pool_cls):
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                return super()._do_get()
+            finally:
+                elapsed = (time.perf_counter() - start) * 1000
+                metrics.checkout.record(elapsed)
+                record_phase("db-checkout", elapsed)
+
+    TimedPool.__name__ = "Timed" + pool_cls.__name__
+    return TimedPool
+
+def _pool_options(mode, metrics, queue_pool_cls=QueuePool):
+    if mode == "queue":
+        return {
+            "poolclass": _timed_pool(queue_pool_cls, metrics),
+            "pool_size": settings.db_pool_size,
+            "max_overflow": settings.db_max_overflow,
+            "pool_timeout": settings.db_pool_timeout,
+            "pool_recycle": settings.db_pool_recycle,  # Neon drops idle connections
+            "pool_pre_ping": True,  # Verify pooled connections before use
+        }
+    # null / pgbouncer: every checkout is a fresh connection, so pre-ping and
+    # recycling would only add a round-trip
+    return {"poolclass": _timed_pool(NullPool, metrics)}
+
+def _instrument_pool(target_engine, metrics):
+    @event.listens_for(target_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        metrics.connects += 1
+
+    @event.listens_for(target_engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        metrics.checkouts += 1
+
+    # Per-request query count and time, for Server-Timing and /api/admin/metrics.
+    # The start time lives on the execution context, which goes away with the
+    # statement: after_cursor_execute doesn't run for one that fails.
+    @event.listens_for(target_engine, "before_cursor_execute")
+    def _before_execute(conn, cursor, statement, parameters, context, executemany):
+        context._query_started = time.perf_counter()
+
+    @event.listens_for(target_engine, "after_cursor_execute")
+    def _after_execute(conn, cursor, statement, parameters, context, executemany):
+        record_query(statement, (time.perf_counter() - context._query_started) * 1000)
+
+sync_pool_metrics = PoolMetrics()
 engine = create_engine(
     DATABASE_URL,
-    poolclass=NullPool,  # Disable connection pooling for serverless
-    pool_pre_ping=True,  # Verify connections before use
-    pool_recycle=300,    # Recycle connections every 5 minutes
-    echo=False
+    echo=False,
+    **_pool_options(POOL_MODE, sync_pool_metrics)
 )
+_instrument_pool(engine, sync_pool_metrics)
+
+# SQLite's CURRENT_TIMESTAMP has no fractional seconds while SQLAlchemy binds
+# datetimes as 'YYYY-MM-DD HH:MM:SS.ffffff'. SQLite compares them as text, so
+# server-stamped rows would sort before an equal bound timestamp and keyset
+# pages on created_at would repeat rows. Stamp in SQLAlchemy's format instead.
+@compiles(functions.now, "sqlite")
+def _sqlite_now(element, compiler, **kw):
+    return "STRFTIME('%Y-%m-%d %H:%M:%f000', 'now')"
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Async engine used by the request path. The URL is derived from
+# DATABASE_URL (postgresql:// -> postgresql+asyncpg://, sqlite:// ->
+# sqlite+aiosqlite://) unless ASYNC_DATABASE_URL is given explicitly.
+# DB_ASYNC=auto (default) uses it when the async driver is installed;
+# DB_ASYNC=false keeps the sync Session, run in the threadpool.
+_ASYNC_DRIVERS = {
+    "postgresql": ("postgresql+asyncpg", "asyncpg"),
+    "postgres": ("postgresql+asyncpg", "asyncpg"),
+    "postgresql+psycopg2": ("postgresql+asyncpg", "asyncpg"),
+    "sqlite": ("sqlite+aiosqlite", "aiosqlite"),
+}
+
+def _async_url_and_args(url, mode):
+    url = make_url(url)
+    connect_args = {}
+    if url.drivername in _ASYNC_DRIVERS:
+        url = url.set(drivername=_ASYNC_DRIVERS[url.drivername][0])
+    if url.drivername == "postgresql+asyncpg":
+        # asyncpg takes "ssl" instead of libpq's sslmode and has no channel_binding
+        query = dict(url.query)
+        sslmode = query.pop("sslmode", None)
+        query.pop("channel_binding", None)
+        if sslmode and sslmode != "disable":
+            connect_args["ssl"] = sslmode
+        if mode == "pgbouncer":
+            # Transaction-mode poolers can't keep per-connection prepared statements
+            connect_args["statement_cache_size"] = 0
+            query["prepared_statement_cache_size"] = "0"
+        url = url.set(query=query)
+    return url, connect_args
+
+def _async_driver_available(url):
+    driver = url.drivername.split("+", 1)[-1]
+    try:
+        __import__(driver)
+    except ImportError:
+        return False
+    return True
+
+ASYNC_DATABASE_URL, _async_connect_args = _async_url_and_args(
+    settings.async_database_url or DATABASE_URL, POOL_MODE
+)
+
+if settings.db_async == "auto":
+    DB_ASYNC = _async_driver_available(ASYNC_DATABASE_URL)
+else:
+    DB_ASYNC = settings.db_async in TRUE_VALUES
+
+# sqlalchemy.ext.asyncio is only imported when it is used
+async_pool_metrics = PoolMetrics()
+async_engine = None
+AsyncSessionLocal = None
+if DB_ASYNC:
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+    from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        echo=False,
+        connect_args=_async_connect_args,
+        **_pool_options(POOL_MODE, async_pool_metrics, AsyncAdaptedQueuePool)
+    )
+    _instrument_pool(async_engine.sync_engine, async_pool_metrics)
+    # Objects are read after commit outside the greenlet, so they must not expire
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+# Either kind of session may be handed to a route; api.crud_async accepts both
+AnySession = Union[AsyncSession, Session] if DB_ASYNC else Session
+
+# Read replicas (api.replicas). Each DATABASE_REPLICA_URLS entry gets engines
+# built like the primary's, plus a short connect timeout so an unreachable
+# replica fails over quickly instead of using up the invocation.
+def _replica_connect_args(url, use_async):
+    if url.get_backend_name() != "postgresql":
+        return {}
+    if use_async:
+        return {"timeout": settings.db_replica_connect_timeout}
+    return {"connect_timeout": max(1, math.ceil(settings.db_replica_connect_timeout))}
+
+def _replica(url):
+    url = make_url(url)
+    metrics = PoolMetrics()
+    replica_engine = create_engine(
+        url, echo=False, connect_args=_replica_connect_args(url, False), **_pool_options(POOL_MODE, metrics)
+    )
+    _instrument_pool(replica_engine, metrics)
+    replica_async_engine = async_metrics = None
+    if DB_ASYNC:
+        async_url, connect_args = _async_url_and_args(url, POOL_MODE)
+        async_metrics = PoolMetrics()
+        replica_async_engine = create_async_engine(
+            async_url,
+            echo=False,
+            connect_args={**connect_args, **_replica_connect_args(async_url, True)},
+            **_pool_options(POOL_MODE, async_metrics, AsyncAdaptedQueuePool)
+        )
+        _instrument_pool(replica_async_engine.sync_engine, async_metrics)
+    return Replica(url.render_as_string(hide_password=True), replica_engine, metrics, replica_async_engine, async_metrics)
+
+read_replicas = ReplicaSet([_replica(url) for url in settings.database_replica_urls])
+
+class RoutingSession(Session):
+    """Session for get_read_db: plain SELECTs go to ``info["replica_bind"]`` while it is set.
+
+    The first statement that isn't one goes to the primary and keeps the rest
+    of the session there, so the session reads its own writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        replica_bind = self.info.get("replica_bind")
+        if replica_bind is not None:
+            if not self._flushing and isinstance(clause, Select) and clause._for_update_arg is None:
+                return replica_bind
+            self.info.pop("replica_bind")
+            self.info.pop("replica", None)
+        return super().get_bind(mapper, clause=clause, **kw)
+
+ReadSessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine)
+AsyncReadSessionLocal = None
+if DB_ASYNC:
+    AsyncReadSessionLocal = async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False, sync_session_class=RoutingSession
+    )
+
+def pool_stats():
+    stats = {"mode": POOL_MODE, "async": DB_ASYNC, "sync_engine": sync_pool_metrics.snapshot(engine)}
+    if async_engine is not None:
+        stats["async_engine"] = async_pool_metrics.snapshot(async_engine)
+    if read_replicas:
+        stats["read_replicas"] = read_replicas.stats()
+    return stats
+
+async def dispose_engines():
+    # Close pooled connections on shutdown; aiosqlite connections in
+    # particular hold non-daemon threads that would keep the process alive
+    if async_engine is not None:
+        await async_engine.dispose()
+    engine.dispose()
+    for replica in read_replicas.replicas:
+        if replica.async_engine is not None:
+            await replica.async_engine.dispose()
+        replica.engine.dispose()
+
 # Dependency to get database session
-def get_db():
+async def get_db():
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
+        await run_in_threadpool(db.close)
+
+# Give a request's connection back early, e.g. before a long-lived stream;
+# the session stays usable and checks out a new one if it is used again
+async def release(db):
+    if AsyncSessionLocal is not None:
+        await db.close()
+    else:
+        await run_in_threadpool(db.close)
+
+# Session for the public read routes. It reads from a read replica when one
+# is configured and healthy and the client hasn't just written something
+# (api.replicas); otherwise it is the same as get_db.
+async def get_read_db(request: Request):
+    primary = bool(read_replicas) and primary_required(request.cookies)
+    replica = read_replicas.choose(primary) if read_replicas else None
+    if AsyncReadSessionLocal is not None:
+        info = {"replica": replica, "replica_bind": replica.async_engine.sync_engine} if replica else {}
+        async with AsyncReadSessionLocal(info={**info, "primary_required": primary}) as db:
+            yield db
+        return
+    info = {"replica": replica, "replica_bind": replica.engine} if replica else {}
+    db = ReadSessionLocal(info={**info, "primary_required": primary})
+    try:
+        yield db
+    finally:
+        await run_in_threadpool(db.close)
+
+# Schema management lives in alembic (api/migrations) and is run explicitly
+# with `python -m api.manage migrate`, never on the request path. Revision
+# ids are zero-padded sequence numbers, so the expected head can be read from
+# the file names without importing alembic.
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "migrations", "versions")
+
+def head_revision():
+    revisions = [
+        name.split("_", 1)[0]
+        for name in os.listdir(MIGRATIONS_DIR)
+        if name.endswith(".py") and name[:4].isdigit()
+    ]
+    return max(revisions) if revisions else None
 
-# Initialize database tables
+# Startup check, enabled with DB_SCHEMA_CHECK=true: a single SELECT against
+# alembic_version. A mismatch is logged, not fatal, so a deploy that races a
+# migration keeps serving.
+async def check_schema_version():
+    expected = head_revision()
+    query = text("SELECT version_num FROM alembic_version")
+    try:
+        if async_engine is not None:
+            async with async_engine.connect() as conn:
+                current = (await conn.execute(query)).scalar()
+        else:
+            def _read():
+                with engine.connect() as conn:
+                    return conn.execute(query).scalar()
+            current = await run_in_threadpool(_read)
+    except Exception:
+        logging.getLogger(__name__).warning(
+            "Could not read the schema version; run `python -m api.manage migrate`", exc_info=True
+        )
+        return None
+    if current != expected:
+        logging.getLogger(__name__).warning(
+            "Database schema is at revision %s but this build expects %s; run `python -m api.manage migrate`",
+            current, expected,
+        )
+    return current
+
+# Create tables directly from the models. Only for throwaway local databases
+# (e.g. SQLite); real deployments use the migrations.
 def init_db():
+    from . import models  # noqa: F401  (registers the tables on Base.metadata)
+
+    Base.metadata.create_all(bind=engine)
+    bootstrap_admin()
+
+# Create the default admin user from ADMIN_EMAIL / ADMIN_PASSWORD if missing
+def bootstrap_admin():
+    from .models import User
+    from .auth import get_password_hash
+
+    admin_email = settings.admin_email
+    admin_password = settings.admin_password
+    if not admin_email or not admin_password:
+        print("Warning: ADMIN_EMAIL or ADMIN_PASSWORD environment variables are not set. Default admin user will not be created.")
+        return None
+
+    db = SessionLocal()
     try:
-        Base.metadata.create_all(bind=engine)
-        
-        # Create default admin user if not exists
-        from .models import User
-        from .auth import get_password_hash
-        
-        db = SessionLocal()
-        try:
-            admin_email = os.getenv("ADMIN_EMAIL")
-            admin_password = os.getenv("ADMIN_PASSWORD")
-            if not admin_email or not admin_password:
-                print("Warning: ADMIN_EMAIL or ADMIN_PASSWORD environment variables are not set. Default admin user will not be created.")
-            else:
-                existing_admin = db.query(User).filter(User.email == admin_email).first()
-                if not existing_admin:
-                    admin_user = User(
-                        email=admin_email,
-                        password_hash=get_password_hash(admin_password),
-                        first_name="Admin",
-                        last_name="User",
-                        role="admin"
-                    )
-                    db.add(admin_user)
-                    db.commit()
-        import logging
-        logging.error("Database initialization error", exc_info=True)
-        # In production, you might want to handle this differently
-        pass
-            
-    except Exception as e:
-        print(f"Database initialization error: {e}")
-        # In production, you might want to handle this differently
-        pass
+        existing_admin = db.query(User).filter(User.email == admin_email).first()
+        if existing_admin:
+            return existing_admin
+        admin_user = User(
+            email=admin_email,
+            password_hash=get_password_hash(admin_password),
+            first_name="Admin",
+            last_name="User",
+            role="admin"
+        )
+        db.add(admin_user)
+        db.commit()
+        return admin_user
+    finally:
+        db.close()
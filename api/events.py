@@ -0,0 +1,41 @@
+import logging
+import threading
+from typing import Callable, List
+
+logger = logging.getLogger(__name__)
+
+# Change notifications for committed admin writes. api.crud calls
+# emit_change("products" | "cases" | "content") after each commit; anything
+# derived from those tables (the response cache, static snapshots) subscribes
+# here instead of being wired into every CRUD function.
+
+ChangeListener = Callable[[str], None]
+
+_listeners: List[ChangeListener] = []
+_lock = threading.Lock()
+
+
+def on_change(listener: ChangeListener) -> ChangeListener:
+    """Register ``listener(namespace)``; usable as a decorator."""
+    with _lock:
+        if listener not in _listeners:
+            _listeners.append(listener)
+    return listener
+
+
+def remove_listener(listener: ChangeListener) -> None:
+    with _lock:
+        if listener in _listeners:
+            _listeners.remove(listener)
+
+
+def emit_change(namespace: str) -> None:
+    # The write has already been committed; a failing listener must not turn
+    # it into an error response
+    with _lock:
+        listeners = list(_listeners)
+    for listener in listeners:
+        try:
+            listener(namespace)
+        except Exception:
+            logger.exception("Change listener %r failed for %s", listener, namespace)
@@ -0,0 +1,135 @@
+import csv
+import io
+import logging
+import time
+from datetime import datetime
+from typing import AsyncIterator, Iterator, List
+
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+
+from . import database
+from .config import settings
+from .crud import CONTACT_EXPORT_FIELDS
+from .serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+# Streaming export of the contact inbox (GET /api/admin/contacts/export).
+#
+# Rows come off a server-side cursor CONTACT_EXPORT_CHUNK_ROWS at a time and
+# each chunk is encoded and sent before the next one is fetched, so memory
+# stays flat however large the inbox is. One response covers at most
+# CONTACT_EXPORT_PAGE_ROWS rows: the route looks up where that page ends
+# before streaming and hands the rest over as an X-Next-Cursor, which keeps
+# each request well inside a serverless invocation's time limit. If a page
+# still runs past CONTACT_EXPORT_MAX_SECONDS the response is aborted rather
+# than ended early, so a client can't mistake a cut-off export for a
+# complete one.
+
+PAGE_ROWS = settings.contact_export_page_rows
+CHUNK_ROWS = settings.contact_export_chunk_rows
+MAX_SECONDS = settings.contact_export_max_seconds
+
+# format -> (media type, file extension)
+FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+}
+
+# Cells a spreadsheet would evaluate as a formula; they are exported with a
+# leading apostrophe
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+# Lets Excel detect UTF-8
+CSV_BOM = "\ufeff"
+
+
+class ExportTimeout(Exception):
+    pass
+
+
+def _timestamp(value: datetime) -> str:
+    text = value.isoformat()
+    return text[:-6] + "Z" if text.endswith("+00:00") else text
+
+
+def _csv_cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, datetime):
+        return _timestamp(value)
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def csv_header() -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(CONTACT_EXPORT_FIELDS)
+    return (CSV_BOM + buffer.getvalue()).encode()
+
+
+def encode_csv(rows) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows([_csv_cell(value) for value in row] for row in rows)
+    return buffer.getvalue().encode()
+
+
+def encode_ndjson(rows) -> bytes:
+    return b"".join(dumps(dict(zip(CONTACT_EXPORT_FIELDS, row))) + b"\n" for row in rows)
+
+
+ENCODERS = {"csv": encode_csv, "ndjson": encode_ndjson}
+
+
+def _sync_chunks(db, statement) -> Iterator[List]:
+    result = db.execute(statement.execution_options(yield_per=CHUNK_ROWS))
+    yield from result.partitions()
+
+
+def _close(chunks: Iterator, db) -> None:
+    chunks.close()
+    db.close()
+
+
+# The export opens its own session instead of using the request's: the
+# stream outlives the route function, and with it the request's
+# dependencies.
+async def _chunks(statement) -> AsyncIterator[List]:
+    if database.AsyncSessionLocal is not None:
+        async with database.AsyncSessionLocal() as db:
+            result = await db.stream(statement.execution_options(yield_per=CHUNK_ROWS))
+            async for chunk in result.partitions():
+                yield chunk
+        return
+    db = database.SessionLocal()
+    chunks = _sync_chunks(db, statement)
+    try:
+        async for chunk in iterate_in_threadpool(chunks):
+            yield chunk
+    finally:
+        await run_in_threadpool(_close, chunks, db)
+
+
+async def stream_contacts(statement, format: str, header: bool = True) -> AsyncIterator[bytes]:
+    """Encoded rows of ``statement`` (crud.contact_export_statement), one chunk at a time.
+
+    ``header`` writes the CSV header row; only the first page of a paged
+    export has it, so the pages concatenate into one file.
+    """
+    encode = ENCODERS[format]
+    deadline = time.monotonic() + MAX_SECONDS
+    if header and format == "csv":
+        yield csv_header()
+    exported = 0
+    async for chunk in _chunks(statement):
+        if time.monotonic() > deadline:
+            logger.warning(
+                "Contact export aborted after %g s and %d rows; lower CONTACT_EXPORT_PAGE_ROWS",
+                MAX_SECONDS, exported,
+            )
+            raise ExportTimeout(f"Export did not finish within {MAX_SECONDS:g} s")
+        yield encode(chunk)
+        exported += len(chunk)
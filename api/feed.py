@@ -0,0 +1,383 @@
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from collections import deque
+from typing import AsyncIterator, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.event import listen
+from sqlalchemy.orm import Session
+
+from . import media
+from .config import settings
+from .schemas import ApplicationCaseResponse, ContactSubmissionResponse, PageContentResponse, ProductResponse
+from .serialization import dumps, rows_to_dicts
+
+logger = logging.getLogger(__name__)
+
+# Change feed for the admin dashboard (GET /api/admin/events, server-sent
+# events), so an open dashboard is patched as things change instead of
+# polling the list endpoints.
+#
+# api.crud publishes an event with every admin write and every batch of
+# stored contact submissions, in the write's own transaction, so the event
+# goes out exactly when the write commits:
+#   {"id": ..., "topic": "products", "action": "updated", "ids": [3], "rows": [{...}]}
+# Bulk writes and reorders carry only ids; a client reloads that list.
+# Contact events also carry the inbox's unread count.
+#
+# CHANGE_FEED selects how events reach the instances serving the feed:
+#   memory   - delivered in-process; only for a single long-running server
+#   postgres - sent with pg_notify in the writer's transaction (Postgres
+#              delivers it on commit, and drops it on rollback) and received by
+#              a LISTEN connection on every instance with a subscriber, so a
+#              write on one serverless instance reaches dashboards on any
+#              other. LISTEN needs a session-level connection: point
+#              CHANGE_FEED_LISTEN_URL at Neon's direct (non "-pooler")
+#              endpoint when DATABASE_URL goes through pgbouncer.
+#   auto     - postgres on a Postgres DATABASE_URL, memory otherwise (default)
+#   off      - no feed; the endpoint answers 404
+#
+# Event ids are microsecond timestamps taken by the writer. Each instance
+# keeps the last REPLAY_EVENTS it received, so a client reconnecting with
+# Last-Event-ID (EventSource does so by itself) gets what it missed; when
+# that is no longer available it gets a "resync" event and reloads instead.
+# Heartbeats carry an id as well, a little behind the clock, which lets a
+# client that saw no events reconnect to another instance without a resync.
+
+MODE = settings.change_feed
+if MODE == "auto":
+    MODE = "postgres" if (settings.database_url or "").startswith("postgres") else "memory"
+ENABLED = MODE != "off"
+
+CHANNEL = "asatec_changes"
+REPLAY_EVENTS = 512
+# Events for one slow client before it is told to resync
+SUBSCRIBER_QUEUE = 256
+# The LISTEN connection is closed this long after the last subscriber left
+LINGER_SECONDS = 300
+# How far behind the clock a heartbeat id is; covers clock skew between
+# instances and the time from pg_notify to delivery
+POSITION_MARGIN_US = 2_000_000
+# Postgres rejects NOTIFY payloads of 8000 bytes or more
+NOTIFY_MAX_BYTES = 7900
+RETRY_MS = 1000
+STREAM_SECONDS = settings.change_feed_stream_seconds
+HEARTBEAT_SECONDS = settings.change_feed_heartbeat_seconds
+
+SCHEMAS = {
+    "content": PageContentResponse,
+    "products": ProductResponse,
+    "cases": ApplicationCaseResponse,
+    "contacts": ContactSubmissionResponse,
+}
+
+_id_lock = threading.Lock()
+_last_id = 0
+
+
+def _now_id() -> int:
+    return time.time_ns() // 1000
+
+
+def _next_id() -> int:
+    global _last_id
+    with _id_lock:
+        _last_id = max(_now_id(), _last_id + 1)
+        return _last_id
+
+
+def _rows(topic: str, rows) -> List[dict]:
+    if topic == "media":
+        return [media.describe(row) for row in rows]
+    return rows_to_dicts(rows, SCHEMAS[topic])
+
+
+def _frame(event_id: int, topic: str, data: str) -> str:
+    return f"id: {event_id}\nevent: {topic}\ndata: {data}\n\n"
+
+
+RESYNC = "event: resync\ndata: {}\n\n"
+
+
+class _Subscriber:
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.lagged = False
+
+    def _put(self, frame: str) -> None:
+        if self.queue.qsize() >= SUBSCRIBER_QUEUE:
+            self.lagged = True
+        else:
+            self.queue.put_nowait(frame)
+
+    def push(self, frame: str) -> None:
+        # Called from the writer's or the listener's thread
+        try:
+            self.loop.call_soon_threadsafe(self._put, frame)
+        except RuntimeError:
+            pass  # the loop has shut down
+
+
+class Hub:
+    """The events this instance has received, and its open streams."""
+
+    def __init__(self, size: int):
+        self._lock = threading.Lock()
+        self._events = deque(maxlen=size)
+        self._subscribers = set()
+        # Events are complete from ``since`` on; None while nothing is received
+        self.since: Optional[int] = None
+        self.evicted = 0
+        self.received = 0
+        self.latest = 0
+        self.idle_since = time.monotonic()
+
+    def start(self) -> None:
+        with self._lock:
+            self.since = _now_id()
+            self.evicted = 0
+            self._events.clear()
+
+    def stop(self) -> None:
+        """Events may have been missed: forget them and make every stream resync."""
+        with self._lock:
+            if self.since is None:
+                return
+            self.since = None
+            self._events.clear()
+            for subscriber in self._subscribers:
+                subscriber.push(RESYNC)
+
+    def deliver(self, event_id: int, frame: str) -> None:
+        with self._lock:
+            if self.since is None:
+                return
+            if len(self._events) == self._events.maxlen:
+                self.evicted = self._events[0][0]
+            self._events.append((event_id, frame))
+            self.received += 1
+            self.latest = max(self.latest, event_id)
+            for subscriber in self._subscribers:
+                subscriber.push(frame)
+
+    def subscribe(self, last_id: Optional[int]):
+        """A new subscriber and what it missed since ``last_id``: a list of frames, or None to resync."""
+        subscriber = _Subscriber(asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.add(subscriber)
+            if last_id is None:
+                return subscriber, []
+            if self.since is None or last_id < max(self.since, self.evicted):
+                return subscriber, None
+            return subscriber, [frame for event_id, frame in self._events if event_id > last_id]
+
+    def unsubscribe(self, subscriber: _Subscriber) -> None:
+        with self._lock:
+            self._subscribers.discard(subscriber)
+            if not self._subscribers:
+                self.idle_since = time.monotonic()
+
+    def position(self) -> Optional[int]:
+        """An id every event up to which has been received, if any."""
+        with self._lock:
+            if self.since is None:
+                return None
+            return max(self.since, self.latest, _now_id() - POSITION_MARGIN_US)
+
+    def idle(self) -> bool:
+        with self._lock:
+            return not self._subscribers and time.monotonic() - self.idle_since > LINGER_SECONDS
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "mode": MODE,
+                "receiving": self.since is not None,
+                "subscribers": len(self._subscribers),
+                "received": self.received,
+                "buffered": len(self._events),
+            }
+
+
+hub = Hub(REPLAY_EVENTS)
+
+
+# In memory mode a session holds its events until its transaction ends
+_PENDING = "change_feed_events"
+
+
+def publish(db, topic: str, action: str, rows=None, ids=(), **extra) -> None:
+    """Publish a change with the write in ``db``'s transaction; call it before the commit.
+
+    ``rows`` are ORM rows or already serialized dicts. The session is left to
+    the caller: the event is sent when it commits, and never if it rolls back.
+    """
+    if not ENABLED:
+        return
+    event = {"id": _next_id(), "topic": topic, "action": action, **extra}
+    if rows is not None:
+        rows = list(rows)
+        event["rows"] = rows if rows and isinstance(rows[0], dict) else _rows(topic, rows)
+        event["ids"] = [row["id"] for row in event["rows"]]
+    else:
+        event["ids"] = list(ids)
+    data = dumps(event).decode()
+    if MODE == "memory":
+        # Begins the transaction if nothing has yet, so a rollback drops the event
+        db.connection()
+        db.info.setdefault(_PENDING, []).append((event["id"], _frame(event["id"], topic, data)))
+        return
+    if len(data.encode()) > NOTIFY_MAX_BYTES:
+        # Too big for NOTIFY: the client reloads the list instead
+        event.pop("rows", None)
+        event["ids"] = event["ids"] if len(event["ids"]) <= 100 else None
+        data = dumps(event).decode()
+    db.execute(text("SELECT pg_notify(:channel, :data)"), {"channel": CHANNEL, "data": data})
+
+
+def _deliver_pending(session: Session) -> None:
+    for event_id, frame in session.info.pop(_PENDING, ()):
+        hub.deliver(event_id, frame)
+
+
+def _drop_pending(session: Session, transaction) -> None:
+    # Runs after after_commit, so whatever is left was rolled back
+    if transaction.parent is None:
+        session.info.pop(_PENDING, None)
+
+
+def _receive(data: str) -> None:
+    try:
+        event = json.loads(data)
+        hub.deliver(int(event["id"]), _frame(event["id"], event["topic"], data))
+    except (ValueError, KeyError, TypeError):
+        logger.warning("Ignoring a malformed change feed notification: %.200s", data)
+
+
+def _listen_dsn() -> str:
+    from sqlalchemy.engine import make_url
+
+    url = make_url(settings.change_feed_listen_url or settings.database_url)
+    # psycopg2 takes libpq URLs; asyncpg's "ssl" parameter is libpq's sslmode
+    query = dict(url.query)
+    if "ssl" in query:
+        query.setdefault("sslmode", query.pop("ssl"))
+    return url.set(drivername="postgresql", query=query).render_as_string(hide_password=False)
+
+
+class _Listener(threading.Thread):
+    """LISTENs on CHANNEL while this instance has subscribers, reconnecting with backoff."""
+
+    def __init__(self):
+        super().__init__(name="change-feed", daemon=True)
+        self.done = False
+
+    def run(self) -> None:
+        delay = 1
+        try:
+            while not self.done:
+                try:
+                    self._listen()
+                    delay = 1
+                except Exception as exc:
+                    logger.warning("Change feed connection failed, retrying in %d s: %s", delay, exc)
+                hub.stop()
+                with _listener_lock:
+                    if hub.idle():
+                        self.done = True
+                if not self.done:
+                    time.sleep(delay)
+                    delay = min(delay * 2, 30)
+        finally:
+            self.done = True
+
+    def _listen(self) -> None:
+        import psycopg2
+
+        connection = psycopg2.connect(_listen_dsn(), connect_timeout=10)
+        try:
+            connection.autocommit = True
+            cursor = connection.cursor()
+            cursor.execute(f"LISTEN {CHANNEL}")
+            hub.start()
+            logger.info("Change feed listening on %s", CHANNEL)
+            checked = time.monotonic()
+            while True:
+                if select.select([connection], [], [], HEARTBEAT_SECONDS)[0]:
+                    connection.poll()
+                    while connection.notifies:
+                        _receive(connection.notifies.pop(0).payload)
+                else:
+                    # Under the lock, so a stream starting now gets a new listener
+                    with _listener_lock:
+                        if hub.idle():
+                            self.done = True
+                            return
+                # A dead server only shows up when something is sent
+                if time.monotonic() - checked > HEARTBEAT_SECONDS:
+                    cursor.execute("SELECT 1")
+                    checked = time.monotonic()
+        finally:
+            connection.close()
+
+
+_listener: Optional[_Listener] = None
+_listener_lock = threading.Lock()
+
+
+def _ensure_listening() -> None:
+    global _listener
+    with _listener_lock:
+        if _listener is None or _listener.done:
+            _listener = _Listener()
+            _listener.start()
+
+
+if MODE == "memory":
+    hub.start()
+    listen(Session, "after_commit", _deliver_pending)
+    listen(Session, "after_transaction_end", _drop_pending)
+
+
+def _keepalive() -> str:
+    position = hub.position()
+    return ": keepalive\n" + (f"id: {position}\n\n" if position is not None else "\n")
+
+
+async def stream(last_event_id: Optional[int] = None) -> AsyncIterator[str]:
+    """The SSE body for one subscriber; ends after CHANGE_FEED_STREAM_SECONDS."""
+    subscriber, missed = hub.subscribe(last_event_id)
+    if MODE == "postgres":
+        _ensure_listening()
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        if missed is None:
+            yield RESYNC
+        else:
+            for frame in missed:
+                yield frame
+        yield _keepalive()
+        deadline = time.monotonic() + STREAM_SECONDS
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                frame = await asyncio.wait_for(subscriber.queue.get(), min(HEARTBEAT_SECONDS, remaining))
+            except asyncio.TimeoutError:
+                yield _keepalive()
+                continue
+            if subscriber.lagged:
+                subscriber.lagged = False
+                while not subscriber.queue.empty():
+                    subscriber.queue.get_nowait()
+                yield RESYNC
+                continue
+            yield frame
+    finally:
+        hub.unsubscribe(subscriber)
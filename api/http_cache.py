@@ -0,0 +1,184 @@
+import hashlib
+import time
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Iterable, List, Optional
+
+from fastapi import Request, Response
+
+from .compression import COMPRESS_MIN_BYTES, choose_encoding, compress
+from .serialization import dumps
+from .timing import record_phase
+
+# Bump when the JSON shape of the public responses changes so that clients
+# holding an old ETag do not get a 304 for a different representation.
+REPRESENTATION_VERSION = "2"
+
+CACHE_CONTROL = "public, no-cache"
+# For responses that need an admin token: browsers revalidate, shared caches don't store
+PRIVATE_CACHE_CONTROL = "private, no-cache"
+
+
+class CachedResource:
+    """A response payload together with its HTTP validators.
+
+    The payload is encoded at most once, and compressed at most once per
+    content coding, for as long as the resource stays in the cache.
+    """
+
+    __slots__ = ("data", "etag", "last_modified", "_bodies")
+
+    def __init__(self, data: Any, etag: str, last_modified: Optional[datetime]):
+        self.data = data
+        self.etag = etag
+        self.last_modified = last_modified
+        self._bodies = {}
+
+    def body(self, encoding: Optional[str] = None) -> bytes:
+        body = self._bodies.get(encoding)
+        if body is None:
+            if encoding is None:
+                start = time.perf_counter()
+                body = dumps(self.data)
+                record_phase("serialize", (time.perf_counter() - start) * 1000)
+            else:
+                raw = self.body()
+                start = time.perf_counter()
+                body = compress(raw, encoding)
+                record_phase("compress", (time.perf_counter() - start) * 1000)
+            self._bodies[encoding] = body
+        return body
+
+
+def _row_value(row, name: str):
+    # Rows are response models, or plain dicts for column-subset queries
+    return row.get(name) if isinstance(row, dict) else getattr(row, name, None)
+
+
+def _row_stamp(row) -> Optional[datetime]:
+    stamp = _row_value(row, "updated_at") or _row_value(row, "created_at")
+    if stamp is not None and stamp.tzinfo is None:
+        stamp = stamp.replace(tzinfo=timezone.utc)
+    return stamp
+
+
+def build_resource(data: Any) -> Optional[CachedResource]:
+    """Wrap a response model (or list of them) with an ETag and Last-Modified.
+
+    The ETag is derived from each row's id and modification stamp rather
+    than from the serialized body: every admin write bumps ``updated_at``
+    and deletes change the id set, so the validator changes exactly when
+    the representation does, without encoding the payload to find out.
+    """
+    if data is None:
+        return None
+    rows: Iterable = data if isinstance(data, list) else [data]
+    digest = hashlib.sha256(REPRESENTATION_VERSION.encode())
+    last_modified = None
+    for row in rows:
+        stamp = _row_stamp(row)
+        digest.update(f"{_row_value(row, 'id')}:{stamp.isoformat() if stamp else ''};".encode())
+        if stamp is not None and (last_modified is None or stamp > last_modified):
+            last_modified = stamp
+    etag = '"%s"' % digest.hexdigest()[:32]
+    return CachedResource(data, etag, last_modified)
+
+
+def combine_resources(data: Any, parts: Iterable[Optional[CachedResource]]) -> CachedResource:
+    """Validators for a payload assembled from several resources."""
+    digest = hashlib.sha256(REPRESENTATION_VERSION.encode())
+    last_modified = None
+    for part in parts:
+        digest.update(f"{part.etag if part else '-'};".encode())
+        if part is not None and part.last_modified is not None:
+            if last_modified is None or part.last_modified > last_modified:
+                last_modified = part.last_modified
+    etag = '"%s"' % digest.hexdigest()[:32]
+    return CachedResource(data, etag, last_modified)
+
+
+def digest_resource(data: Any) -> CachedResource:
+    """Validators for aggregates (counts, facets) that have no row stamps.
+
+    The ETag is a hash of the encoded body, which is kept for serving anyway.
+    """
+    resource = CachedResource(data, "", None)
+    digest = hashlib.sha256(REPRESENTATION_VERSION.encode())
+    digest.update(resource.body())
+    resource.etag = '"%s"' % digest.hexdigest()[:32]
+    return resource
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # If-None-Match uses the weak comparison function (RFC 9110 13.1.2)
+    candidates = [tag.strip() for tag in header.split(",")]
+    if "*" in candidates:
+        return True
+    return etag in [tag[2:] if tag.startswith("W/") else tag for tag in candidates]
+
+
+def is_not_modified(request: Request, resource: CachedResource) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, resource.etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and resource.last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        # HTTP dates have one-second resolution
+        return resource.last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def _validator_headers(resource: CachedResource, cache_control: str) -> dict:
+    headers = {"ETag": resource.etag, "Cache-Control": cache_control}
+    if resource.last_modified is not None:
+        headers["Last-Modified"] = format_datetime(resource.last_modified.astimezone(timezone.utc), usegmt=True)
+    return headers
+
+
+def conditional_response(request: Request, response: Response, resource: CachedResource,
+                         cache_control: str = CACHE_CONTROL) -> Response:
+    """Return a bare 304 if the client copy is current, else the encoded payload.
+
+    On the 304 path the payload is never serialized. Otherwise the cached
+    bytes go out directly, skipping FastAPI's response_model validation.
+    """
+    # Keep headers the route already set (e.g. X-Next-Cursor)
+    headers = {**response.headers, **_validator_headers(resource, cache_control)}
+    headers.pop("content-length", None)
+    if is_not_modified(request, resource):
+        return Response(status_code=304, headers=headers)
+    body = resource.body()
+    encoding = choose_encoding(request.headers.get("accept-encoding"))
+    if encoding is not None and len(body) >= COMPRESS_MIN_BYTES:
+        body = resource.body(encoding)
+        headers["Content-Encoding"] = encoding
+    headers["Vary"] = "Accept-Encoding"
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+# Admin writes are guarded by the row's version column rather than the
+# content hash above: the admin list returns ``version`` with each row, the
+# editor sends it back as If-Match: "v<version>", and a stale value gets 412.
+def version_etag(version: int) -> str:
+    return f'"v{version}"'
+
+
+def if_match_versions(request: Request) -> Optional[List[int]]:
+    """Versions acceptable to the client, or None if the write is unconditional."""
+    header = request.headers.get("if-match")
+    if header is None:
+        return None
+    versions = []
+    for tag in (tag.strip() for tag in header.split(",")):
+        if tag == "*":
+            return None
+        # If-Match uses the strong comparison function: W/ tags never match
+        if tag.startswith('"v') and tag.endswith('"') and tag[2:-1].isdigit():
+            versions.append(int(tag[2:-1]))
+    return versions
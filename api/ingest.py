@@ -0,0 +1,348 @@
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import urllib.request
+from datetime import datetime, timezone
+from typing import Callable, List, NamedTuple, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from . import crud, crud_async
+from .config import settings
+from .database import SessionLocal
+from .schemas import ContactSubmissionCreate, ContactSubmissionResponse
+from .serialization import dumps, rows_to_dicts
+
+logger = logging.getLogger(__name__)
+
+# Contact form ingestion (CONTACT_INGEST):
+#   sync  - insert on the request path and return the row (default)
+#   spool - append the submission to a local, fsync'd spool file and answer
+#           202; a background thread inserts the spool in batches. For
+#           long-running hosts: a serverless instance may be frozen or
+#           recycled before its /tmp spool is flushed.
+#   queue - one narrow INSERT into contact_queue and answer 202; queued rows
+#           are moved into contact_submissions in batches by the background
+#           thread, the first page of the admin inbox, or
+#           `python -m api.manage drain-contacts` (e.g. from a cron job).
+#           The mode for Vercel.
+#
+# Every submission gets a fingerprint (contact_fingerprint) stored in the
+# unique contact_submissions.dedup_hash column. Batches are inserted with
+# ON CONFLICT (dedup_hash) DO NOTHING, so a double-clicked submit button,
+# a client retry or a spool replayed after a crash adds no second row.
+#
+# Listeners registered with on_contacts() get the rows that were actually
+# inserted, after the commit and never in the request: from a background
+# task in sync mode, from the flusher otherwise. CONTACT_NOTIFY_WEBHOOK_URL
+# installs one that POSTs them as JSON. The admin change feed (api.feed)
+# is not a listener: crud publishes to it in the insert's own transaction.
+
+MODE = settings.contact_ingest
+BATCH_SIZE = settings.contact_batch_size
+FLUSH_INTERVAL_SECONDS = settings.contact_flush_interval_seconds
+SPOOL_DIR = settings.contact_spool_dir
+SPOOL_FSYNC = settings.contact_spool_fsync
+# Identical submissions within the same window count as one
+DEDUP_WINDOW_SECONDS = settings.contact_dedup_window_seconds
+NOTIFY_WEBHOOK_URL = settings.contact_notify_webhook_url
+
+_whitespace = re.compile(r"\s+")
+
+
+def _normalize(value: Optional[str]) -> str:
+    return _whitespace.sub(" ", value or "").strip()
+
+
+def contact_fingerprint(contact: ContactSubmissionCreate, received: float) -> str:
+    parts = [contact.email.lower(), contact.name, contact.phone, contact.company, contact.subject, contact.message]
+    window = int(received // DEDUP_WINDOW_SECONDS)
+    return hashlib.sha256("\x1f".join([*map(_normalize, parts), str(window)]).encode()).hexdigest()
+
+
+class Receipt(NamedTuple):
+    reference: str
+    # Only in sync mode: the stored row, and whether this request created it
+    row: Optional[object] = None
+    created: bool = False
+
+
+_stats = {"accepted": 0, "inserted": 0, "duplicates": 0, "batches": 0, "failed_flushes": 0, "last_flush_ms": None}
+_stats_lock = threading.Lock()
+
+
+def _count(**increments) -> None:
+    with _stats_lock:
+        for key, value in increments.items():
+            _stats[key] += value
+
+
+# Notification hook
+
+ContactListener = Callable[[List[dict]], None]
+
+_listeners: List[ContactListener] = []
+
+
+def on_contacts(listener: ContactListener) -> ContactListener:
+    """Register ``listener(contacts)`` for newly stored submissions; usable as a decorator."""
+    if listener not in _listeners:
+        _listeners.append(listener)
+    return listener
+
+
+def notify(rows) -> None:
+    if not rows or not _listeners:
+        return
+    contacts = rows_to_dicts(rows, ContactSubmissionResponse)
+    for listener in list(_listeners):
+        try:
+            listener(contacts)
+        except Exception:
+            logger.exception("Contact listener %r failed for %d submissions", listener, len(contacts))
+
+
+def _post_webhook(contacts: List[dict]) -> None:
+    request = urllib.request.Request(
+        NOTIFY_WEBHOOK_URL, data=dumps({"contacts": contacts}), method="POST",
+        headers={"Content-Type": "application/json"},
+    )
+    urllib.request.urlopen(request, timeout=10).close()
+
+
+if NOTIFY_WEBHOOK_URL:
+    on_contacts(_post_webhook)
+
+
+# Local spool: one append-only JSON-lines file per process. A flush seals it
+# (rename to batch-*.jsonl) and inserts the sealed files; a batch file is
+# deleted only after all of it is committed.
+
+class _Spool:
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._file = None
+        self.pending = 0
+
+    def _active_path(self, pid: int) -> str:
+        return os.path.join(self.directory, f"spool-{pid}.jsonl")
+
+    def _seal_path(self, pid: int) -> str:
+        return os.path.join(self.directory, f"batch-{pid}-{time.time_ns()}.jsonl")
+
+    def append(self, record: dict) -> int:
+        line = json.dumps(record, separators=(",", ":")).encode() + b"\n"
+        with self._lock:
+            if self._file is None:
+                os.makedirs(self.directory, exist_ok=True)
+                self._file = open(self._active_path(os.getpid()), "ab")
+            self._file.write(line)
+            self._file.flush()
+            if SPOOL_FSYNC:
+                os.fsync(self._file.fileno())
+            self.pending += 1
+            return self.pending
+
+    def seal(self) -> None:
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.close()
+            self._file = None
+            self.pending = 0
+            pid = os.getpid()
+            os.replace(self._active_path(pid), self._seal_path(pid))
+
+    def recover(self) -> None:
+        """Seal the active files of processes that exited without flushing."""
+        for path in glob.glob(os.path.join(self.directory, "spool-*.jsonl")):
+            pid = int(os.path.basename(path)[len("spool-"):-len(".jsonl")])
+            if pid == os.getpid() or _alive(pid):
+                continue
+            try:
+                os.replace(path, self._seal_path(pid))
+            except FileNotFoundError:
+                pass  # another process got there first
+
+    def sealed(self) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.directory, "batch-*.jsonl")))
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+_spool = _Spool(SPOOL_DIR)
+
+
+def _read_batch(path: str) -> List[dict]:
+    rows = []
+    with open(path, "rb") as spool_file:
+        for line in spool_file:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A line torn by a crash mid-append; the client got no 202 for it
+                logger.warning("Skipping unreadable line in %s", path)
+                continue
+            rows.append({
+                **record["contact"],
+                "dedup_hash": record["dedup_hash"],
+                "created_at": datetime.fromisoformat(record["received_at"]),
+            })
+    return rows
+
+
+def _flush_spool():
+    _spool.recover()
+    _spool.seal()
+    drained, inserted = 0, []
+    for path in _spool.sealed():
+        try:
+            rows = _read_batch(path)
+        except FileNotFoundError:
+            continue  # flushed by another process
+        for start in range(0, len(rows), BATCH_SIZE):
+            with SessionLocal() as db:
+                inserted.extend(crud.insert_contact_submissions(db, rows[start:start + BATCH_SIZE]))
+            _count(batches=1)
+        drained += len(rows)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    return drained, inserted
+
+
+def _drain_queue():
+    drained, inserted = 0, []
+    while True:
+        with SessionLocal() as db:
+            count, rows = crud.drain_contact_queue(db, BATCH_SIZE)
+        if not count:
+            break
+        _count(batches=1)
+        drained += count
+        inserted.extend(rows)
+        if count < BATCH_SIZE:
+            break
+    return drained, inserted
+
+
+_flush_lock = threading.Lock()
+
+
+def flush() -> dict:
+    """Store everything spooled or queued so far and notify listeners."""
+    if MODE == "sync":
+        return {"drained": 0, "inserted": 0, "duplicates": 0}
+    with _flush_lock:
+        started = time.perf_counter()
+        try:
+            drained, inserted = _flush_spool() if MODE == "spool" else _drain_queue()
+        except Exception:
+            # Nothing is lost: the batch files / queue rows stay until a
+            # flush commits them
+            _count(failed_flushes=1)
+            raise
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 3)
+        _count(inserted=len(inserted), duplicates=drained - len(inserted))
+        with _stats_lock:
+            _stats["last_flush_ms"] = elapsed_ms
+    notify(inserted)
+    return {"drained": drained, "inserted": len(inserted), "duplicates": drained - len(inserted), "ms": elapsed_ms}
+
+
+async def flush_async() -> dict:
+    return await run_in_threadpool(flush)
+
+
+class _Flusher(threading.Thread):
+    def __init__(self, interval: float):
+        super().__init__(name="contact-ingest", daemon=True)
+        self.interval = interval
+        self._wake = threading.Event()
+        self._stopping = False
+
+    def run(self) -> None:
+        while not self._stopping:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                flush()
+            except Exception:
+                logger.exception("Contact ingestion flush failed; retrying in %.0fs", self.interval)
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def stop(self, timeout: float = 10) -> None:
+        self._stopping = True
+        self._wake.set()
+        self.join(timeout)
+
+
+_flusher: Optional[_Flusher] = None
+
+
+def install() -> None:
+    """Start the flusher (app startup); nothing to do in sync mode."""
+    global _flusher
+    if MODE == "sync" or _flusher is not None:
+        return
+    _flusher = _Flusher(FLUSH_INTERVAL_SECONDS)
+    _flusher.start()
+
+
+def shutdown() -> None:
+    global _flusher
+    if _flusher is None:
+        return
+    _flusher.stop()
+    _flusher = None
+    try:
+        flush()
+    except Exception:
+        logger.exception("Final contact ingestion flush failed; submissions stay spooled / queued")
+
+
+def stats() -> dict:
+    with _stats_lock:
+        snapshot = dict(_stats)
+    return {"mode": MODE, "spool_pending": _spool.pending if MODE == "spool" else None, **snapshot}
+
+
+async def submit(db, contact: ContactSubmissionCreate) -> Receipt:
+    received = time.time()
+    dedup_hash = contact_fingerprint(contact, received)
+    fields = contact.model_dump()
+    if MODE == "spool":
+        received_at = datetime.fromtimestamp(received, timezone.utc).isoformat()
+        record = {"contact": fields, "dedup_hash": dedup_hash, "received_at": received_at}
+        pending = await run_in_threadpool(_spool.append, record)
+        if pending >= BATCH_SIZE and _flusher is not None:
+            _flusher.wake()
+    elif MODE == "queue":
+        received_at = datetime.fromtimestamp(received, timezone.utc)
+        await crud_async.enqueue_contact_submission(db, dedup_hash, json.dumps(fields), received_at)
+    else:
+        inserted = await crud_async.insert_contact_submissions(db, [{**fields, "dedup_hash": dedup_hash}])
+        if inserted:
+            _count(accepted=1, inserted=1)
+            return Receipt(dedup_hash[:16], inserted[0], created=True)
+        _count(accepted=1, duplicates=1)
+        return Receipt(dedup_hash[:16], await crud_async.get_contact_submission_by_dedup_hash(db, dedup_hash))
+    _count(accepted=1)
+    return Receipt(dedup_hash[:16])
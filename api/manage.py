@@ -0,0 +1,172 @@
+import argparse
+import os
+import sys
+
+from sqlalchemy import inspect
+
+from .database import SessionLocal, bootstrap_admin, engine, head_revision, init_db
+
+# Management commands, run outside the request path:
+#
+#   python -m api.manage migrate         apply migrations + create the admin user
+#   python -m api.manage init-db         create tables from the models (local SQLite)
+#   python -m api.manage create-admin    create the ADMIN_EMAIL user if missing
+#   python -m api.manage schema-version  show current vs. expected revision
+#   python -m api.manage revoke-tokens EMAIL  sign a user out everywhere
+#   python -m api.manage publish         write static JSON snapshots for the public site
+#   python -m api.manage drain-contacts  store spooled / queued contact submissions (CONTACT_INGEST)
+#   python -m api.manage media-variants  re-render image variants after changing MEDIA_* settings
+
+API_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _alembic_config():
+    from alembic.config import Config
+
+    config = Config(os.path.join(os.path.dirname(API_DIR), "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(API_DIR, "migrations"))
+    return config
+
+
+def _current_revision():
+    from alembic.runtime.migration import MigrationContext
+
+    with engine.connect() as conn:
+        return MigrationContext.configure(conn).get_current_revision()
+
+
+def migrate(args):
+    from alembic import command
+
+    config = _alembic_config()
+    # Databases created by the old import-time create_all() already have the
+    # initial tables; adopt them instead of failing on CREATE TABLE
+    tables = inspect(engine).get_table_names()
+    if "alembic_version" not in tables and "users" in tables:
+        print("Existing schema without migration history found; stamping revision 0001")
+        command.stamp(config, "0001")
+    command.upgrade(config, "head")
+    if not args.skip_admin:
+        bootstrap_admin()
+
+
+def init_database(args):
+    from alembic import command
+
+    init_db()
+    command.stamp(_alembic_config(), "head")
+
+
+def create_admin(args):
+    user = bootstrap_admin()
+    if user is not None:
+        print(f"Admin user: {user.email}")
+
+
+def schema_version(args):
+    current = _current_revision()
+    expected = head_revision()
+    print(f"current: {current or '<none>'}")
+    print(f"expected: {expected}")
+    return 0 if current == expected else 1
+
+
+def revoke_tokens(args):
+    from . import crud
+
+    db = SessionLocal()
+    try:
+        user = crud.get_user_by_email(db, args.email)
+        if user is None:
+            print(f"No user with email {args.email}")
+            return 1
+        crud.revoke_user_tokens(db, user.id)
+    finally:
+        db.close()
+    # Instances with the user cached accept old tokens until AUTH_CACHE_TTL_SECONDS
+    print(f"Revoked all tokens for {args.email}")
+
+
+def publish_snapshots(args):
+    from .snapshots import SNAPSHOT_DIR, publish
+
+    namespaces = args.only.split(",") if args.only else None
+    summary = publish(namespaces, directory=args.output or SNAPSHOT_DIR)
+    print(
+        f"Snapshot groups {', '.join(summary['groups'])}: {summary['written']} written, "
+        f"{summary['unchanged']} unchanged, {summary['removed']} removed"
+    )
+
+
+def drain_contacts(args):
+    from . import ingest
+
+    if ingest.MODE == "sync":
+        print("CONTACT_INGEST=sync: submissions are stored on the request path, nothing to drain")
+        return 0
+    summary = ingest.flush()
+    print(f"Contact submissions: {summary['drained']} drained, {summary['inserted']} stored, {summary['duplicates']} duplicates")
+
+
+def media_variants(args):
+    from . import crud, media
+    from .models import MediaItem
+
+    db = SessionLocal()
+    try:
+        items = db.query(MediaItem).filter(MediaItem.mime_type.like("image/%"), MediaItem.content_hash.isnot(None)).all()
+        rendered = 0
+        for item in items:
+            if not media.storage.exists(item.file_path):
+                print(f"Missing original for media item {item.id}: {item.file_path}")
+                continue
+            width, height = media.probe(media.storage.path(item.file_path))
+            variants = media.render_variants(item.file_path, item.content_hash, width)
+            # Objects rendered with earlier settings stay: pages and caches
+            # may still reference their (immutable) URLs
+            crud.set_media_variants(db, item.id, width, height, variants)
+            rendered += 1
+        print(f"Rendered variants for {rendered} of {len(items)} images")
+        if args.rewrite_images:
+            changed = crud.media_display_urls(db)
+            print(f"{changed} product / case images now point at display-size variants")
+    finally:
+        db.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m api.manage", description="ASATEC API management commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    migrate_parser = commands.add_parser("migrate", help="apply database migrations and bootstrap the admin user")
+    migrate_parser.add_argument("--skip-admin", action="store_true", help="do not create the default admin user")
+    migrate_parser.set_defaults(func=migrate)
+
+    commands.add_parser("init-db", help="create tables directly from the models (local development only)").set_defaults(func=init_database)
+    commands.add_parser("create-admin", help="create the ADMIN_EMAIL / ADMIN_PASSWORD user if missing").set_defaults(func=create_admin)
+    commands.add_parser("schema-version", help="compare the database revision with this build").set_defaults(func=schema_version)
+
+    revoke_parser = commands.add_parser("revoke-tokens", help="invalidate every access token issued to a user")
+    revoke_parser.add_argument("email")
+    revoke_parser.set_defaults(func=revoke_tokens)
+
+    publish_parser = commands.add_parser("publish", help="render published content into static JSON snapshots")
+    publish_parser.add_argument("--only", help="comma-separated tables that changed: content,products,cases (default: all)")
+    publish_parser.add_argument("--output", help="snapshot directory (default: SNAPSHOT_DIR or frontend/snapshots)")
+    publish_parser.set_defaults(func=publish_snapshots)
+
+    commands.add_parser("drain-contacts", help="move spooled / queued contact submissions into the inbox").set_defaults(func=drain_contacts)
+
+    variants_parser = commands.add_parser("media-variants", help="render missing or outdated image variants")
+    variants_parser.add_argument(
+        "--rewrite-images", action="store_true",
+        help="also point product / case image_url values at uploaded originals to their display variants",
+    )
+    variants_parser.set_defaults(func=media_variants)
+
+    args = parser.parse_args(argv)
+    return args.func(args) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
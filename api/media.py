@@ -0,0 +1,350 @@
+import asyncio
+import hashlib
+import io
+import os
+import re
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterable, List, NamedTuple, Optional
+
+from .config import settings
+
+# Uploaded media: content-addressed storage plus pre-generated variants.
+#
+# An upload is streamed chunk by chunk into a temporary file while its
+# SHA-256 is computed, then renamed to originals/<hh>/<sha256>.<ext>. The
+# same bytes uploaded twice are the same object (and the same MediaItem).
+# Images also get resized copies at MEDIA_VARIANT_WIDTHS, as WebP plus a
+# JPEG (PNG when there is transparency) fallback, rendered once at upload
+# time in a worker pool rather than on request. Every object key is derived
+# from the content, so the files never change and are served with an
+# immutable Cache-Control.
+#
+# LocalStorage stands in for an object store; anything with the same
+# put_file / put_bytes / exists / delete / path methods can replace it. Set
+# MEDIA_PUBLIC_URL when the objects are served from a bucket or CDN instead
+# of GET /api/media/files/{key}.
+
+# Only /tmp is writable on Vercel, and it is per instance: point MEDIA_ROOT
+# at shared storage for anything beyond a single long-running server
+MEDIA_ROOT = settings.media_root
+MEDIA_PUBLIC_URL = settings.media_public_url
+MEDIA_MAX_BYTES = settings.media_max_bytes
+VARIANT_WIDTHS = settings.media_variant_widths
+# The variant a Product / ApplicationCase image_url is pointed at
+DISPLAY_WIDTH = settings.media_display_width
+WEBP_QUALITY = settings.media_webp_quality
+JPEG_QUALITY = settings.media_jpeg_quality
+MEDIA_WORKERS = settings.media_workers
+# Refuse to decode images larger than this (decompression bombs)
+MAX_PIXELS = settings.media_max_pixels
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def _pillow():
+    # Imported on first use: only uploads and variant rendering need it
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:  # originals are still stored and served, without variants
+        return None
+    Image.MAX_IMAGE_PIXELS = MAX_PIXELS
+    return Image, ImageOps
+
+
+class MediaTooLarge(Exception):
+    pass
+
+
+class UnsupportedMedia(Exception):
+    pass
+
+
+class LocalStorage:
+    """Write-once objects under a directory; keys are relative paths."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.incoming = os.path.join(root, ".incoming")
+
+    def path(self, key: str) -> str:
+        # Checked after normalizing, so "originals/../.incoming/..." can't
+        # reach an upload that is still being written
+        path = os.path.normpath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep) or path == self.incoming or path.startswith(self.incoming + os.sep):
+            raise KeyError(key)
+        return path
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(self.path(key))
+
+    def temp_file(self):
+        os.makedirs(self.incoming, exist_ok=True)
+        return tempfile.NamedTemporaryFile(dir=self.incoming, delete=False)
+
+    def put_file(self, temp_path: str, key: str) -> None:
+        """Move a finished temp_file() into place under ``key``."""
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(temp_path, path)
+
+    def put_bytes(self, key: str, data: bytes) -> None:
+        with self.temp_file() as temp:
+            temp.write(data)
+        self.put_file(temp.name, key)
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+
+storage = LocalStorage(os.path.abspath(MEDIA_ROOT))
+
+
+def url(key: str) -> str:
+    return f"{MEDIA_PUBLIC_URL}/{key}"
+
+
+# Types are taken from the file's leading bytes, never from the client
+_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg", "jpg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png", "png"),
+    (b"GIF87a", "image/gif", "gif"),
+    (b"GIF89a", "image/gif", "gif"),
+    (b"%PDF-", "application/pdf", "pdf"),
+)
+SNIFF_BYTES = 16
+
+
+def sniff(head: bytes):
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp", "webp"
+    for signature, mime_type, extension in _SIGNATURES:
+        if head.startswith(signature):
+            return mime_type, extension
+    raise UnsupportedMedia("Unsupported file type; upload JPEG, PNG, GIF, WebP or PDF")
+
+
+def _key_prefix(content_hash: str) -> str:
+    return f"{content_hash[:2]}/{content_hash}"
+
+
+def original_key(content_hash: str, extension: str) -> str:
+    return f"originals/{_key_prefix(content_hash)}.{extension}"
+
+
+def variant_key(content_hash: str, width: int, extension: str, quality: Optional[int] = None) -> str:
+    # Encoder settings are part of the key: changing them renders new objects
+    suffix = f"-q{quality}" if quality else ""
+    return f"variants/{_key_prefix(content_hash)}/{width}w{suffix}.{extension}"
+
+
+_original_url = re.compile(r"/originals/[0-9a-f]{2}/([0-9a-f]{64})\.[a-z]+$")
+
+
+def original_hash(image_url: Optional[str]) -> Optional[str]:
+    """The content hash when ``image_url`` points at an uploaded original."""
+    match = _original_url.search(image_url or "")
+    return match.group(1) if match else None
+
+
+class Upload(NamedTuple):
+    content_hash: str
+    size: int
+    mime_type: str
+    extension: str
+    temp_path: str
+
+
+async def receive(chunks: AsyncIterable[bytes]) -> Upload:
+    """Stream an upload to a temp file, hashing and size-checking as it arrives.
+
+    Memory use is one chunk, whatever the file size. The caller either
+    moves ``temp_path`` into storage or discards it.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    head = b""
+    kind = None
+    temp = storage.temp_file()
+    try:
+        with temp:
+            async for chunk in chunks:
+                if not chunk:
+                    continue
+                size += len(chunk)
+                if size > MEDIA_MAX_BYTES:
+                    raise MediaTooLarge(f"File exceeds {MEDIA_MAX_BYTES} bytes")
+                if kind is None:
+                    head += chunk[:SNIFF_BYTES]
+                    if len(head) >= SNIFF_BYTES:
+                        kind = sniff(head)
+                digest.update(chunk)
+                temp.write(chunk)
+        if kind is None:
+            if not size:
+                raise UnsupportedMedia("Empty upload")
+            kind = sniff(head)
+    except BaseException:
+        discard(temp.name)
+        raise
+    return Upload(digest.hexdigest(), size, kind[0], kind[1], temp.name)
+
+
+def discard(temp_path: str) -> None:
+    try:
+        os.remove(temp_path)
+    except FileNotFoundError:
+        pass
+
+
+def is_image(mime_type: Optional[str]) -> bool:
+    return bool(mime_type) and mime_type.startswith("image/")
+
+
+def probe(path: str):
+    """(width, height) of an image, upright, reading only its header."""
+    Image, _ = _pillow()
+    with Image.open(path) as image:
+        width, height = image.size
+        # EXIF orientations 5-8 are rotated by 90 degrees
+        if image.getexif().get(0x0112, 1) in (5, 6, 7, 8):
+            width, height = height, width
+    return width, height
+
+
+def variant_widths(width: int) -> List[int]:
+    # Never upscale; an image narrower than every width keeps its own
+    widths = [candidate for candidate in VARIANT_WIDTHS if candidate < width]
+    widths.append(min(width, VARIANT_WIDTHS[-1]))
+    return sorted(set(widths))
+
+
+def _render(source_key: str, content_hash: str, width: int) -> List[dict]:
+    """Resize one width and encode it as WebP plus the fallback format."""
+    Image, ImageOps = _pillow()
+    with Image.open(storage.path(source_key)) as image:
+        if image.format == "JPEG":
+            # Let libjpeg decode at a reduced scale (DCT scaling): far less
+            # work for the small variants. Both sides so rotation is covered.
+            image.draft("RGB", (width, width))
+        image = ImageOps.exif_transpose(image)
+        # Animated GIFs keep their first frame
+        has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+        image = image.convert("RGBA" if has_alpha else "RGB")
+        if image.width > width:
+            image = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+        outputs = [("webp", "WEBP", {"quality": WEBP_QUALITY, "method": 4}, WEBP_QUALITY)]
+        if has_alpha:
+            outputs.append(("png", "PNG", {"optimize": True}, None))
+        else:
+            outputs.append(("jpg", "JPEG", {"quality": JPEG_QUALITY, "optimize": True, "progressive": True}, JPEG_QUALITY))
+        variants = []
+        for extension, pil_format, options, quality in outputs:
+            key = variant_key(content_hash, width, extension, quality)
+            if storage.exists(key):
+                size = os.path.getsize(storage.path(key))
+            else:
+                buffer = io.BytesIO()
+                image.save(buffer, pil_format, **options)
+                storage.put_bytes(key, buffer.getvalue())
+                size = buffer.tell()
+            variants.append({
+                "width": image.width, "height": image.height,
+                "format": "jpeg" if extension == "jpg" else extension, "key": key, "size": size,
+            })
+        return variants
+
+
+# Pillow releases the GIL while resizing and encoding, so threads give real
+# parallelism here; each width of an upload is rendered concurrently
+_executor = ThreadPoolExecutor(max_workers=MEDIA_WORKERS, thread_name_prefix="media-variants")
+
+
+def render_variants(source_key: str, content_hash: str, width: int) -> List[dict]:
+    """All variants of an image, blocking (management commands)."""
+    results = _executor.map(lambda target: _render(source_key, content_hash, target), variant_widths(width))
+    return [variant for variants in results for variant in variants]
+
+
+async def render_variants_async(source_key: str, content_hash: str, width: int) -> List[dict]:
+    loop = asyncio.get_running_loop()
+    results = await asyncio.gather(*(
+        loop.run_in_executor(_executor, _render, source_key, content_hash, target)
+        for target in variant_widths(width)
+    ))
+    return [variant for variants in results for variant in variants]
+
+
+async def ingest(upload: Upload) -> dict:
+    """Move an upload into storage and render its variants.
+
+    Returns the MediaItem column values. Raises UnsupportedMedia for files
+    with an image signature that Pillow cannot decode.
+    """
+    key = original_key(upload.content_hash, upload.extension)
+    values = {
+        "filename": os.path.basename(key),
+        "file_path": key,
+        "file_size": upload.size,
+        "mime_type": upload.mime_type,
+        "content_hash": upload.content_hash,
+        "width": None,
+        "height": None,
+        "variants": [],
+    }
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, storage.put_file, upload.temp_path, key)
+    pillow = _pillow()
+    if is_image(upload.mime_type) and pillow is not None:
+        try:
+            width, height = await loop.run_in_executor(_executor, probe, storage.path(key))
+            values.update(width=width, height=height)
+            values["variants"] = await render_variants_async(key, upload.content_hash, width)
+        except (OSError, pillow[0].DecompressionBombError) as exc:
+            storage.delete(key)
+            raise UnsupportedMedia(f"Not a readable image: {exc}")
+    return values
+
+
+def delete_objects(file_path: str, variants: Optional[List[dict]]) -> None:
+    storage.delete(file_path)
+    for variant in variants or ():
+        storage.delete(variant["key"])
+
+
+def display_variant(variants: Optional[List[dict]]) -> Optional[dict]:
+    """The largest WebP variant no wider than DISPLAY_WIDTH (else the smallest)."""
+    webp = sorted((variant for variant in variants or () if variant["format"] == "webp"), key=lambda v: v["width"])
+    if not webp:
+        return None
+    fitting = [variant for variant in webp if variant["width"] <= DISPLAY_WIDTH]
+    return fitting[-1] if fitting else webp[0]
+
+
+def describe(item) -> dict:
+    """API representation of a MediaItem row, with URLs and srcset strings."""
+    variants = sorted(item.variants or (), key=lambda variant: (variant["format"], variant["width"]))
+    srcset = {}
+    for variant in variants:
+        srcset.setdefault(variant["format"], []).append(f"{url(variant['key'])} {variant['width']}w")
+    display = display_variant(variants)
+    return {
+        "id": item.id,
+        "filename": item.filename,
+        "original_filename": item.original_filename,
+        "mime_type": item.mime_type,
+        "file_size": item.file_size,
+        "alt_text": item.alt_text,
+        "width": item.width,
+        "height": item.height,
+        "content_hash": item.content_hash,
+        "url": url(item.file_path),
+        "image_url": url(display["key"]) if display else None,
+        "srcset": {fmt: ", ".join(entries) for fmt, entries in srcset.items()},
+        "variants": [{**variant, "url": url(variant["key"])} for variant in variants],
+        "created_at": item.created_at,
+        "updated_at": item.updated_at,
+    }
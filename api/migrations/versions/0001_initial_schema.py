@@ -0,0 +1,113 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String(255), nullable=False),
+        sa.Column("password_hash", sa.String(255), nullable=False),
+        sa.Column("first_name", sa.String(100), nullable=False),
+        sa.Column("last_name", sa.String(100), nullable=False),
+        sa.Column("role", sa.String(50)),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "page_contents",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("page_name", sa.String(100), nullable=False),
+        sa.Column("title", sa.String(255), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("meta_description", sa.String(255)),
+        sa.Column("meta_keywords", sa.String(255)),
+        sa.Column("is_published", sa.Boolean()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+    )
+    op.create_index("ix_page_contents_id", "page_contents", ["id"])
+    op.create_index("ix_page_contents_page_name", "page_contents", ["page_name"], unique=True)
+
+    op.create_table(
+        "products",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("description", sa.Text()),
+        sa.Column("short_description", sa.String(500)),
+        sa.Column("category", sa.String(100)),
+        sa.Column("image_url", sa.String(255)),
+        sa.Column("is_featured", sa.Boolean()),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("sort_order", sa.Integer()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+    )
+    op.create_index("ix_products_id", "products", ["id"])
+
+    op.create_table(
+        "contact_submissions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("email", sa.String(255), nullable=False),
+        sa.Column("phone", sa.String(50)),
+        sa.Column("company", sa.String(255)),
+        sa.Column("subject", sa.String(255), nullable=False),
+        sa.Column("message", sa.Text(), nullable=False),
+        sa.Column("is_read", sa.Boolean()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_contact_submissions_id", "contact_submissions", ["id"])
+
+    op.create_table(
+        "media_items",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("filename", sa.String(255), nullable=False),
+        sa.Column("original_filename", sa.String(255), nullable=False),
+        sa.Column("file_path", sa.String(500), nullable=False),
+        sa.Column("file_size", sa.Integer()),
+        sa.Column("mime_type", sa.String(100)),
+        sa.Column("alt_text", sa.String(255)),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_media_items_id", "media_items", ["id"])
+
+    op.create_table(
+        "application_cases",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("title", sa.String(255), nullable=False),
+        sa.Column("description", sa.Text()),
+        sa.Column("industry", sa.String(100)),
+        sa.Column("image_url", sa.String(255)),
+        sa.Column("is_featured", sa.Boolean()),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("sort_order", sa.Integer()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+    )
+    op.create_index("ix_application_cases_id", "application_cases", ["id"])
+
+
+def downgrade():
+    op.drop_table("application_cases")
+    op.drop_table("media_items")
+    op.drop_table("contact_submissions")
+    op.drop_table("products")
+    op.drop_table("page_contents")
+    op.drop_table("users")
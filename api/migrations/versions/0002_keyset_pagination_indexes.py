@@ -0,0 +1,26 @@
+"""keyset pagination indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_products_sort_order_id", "products", ["sort_order", "id"])
+    op.create_index("ix_application_cases_sort_order_id", "application_cases", ["sort_order", "id"])
+    op.create_index("ix_contact_submissions_created_at_id", "contact_submissions", ["created_at", "id"])
+
+
+def downgrade():
+    op.drop_index("ix_contact_submissions_created_at_id", table_name="contact_submissions")
+    op.drop_index("ix_application_cases_sort_order_id", table_name="application_cases")
+    op.drop_index("ix_products_sort_order_id", table_name="products")
@@ -0,0 +1,50 @@
+"""indexes matching the query shapes
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+# The primary keys are already indexed; the extra ix_<table>_id indexes only
+# cost write amplification.
+REDUNDANT_ID_INDEXES = {
+    "users": "ix_users_id",
+    "page_contents": "ix_page_contents_id",
+    "products": "ix_products_id",
+    "contact_submissions": "ix_contact_submissions_id",
+    "media_items": "ix_media_items_id",
+    "application_cases": "ix_application_cases_id",
+}
+
+
+def upgrade():
+    active = sa.text("is_active = true") if op.get_bind().dialect.name == "postgresql" else sa.text("is_active = 1")
+    op.create_index(
+        "ix_products_active_sort_order_id", "products", ["sort_order", "id"],
+        postgresql_where=active, sqlite_where=active,
+    )
+    op.create_index(
+        "ix_application_cases_active_sort_order_id", "application_cases", ["sort_order", "id"],
+        postgresql_where=active, sqlite_where=active,
+    )
+    op.create_index(
+        "ix_contact_submissions_is_read_created_at", "contact_submissions", ["is_read", "created_at", "id"]
+    )
+    for table, index in REDUNDANT_ID_INDEXES.items():
+        op.drop_index(index, table_name=table)
+
+
+def downgrade():
+    for table, index in REDUNDANT_ID_INDEXES.items():
+        op.create_index(index, table, ["id"])
+    op.drop_index("ix_contact_submissions_is_read_created_at", table_name="contact_submissions")
+    op.drop_index("ix_application_cases_active_sort_order_id", table_name="application_cases")
+    op.drop_index("ix_products_active_sort_order_id", table_name="products")
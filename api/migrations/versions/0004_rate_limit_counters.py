@@ -0,0 +1,36 @@
+"""shared rate limit counters
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Only used by RATE_LIMIT_BACKEND=postgres. UNLOGGED: no WAL traffic for
+    # counters we can afford to lose on a crash.
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute(
+        """
+        CREATE UNLOGGED TABLE rate_limit_counters (
+            bucket VARCHAR(255) NOT NULL,
+            window_index BIGINT NOT NULL,
+            hits INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (bucket, window_index)
+        )
+        """
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.drop_table("rate_limit_counters")
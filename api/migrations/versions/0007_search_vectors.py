@@ -0,0 +1,55 @@
+"""full-text search vectors
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+# Generated tsvector columns, so Postgres maintains them on every write.
+# Weights: A = title, B = category / industry / summary, C = body. The text
+# search configuration must match api.search.TEXT_CONFIG. SQLite has no
+# tsvector; api.search falls back to an in-memory index there.
+SEARCH_VECTORS = {
+    "products": (
+        ("name", "A"), ("category", "B"), ("short_description", "B"), ("description", "C"),
+    ),
+    "application_cases": (
+        ("title", "A"), ("industry", "B"), ("description", "C"),
+    ),
+    "page_contents": (
+        ("title", "A"), ("meta_description", "B"), ("meta_keywords", "B"), ("content", "C"),
+    ),
+}
+
+
+def _expression(fields):
+    return " || ".join(
+        f"setweight(to_tsvector('english'::regconfig, coalesce({column}, '')), '{weight}')"
+        for column, weight in fields
+    )
+
+
+def upgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for table, fields in SEARCH_VECTORS.items():
+        op.execute(
+            f"ALTER TABLE {table} ADD COLUMN search_vector tsvector "
+            f"GENERATED ALWAYS AS ({_expression(fields)}) STORED"
+        )
+        op.create_index(f"ix_{table}_search_vector", table, ["search_vector"], postgresql_using="gin")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for table in SEARCH_VECTORS:
+        op.drop_index(f"ix_{table}_search_vector", table_name=table)
+        op.drop_column(table, "search_vector")
@@ -0,0 +1,39 @@
+"""indexes for filtered catalog listings and facet counts
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+# table -> facet column
+FACETS = {"products": "category", "application_cases": "industry"}
+
+
+def upgrade():
+    true = "true" if op.get_bind().dialect.name == "postgresql" else "1"
+    active = sa.text(f"is_active = {true}")
+    featured = sa.text(f"is_active = {true} AND is_featured = {true}")
+    for table, facet in FACETS.items():
+        # Filtered listing; the trailing is_featured covers the facet counts
+        op.create_index(
+            f"ix_{table}_active_{facet}_sort_order_id", table, [facet, "sort_order", "id", "is_featured"],
+            postgresql_where=active, sqlite_where=active,
+        )
+        op.create_index(
+            f"ix_{table}_featured_sort_order_id", table, ["sort_order", "id"],
+            postgresql_where=featured, sqlite_where=featured,
+        )
+
+
+def downgrade():
+    for table, facet in FACETS.items():
+        op.drop_index(f"ix_{table}_featured_sort_order_id", table_name=table)
+        op.drop_index(f"ix_{table}_active_{facet}_sort_order_id", table_name=table)
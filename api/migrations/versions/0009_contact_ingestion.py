@@ -0,0 +1,36 @@
+"""contact submission dedup hash and ingestion queue
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Nullable: existing rows have no fingerprint, and NULLs never conflict
+    op.add_column("contact_submissions", sa.Column("dedup_hash", sa.String(64), nullable=True))
+    op.create_index("ux_contact_submissions_dedup_hash", "contact_submissions", ["dedup_hash"], unique=True)
+
+    # Only written with CONTACT_INGEST=queue; drained oldest-first by id
+    op.create_table(
+        "contact_queue",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("dedup_hash", sa.String(64), nullable=False),
+        sa.Column("payload", sa.Text(), nullable=False),
+        sa.Column("received_at", sa.DateTime(timezone=True), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table("contact_queue")
+    op.drop_index("ux_contact_submissions_dedup_hash", table_name="contact_submissions")
+    with op.batch_alter_table("contact_submissions") as batch_op:
+        batch_op.drop_column("dedup_hash")
@@ -0,0 +1,38 @@
+"""media content hashes, dimensions and variants
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+COLUMNS = (
+    ("content_hash", sa.String(64)),
+    ("width", sa.Integer()),
+    ("height", sa.Integer()),
+    ("variants", sa.JSON()),
+    ("updated_at", sa.DateTime(timezone=True)),
+)
+
+
+def upgrade():
+    for name, column_type in COLUMNS:
+        op.add_column("media_items", sa.Column(name, column_type, nullable=True))
+    # Rows from before this revision have no hash; NULLs never conflict
+    op.create_index("ux_media_items_content_hash", "media_items", ["content_hash"], unique=True)
+    op.create_index("ix_media_items_created_at_id", "media_items", ["created_at", "id"])
+
+
+def downgrade():
+    op.drop_index("ix_media_items_created_at_id", table_name="media_items")
+    op.drop_index("ux_media_items_content_hash", table_name="media_items")
+    with op.batch_alter_table("media_items") as batch_op:
+        for name, _ in reversed(COLUMNS):
+            batch_op.drop_column(name)
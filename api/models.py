@@ -1,37 +1,46 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean
+from sqlalchemy import Column, Index, Integer, JSON, String, Text, DateTime, Boolean, and_
 from sqlalchemy.sql import func
 from .database import Base
 
+# On Postgres, products, application_cases and page_contents also carry a
+# generated ``search_vector`` tsvector column with a GIN index (migration
+# 0007). It is not mapped here: nothing reads it except api.search.
+
 class User(Base):
     __tablename__ = "users"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     email = Column(String(255), unique=True, index=True, nullable=False)
     password_hash = Column(String(255), nullable=False)
     first_name = Column(String(100), nullable=False)
     last_name = Column(String(100), nullable=False)
     role = Column(String(50), default="admin")
     is_active = Column(Boolean, default=True)
+    # Embedded in access tokens as "tv"; bumping it revokes every token
+    # issued before
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
 class PageContent(Base):
     __tablename__ = "page_contents"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     page_name = Column(String(100), unique=True, index=True, nullable=False)
     title = Column(String(255), nullable=False)
     content = Column(Text, nullable=False)
     meta_description = Column(String(255))
     meta_keywords = Column(String(255))
     is_published = Column(Boolean, default=True)
+    # Optimistic concurrency: bumped by every update, checked against If-Match
+    version = Column(Integer, nullable=False, default=1, server_default="1")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
 class Product(Base):
     __tablename__ = "products"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     name = Column(String(255), nullable=False)
     description = Column(Text)
     short_description = Column(String(500))
@@ -40,13 +49,39 @@ class Product(Base):
     is_featured = Column(Boolean, default=False)
     is_active = Column(Boolean, default=True)
     sort_order = Column(Integer, default=0)
+    # Optimistic concurrency: bumped by every update, checked against If-Match
+    version = Column(Integer, nullable=False, default=1, server_default="1")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    __table_args__ = (
+        # Public catalog: WHERE is_active ORDER BY sort_order, id. Partial, so
+        # inactive rows cost nothing on reads or index maintenance.
+        Index(
+            "ix_products_active_sort_order_id", sort_order, id,
+            postgresql_where=(is_active == True), sqlite_where=(is_active == True),
+        ),
+        # Admin listing (inactive rows included): ORDER BY sort_order, id
+        Index("ix_products_sort_order_id", sort_order, id),
+        # Catalog filtered by category: WHERE is_active AND category = ?
+        # ORDER BY sort_order, id. The trailing is_featured makes it covering
+        # for the facet counts (GROUP BY category, FILTER (WHERE is_featured))
+        Index(
+            "ix_products_active_category_sort_order_id", category, sort_order, id, is_featured,
+            postgresql_where=(is_active == True), sqlite_where=(is_active == True),
+        ),
+        # Featured strip: WHERE is_active AND is_featured ORDER BY sort_order, id
+        Index(
+            "ix_products_featured_sort_order_id", sort_order, id,
+            postgresql_where=and_(is_active == True, is_featured == True),
+            sqlite_where=and_(is_active == True, is_featured == True),
+        ),
+    )
+
 class ContactSubmission(Base):
     __tablename__ = "contact_submissions"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     name = Column(String(255), nullable=False)
     email = Column(String(255), nullable=False)
     phone = Column(String(50))
@@ -55,23 +90,59 @@ class ContactSubmission(Base):
     message = Column(Text, nullable=False)
     is_read = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # api.ingest.contact_fingerprint; NULL for rows from before migration 0009
+    dedup_hash = Column(String(64))
+
+    __table_args__ = (
+        # Admin inbox: ORDER BY created_at DESC, id DESC
+        Index("ix_contact_submissions_created_at_id", created_at, id),
+        # Unread inbox / unread counts: WHERE is_read = ? ORDER BY created_at DESC
+        Index("ix_contact_submissions_is_read_created_at", is_read, created_at, id),
+        # Batched inserts skip resubmissions with ON CONFLICT (dedup_hash) DO NOTHING
+        Index("ux_contact_submissions_dedup_hash", dedup_hash, unique=True),
+    )
+
+class ContactQueueEntry(Base):
+    """Accepted submission waiting to be moved into contact_submissions (CONTACT_INGEST=queue)."""
+    __tablename__ = "contact_queue"
+
+    id = Column(Integer, primary_key=True)
+    dedup_hash = Column(String(64), nullable=False)
+    # The validated ContactSubmissionCreate as JSON
+    payload = Column(Text, nullable=False)
+    received_at = Column(DateTime(timezone=True), nullable=False)
 
 class MediaItem(Base):
     __tablename__ = "media_items"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     filename = Column(String(255), nullable=False)
     original_filename = Column(String(255), nullable=False)
     file_path = Column(String(500), nullable=False)
     file_size = Column(Integer)
     mime_type = Column(String(100))
     alt_text = Column(String(255))
+    # api.media: SHA-256 of the file (the storage key is derived from it),
+    # upright pixel size, and the pre-rendered variants
+    # [{"width", "height", "format", "key", "size"}]
+    content_hash = Column(String(64))
+    width = Column(Integer)
+    height = Column(Integer)
+    variants = Column(JSON)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    __table_args__ = (
+        # One row per distinct file
+        Index("ux_media_items_content_hash", content_hash, unique=True),
+        # Media library: ORDER BY created_at DESC, id DESC
+        Index("ix_media_items_created_at_id", created_at, id),
+    )
 
 class ApplicationCase(Base):
     __tablename__ = "application_cases"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     title = Column(String(255), nullable=False)
     description = Column(Text)
     industry = Column(String(100))
@@ -79,5 +150,27 @@ class ApplicationCase(Base):
     is_featured = Column(Boolean, default=False)
     is_active = Column(Boolean, default=True)
     sort_order = Column(Integer, default=0)
+    # Optimistic concurrency: bumped by every update, checked against If-Match
+    version = Column(Integer, nullable=False, default=1, server_default="1")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    __table_args__ = (
+        # Public listing: WHERE is_active ORDER BY sort_order, id
+        Index(
+            "ix_application_cases_active_sort_order_id", sort_order, id,
+            postgresql_where=(is_active == True), sqlite_where=(is_active == True),
+        ),
+        # Admin listing (inactive rows included): ORDER BY sort_order, id
+        Index("ix_application_cases_sort_order_id", sort_order, id),
+        # Filtered by industry, and the industry facet counts (see products)
+        Index(
+            "ix_application_cases_active_industry_sort_order_id", industry, sort_order, id, is_featured,
+            postgresql_where=(is_active == True), sqlite_where=(is_active == True),
+        ),
+        Index(
+            "ix_application_cases_featured_sort_order_id", sort_order, id,
+            postgresql_where=and_(is_active == True, is_featured == True),
+            sqlite_where=and_(is_active == True, is_featured == True),
+        ),
+    )
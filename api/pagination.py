@@ -0,0 +1,64 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, Response, status
+
+# Opaque keyset cursors. A cursor is the sort key of the last row on the
+# previous page, e.g. (sort_order, id) for products and cases or
+# (created_at, id) for contact submissions, encoded so clients treat it as
+# a token rather than something to construct.
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(*key) -> str:
+    parts = [value.isoformat() if isinstance(value, datetime) else value for value in key]
+    raw = json.dumps(parts, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], arity: int, datetime_fields: Tuple[int, ...] = ()) -> Optional[tuple]:
+    """The sort key in ``cursor``: ``arity`` ints, or ISO datetimes at ``datetime_fields``."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        parts = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(parts, list) or len(parts) != arity:
+            raise ValueError(f"cursor must encode a list of {arity}")
+        for index, part in enumerate(parts):
+            if index in datetime_fields:
+                parts[index] = datetime.fromisoformat(part)
+            elif not isinstance(part, int) or isinstance(part, bool):
+                raise ValueError("cursor keys must be integers")
+        return tuple(parts)
+    except (ValueError, TypeError, IndexError, json.JSONDecodeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor")
+
+
+def set_next_cursor(response: Response, rows, limit: int, key) -> Optional[str]:
+    """Advertise the cursor for the next page if this page was full."""
+    if len(rows) < limit or not rows:
+        return None
+    cursor = encode_cursor(*key(rows[-1]))
+    response.headers[NEXT_CURSOR_HEADER] = cursor
+    return cursor
+
+
+def _field(row, name):
+    # Public lists hand over plain dicts (api.serialization), admin lists ORM rows
+    return row[name] if isinstance(row, dict) else getattr(row, name)
+
+
+def product_key(row):
+    return (_field(row, "sort_order"), _field(row, "id"))
+
+
+def case_key(row):
+    return (_field(row, "sort_order"), _field(row, "id"))
+
+
+def contact_key(row):
+    return (_field(row, "created_at"), _field(row, "id"))
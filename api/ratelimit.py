@@ -0,0 +1,362 @@
+import math
+import random
+from abc import ABC, abstractmethod
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from sqlalchemy import text
+from starlette.concurrency import run_in_threadpool
+
+from .config import settings
+
+# Sliding-window-counter rate limiting.
+#
+# Each key keeps two counters: hits in the current fixed window and hits in
+# the previous one. The estimated count over the last ``window`` seconds is
+#
+#     previous * (1 - elapsed_fraction_of_current_window) + current
+#
+# which tracks a true sliding log within a few percent while storing two
+# integers per key instead of a timestamp per attempt.
+#
+# Backends (RATE_LIMIT_BACKEND):
+#   memory   - per-process, LRU-bounded to RATE_LIMIT_MAX_KEYS keys (default)
+#   postgres - UNLOGGED rate_limit_counters table shared by all instances
+#   redis    - any Redis-protocol store at REDIS_URL; LocalRedis stands in
+#              for it in development and tests
+
+
+def _window_position(window: int, now: Optional[float] = None):
+    now = time.time() if now is None else now
+    index = int(now // window)
+    elapsed_fraction = (now - index * window) / window
+    return index, elapsed_fraction
+
+
+def _estimate(previous: int, current: int, elapsed_fraction: float) -> float:
+    return previous * (1.0 - elapsed_fraction) + current
+
+
+class RateLimiter(ABC):
+    def __init__(self, name: str, limit: int, window: int):
+        self.name = name
+        self.limit = limit
+        self.window = window
+
+    def retry_after(self) -> int:
+        # Conservative: by then the current window has become the previous one
+        # and its weight is decaying
+        _, elapsed_fraction = _window_position(self.window)
+        return max(1, math.ceil((1.0 - elapsed_fraction) * self.window))
+
+    @abstractmethod
+    async def count(self, key: str) -> float:
+        """The current estimate for ``key``."""
+
+    @abstractmethod
+    async def hit(self, key: str) -> float:
+        """Record one attempt for ``key`` and return the new estimate."""
+
+    @abstractmethod
+    async def reset(self, key: str) -> None:
+        """Forget ``key``'s attempts, e.g. after a successful login."""
+
+    async def is_limited(self, key: str) -> bool:
+        return await self.count(key) >= self.limit
+
+
+class MemoryRateLimiter(RateLimiter):
+    """Fixed-memory in-process limiter.
+
+    At most ``max_keys`` keys are tracked; the least recently seen key is
+    evicted first, so memory no longer grows with the number of distinct
+    clients that ever failed a login.
+    """
+
+    def __init__(self, name: str, limit: int, window: int, max_keys: int = 10000):
+        super().__init__(name, limit, window)
+        self.max_keys = max_keys
+        # key -> [window_index, previous_count, current_count]
+        self._counters: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _slot(self, key: str, index: int, create: bool):
+        slot = self._counters.get(key)
+        if slot is None:
+            if not create:
+                return None
+            slot = [index, 0, 0]
+            self._counters[key] = slot
+            while len(self._counters) > self.max_keys:
+                self._counters.popitem(last=False)
+        elif slot[0] != index:
+            # Roll forward: the old current window becomes "previous" only if
+            # it is the window right before this one
+            slot[1] = slot[2] if slot[0] == index - 1 else 0
+            slot[2] = 0
+            slot[0] = index
+        self._counters.move_to_end(key)
+        return slot
+
+    async def count(self, key: str) -> float:
+        index, elapsed_fraction = _window_position(self.window)
+        with self._lock:
+            slot = self._slot(key, index, create=False)
+            if slot is None:
+                return 0.0
+            estimate = _estimate(slot[1], slot[2], elapsed_fraction)
+            if estimate == 0:
+                del self._counters[key]
+            return estimate
+
+    async def hit(self, key: str) -> float:
+        index, elapsed_fraction = _window_position(self.window)
+        with self._lock:
+            slot = self._slot(key, index, create=True)
+            slot[2] += 1
+            return _estimate(slot[1], slot[2], elapsed_fraction)
+
+    async def reset(self, key: str) -> None:
+        with self._lock:
+            self._counters.pop(key, None)
+
+
+class LocalRedis:
+    """In-process stand-in for the few Redis commands the limiter uses."""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def _live(self, key):
+        entry = self._data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+            del self._data[key]
+            return None
+        return entry
+
+    def _set(self, key, value, ex=None, nx=False):
+        if nx and self._live(key) is not None:
+            return None
+        self._data[key] = (value, time.monotonic() + ex if ex is not None else None)
+        return True
+
+    def _incr(self, key):
+        entry = self._live(key)
+        value = (int(entry[0]) if entry else 0) + 1
+        self._data[key] = (value, entry[1] if entry else None)
+        return value
+
+    def _mget(self, keys):
+        values = []
+        for key in keys:
+            entry = self._live(key)
+            values.append(entry[0] if entry else None)
+        return values
+
+    def _delete(self, *keys):
+        return sum(1 for key in keys if self._data.pop(key, None) is not None)
+
+    async def set(self, key, value, ex=None, nx=False):
+        with self._lock:
+            return self._set(key, value, ex, nx)
+
+    async def incr(self, key):
+        with self._lock:
+            return self._incr(key)
+
+    async def mget(self, keys):
+        with self._lock:
+            return self._mget(keys)
+
+    async def delete(self, *keys):
+        with self._lock:
+            return self._delete(*keys)
+
+    def pipeline(self, transaction=True):
+        return _LocalPipeline(self)
+
+
+class _LocalPipeline:
+    """Queues commands and runs them together, as MULTI ... EXEC would."""
+
+    def __init__(self, store: LocalRedis):
+        self._store = store
+        self._commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._commands = []
+
+    def _queue(self, method, *args, **kwargs):
+        self._commands.append((method, args, kwargs))
+        return self
+
+    def set(self, key, value, ex=None, nx=False):
+        return self._queue(self._store._set, key, value, ex=ex, nx=nx)
+
+    def incr(self, key):
+        return self._queue(self._store._incr, key)
+
+    def mget(self, keys):
+        return self._queue(self._store._mget, keys)
+
+    async def execute(self):
+        commands, self._commands = self._commands, []
+        with self._store._lock:
+            return [method(*args, **kwargs) for method, args, kwargs in commands]
+
+
+class RedisRateLimiter(RateLimiter):
+    def __init__(self, name: str, limit: int, window: int, client):
+        super().__init__(name, limit, window)
+        self.client = client
+
+    def _keys(self, key: str, index: int):
+        prefix = f"ratelimit:{self.name}:{key}:"
+        return prefix + str(index - 1), prefix + str(index)
+
+    async def count(self, key: str) -> float:
+        index, elapsed_fraction = _window_position(self.window)
+        previous, current = await self.client.mget(list(self._keys(key, index)))
+        return _estimate(int(previous or 0), int(current or 0), elapsed_fraction)
+
+    async def hit(self, key: str) -> float:
+        index, elapsed_fraction = _window_position(self.window)
+        previous_key, current_key = self._keys(key, index)
+        # One MULTI round trip. The counter is created with its TTL (long
+        # enough to serve one more window as the "previous" counter), so no
+        # crash can leave it without one; INCR keeps the TTL.
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.set(current_key, 0, ex=self.window * 2, nx=True)
+            pipe.incr(current_key)
+            pipe.mget([previous_key])
+            _, current, (previous,) = await pipe.execute()
+        return _estimate(int(previous or 0), current, elapsed_fraction)
+
+    async def reset(self, key: str) -> None:
+        index, _ = _window_position(self.window)
+        await self.client.delete(*self._keys(key, index))
+
+
+class PostgresRateLimiter(RateLimiter):
+    """Counters in the UNLOGGED rate_limit_counters table (migration 0004).
+
+    UNLOGGED skips the WAL, so an increment costs about as much as a temp
+    table write; the counters are lost on a Postgres crash, which is fine
+    for rate limiting.
+    """
+
+    HIT = text(
+        "INSERT INTO rate_limit_counters (bucket, window_index, hits) VALUES (:bucket, :index, 1) "
+        "ON CONFLICT (bucket, window_index) DO UPDATE SET hits = rate_limit_counters.hits + 1"
+    )
+    COUNT = text(
+        "SELECT window_index, hits FROM rate_limit_counters "
+        "WHERE bucket = :bucket AND window_index IN (:index, :previous)"
+    )
+    RESET = text("DELETE FROM rate_limit_counters WHERE bucket = :bucket")
+    PRUNE = text("DELETE FROM rate_limit_counters WHERE window_index < :previous")
+
+    def __init__(self, name: str, limit: int, window: int, prune_probability: float = 0.01):
+        super().__init__(name, limit, window)
+        self.prune_probability = prune_probability
+
+    async def _run(self, statements, write):
+        from .database import async_engine, engine
+
+        if async_engine is not None:
+            async with (async_engine.begin() if write else async_engine.connect()) as conn:
+                result = None
+                for statement, params in statements:
+                    result = await conn.execute(statement, params)
+                return result.fetchall() if result.returns_rows else None
+
+        def _sync():
+            with (engine.begin() if write else engine.connect()) as conn:
+                result = None
+                for statement, params in statements:
+                    result = conn.execute(statement, params)
+                return result.fetchall() if result.returns_rows else None
+
+        return await run_in_threadpool(_sync)
+
+    def _bucket(self, key: str) -> str:
+        return f"{self.name}:{key}"
+
+    def _estimate_rows(self, rows, index, elapsed_fraction):
+        counts = {row[0]: row[1] for row in rows}
+        return _estimate(counts.get(index - 1, 0), counts.get(index, 0), elapsed_fraction)
+
+    async def count(self, key: str) -> float:
+        index, elapsed_fraction = _window_position(self.window)
+        params = {"bucket": self._bucket(key), "index": index, "previous": index - 1}
+        rows = await self._run([(self.COUNT, params)], write=False)
+        return self._estimate_rows(rows, index, elapsed_fraction)
+
+    async def hit(self, key: str) -> float:
+        index, elapsed_fraction = _window_position(self.window)
+        params = {"bucket": self._bucket(key), "index": index, "previous": index - 1}
+        statements = [(self.HIT, params)]
+        if random.random() < self.prune_probability:
+            statements.append((self.PRUNE, params))
+        statements.append((self.COUNT, params))
+        rows = await self._run(statements, write=True)
+        return self._estimate_rows(rows, index, elapsed_fraction)
+
+    async def reset(self, key: str) -> None:
+        await self._run([(self.RESET, {"bucket": self._bucket(key)})], write=True)
+
+
+_redis_client = None
+
+
+def _get_redis_client():
+    global _redis_client
+    if _redis_client is None:
+        url = settings.redis_url
+        if url:
+            import redis.asyncio
+
+            _redis_client = redis.asyncio.from_url(url)
+        else:
+            _redis_client = LocalRedis()
+    return _redis_client
+
+
+def create_limiter(name: str, limit: int, window: int, backend: Optional[str] = None) -> RateLimiter:
+    backend = (backend or settings.rate_limit_backend).lower()
+    if backend == "memory":
+        return MemoryRateLimiter(name, limit, window, max_keys=settings.rate_limit_max_keys)
+    if backend == "postgres":
+        return PostgresRateLimiter(name, limit, window)
+    if backend == "redis":
+        return RedisRateLimiter(name, limit, window, _get_redis_client())
+    raise ValueError(f"RATE_LIMIT_BACKEND must be memory, postgres or redis; got {backend!r}")
+
+
+def client_ip(request) -> str:
+    # Vercel's edge sets X-Forwarded-For itself, so it can be trusted there;
+    # elsewhere only trust it when explicitly told a proxy is in front
+    if settings.trust_proxy_headers:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+# 5 failed logins per 15 minutes, 5 contact submissions per 10 minutes per IP
+login_limiter = create_limiter(
+    "login",
+    limit=settings.login_rate_limit,
+    window=settings.login_rate_window_seconds,
+)
+contact_limiter = create_limiter(
+    "contact",
+    limit=settings.contact_rate_limit,
+    window=settings.contact_rate_window_seconds,
+)
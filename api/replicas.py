@@ -0,0 +1,189 @@
+import logging
+import math
+import threading
+import time
+from contextvars import ContextVar
+from typing import List, Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import settings
+from .events import on_change
+
+logger = logging.getLogger(__name__)
+
+# Read replicas (DATABASE_REPLICA_URLS).
+#
+# Public read routes take their session from database.get_read_db. Its plain
+# SELECTs go to a replica, picked round-robin among the healthy ones;
+# anything else (flushes, INSERT/UPDATE/DELETE, SELECT ... FOR UPDATE) goes
+# to the primary and keeps the rest of that session there. Admin routes,
+# contact ingestion and background jobs only ever use the primary.
+#
+# Read-your-writes: replicas lag the primary a little, so for
+# DB_READ_YOUR_WRITES_SECONDS after an admin write
+#   - the instance that made it reads from the primary, so the response
+#     cache entries it just invalidated are refilled with the new data, and
+#   - the client that made it gets a cookie sending its reads to the primary
+#     on whichever instance serves them.
+#
+# Failover: a replica that can't be reached is skipped for
+# DB_REPLICA_RETRY_SECONDS and then tried again. The query that ran into it
+# is retried on the primary (api.crud_async), so the request still succeeds.
+
+READ_YOUR_WRITES_SECONDS = settings.db_read_your_writes_seconds
+RETRY_SECONDS = settings.db_replica_retry_seconds
+PRIMARY_COOKIE = "db_primary_until"
+
+
+class Replica:
+    """One read replica: its engines and health."""
+
+    def __init__(self, name: str, engine, metrics, async_engine=None, async_metrics=None):
+        self.name = name
+        self.engine = engine
+        self.metrics = metrics
+        self.async_engine = async_engine
+        self.async_metrics = async_metrics
+        self.failed_until = 0.0
+        self.sessions = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+
+    def healthy(self, now: float) -> bool:
+        return now >= self.failed_until
+
+    def mark_failed(self, exc: BaseException) -> None:
+        self.failed_until = time.monotonic() + RETRY_SECONDS
+        self.failures += 1
+        self.last_error = f"{type(exc).__name__}: {exc}".splitlines()[0][:200]
+        logger.warning("Read replica %s is unavailable, skipping it for %g s: %s", self.name, RETRY_SECONDS, self.last_error)
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "healthy": self.healthy(time.monotonic()),
+            "sessions": self.sessions,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "sync_engine": self.metrics.snapshot(self.engine),
+            **({"async_engine": self.async_metrics.snapshot(self.async_engine)} if self.async_engine is not None else {}),
+        }
+
+
+class ReplicaSet:
+    def __init__(self, replicas: List[Replica]):
+        self.replicas = replicas
+        self._next = 0
+        self._lock = threading.Lock()
+        self.primary_sessions = {"read_your_writes": 0, "no_healthy_replica": 0}
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    def choose(self, primary_required: bool = False) -> Optional[Replica]:
+        """The replica for the next read session, or None to read from the primary."""
+        if not self.replicas:
+            return None
+        with self._lock:
+            if primary_required:
+                self.primary_sessions["read_your_writes"] += 1
+                return None
+            now = time.monotonic()
+            for offset in range(len(self.replicas)):
+                replica = self.replicas[(self._next + offset) % len(self.replicas)]
+                if replica.healthy(now):
+                    self._next = (self._next + offset + 1) % len(self.replicas)
+                    replica.sessions += 1
+                    return replica
+            self.primary_sessions["no_healthy_replica"] += 1
+            return None
+
+    def stats(self) -> dict:
+        return {
+            "read_your_writes_seconds": READ_YOUR_WRITES_SECONDS,
+            "primary_sessions": dict(self.primary_sessions),
+            "replicas": [replica.stats() for replica in self.replicas],
+        }
+
+
+def is_unavailable(exc: BaseException) -> bool:
+    """Whether ``exc`` means the database could not be reached, rather than a bad query."""
+    from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+
+    if isinstance(exc, DBAPIError):
+        return exc.connection_invalidated or isinstance(exc, (OperationalError, InterfaceError))
+    # asyncpg's connect errors aren't wrapped
+    return isinstance(exc, OSError)
+
+
+# Read-your-writes bookkeeping. _writes holds the current request's flag
+# (a list, so a write made in the threadpool or in a greenlet still marks
+# the request that ran it).
+_last_write = None
+_writes: ContextVar[Optional[list]] = ContextVar("replica_writes", default=None)
+
+
+@on_change
+def _note_write(namespace: str) -> None:
+    global _last_write
+    _last_write = time.monotonic()
+    writes = _writes.get()
+    if writes is not None:
+        writes.append(namespace)
+
+
+def _recent_write() -> bool:
+    return _last_write is not None and time.monotonic() - _last_write < READ_YOUR_WRITES_SECONDS
+
+
+def primary_required(cookies) -> bool:
+    """Whether a read should see the primary: a write was made here, or by this client, just now."""
+    if _recent_write():
+        return True
+    try:
+        return float(cookies.get(PRIMARY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+# The response cache (api.cache) is checked before any query, so it has to
+# follow the same rules: a read that must see the primary skips it, and a
+# replica's result is not cached while the replica may still lag a write
+# that just invalidated the cache (it would outlive that lag by the whole
+# CACHE_TTL_SECONDS). Both take the read session's ``info``.
+def cache_bypassed(info) -> bool:
+    return info.get("primary_required", False)
+
+
+def cacheable(info) -> bool:
+    return info.get("replica") is None or not _recent_write()
+
+
+class ReadYourWritesMiddleware:
+    """Sets the PRIMARY_COOKIE on responses to requests that wrote."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        writes = []
+        token = _writes.set(writes)
+
+        async def send_with_cookie(message: Message) -> None:
+            if message["type"] == "http.response.start" and writes and READ_YOUR_WRITES_SECONDS > 0:
+                max_age = math.ceil(READ_YOUR_WRITES_SECONDS)
+                MutableHeaders(raw=message["headers"]).append(
+                    "Set-Cookie",
+                    f"{PRIMARY_COOKIE}={int(time.time()) + max_age}; Max-Age={max_age}; Path=/; HttpOnly; SameSite=Lax",
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_cookie)
+        finally:
+            _writes.reset(token)
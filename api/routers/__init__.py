@@ -0,0 +1,69 @@
+import importlib
+import threading
+import time
+from typing import List
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from ..timing import record_phase
+
+# The API's routes, grouped into routers that are imported and mounted the
+# first time a request needs them. Groups follow the first path segment
+# after /api, so /api/health answers without SQLAlchemy, the schemas or
+# python-jose being imported, and a public page never loads the admin or
+# auth routes. The time a request spends mounting shows up as the
+# "router-import" Server-Timing phase.
+
+ROUTERS = {
+    "auth": "auth",
+    "content": "catalog",
+    "products": "catalog",
+    "cases": "catalog",
+    "bootstrap": "catalog",
+    "search": "search",
+    "media": "media",
+    "contact": "contact",
+    "admin": "admin",
+}
+
+_mounted: List[str] = []
+_lock = threading.Lock()
+
+
+def mount(target, name: str) -> None:
+    """Import api.routers.<name> and include its routes in ``target`` (once)."""
+    if name in _mounted:
+        return
+    with _lock:
+        if name in _mounted:
+            return
+        module = importlib.import_module(f"{__name__}.{name}")
+        target.include_router(module.router)
+        _mounted.append(name)
+
+
+def mount_all(target) -> None:
+    for name in dict.fromkeys(ROUTERS.values()):
+        mount(target, name)
+
+
+def mounted() -> List[str]:
+    return list(_mounted)
+
+
+class LazyRouterMiddleware:
+    """Mounts the router for a request's path before the app routes it."""
+
+    def __init__(self, app: ASGIApp, router):
+        self.app = app
+        self.router = router
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] in ("http", "websocket"):
+            parts = scope["path"].split("/", 3)
+            name = ROUTERS.get(parts[2]) if len(parts) > 2 and parts[1] == "api" else None
+            if name is not None and name not in _mounted:
+                started = time.perf_counter()
+                mount(self.router, name)
+                record_phase("router-import", (time.perf_counter() - started) * 1000)
+        await self.app(scope, receive, send)
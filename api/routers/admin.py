@@ -0,0 +1,463 @@
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional
+import os
+
+from .. import crud_async, export, feed, ingest, media
+from ..auth import AUTH_MODE, STREAM_TOKEN_SECONDS, create_stream_token, hashing_stats, user_state_cache
+from ..cache import response_cache
+from ..crud import VersionConflict, contact_export_statement
+from ..database import AnySession, get_db, pool_stats
+from ..http_cache import if_match_versions, version_etag
+from ..models import User
+from ..pagination import (
+    NEXT_CURSOR_HEADER, case_key, contact_key, decode_cursor, encode_cursor, product_key, set_next_cursor
+)
+from ..schemas import (
+    ApplicationCaseBulkRequest,
+    ApplicationCaseCreate,
+    ApplicationCaseResponse,
+    ApplicationCaseUpdate,
+    BulkResponse,
+    ContactSubmissionResponse,
+    MediaItemResponse,
+    MediaItemUpdate,
+    PageContentBulkRequest,
+    PageContentCreate,
+    PageContentResponse,
+    PageContentUpdate,
+    ProductBulkRequest,
+    ProductCreate,
+    ProductResponse,
+    ProductUpdate,
+    ReorderRequest,
+    StreamTokenResponse,
+)
+from ..timing import metrics_snapshot, reset_metrics
+from . import mounted
+from .common import filter_values, get_current_user, get_stream_user
+
+router = APIRouter()
+
+# Admin endpoints (require authentication)
+def _precondition_failed(exc: VersionConflict):
+    return HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail="This item was changed by someone else. Reload it and try again.",
+        headers={"ETag": version_etag(exc.current_version)},
+    )
+
+def _bulk_conflict(exc: IntegrityError):
+    # The whole batch was rolled back; nothing was applied
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"Bulk operation rejected, no changes applied: {exc.orig}",
+    )
+
+@router.get("/api/admin/content", response_model=List[PageContentResponse])
+async def get_all_content(
+    current_user: User = Depends(get_current_user), 
+    db: AnySession = Depends(get_db)
+):
+    return await crud_async.get_all_page_content(db)
+
+@router.post("/api/admin/content", response_model=PageContentResponse)
+async def create_content(
+    content_data: PageContentCreate, 
+    current_user: User = Depends(get_current_user), 
+    db: AnySession = Depends(get_db)
+):
+    return await crud_async.create_page_content(db, content_data)
+
+@router.post("/api/admin/content/bulk", response_model=BulkResponse)
+async def bulk_content(
+    request: PageContentBulkRequest,
+    current_user: User = Depends(get_current_user),
+    db: AnySession = Depends(get_db)
+):
+    try:
+        return {"results": await crud_async.bulk_page_content(db, request)}
+    except IntegrityError as exc:
+        raise _bulk_conflict(exc)
+
+@router.put("/api/admin/content/{content_id}", response_model=PageContentResponse)
+async def update_content(
+    content_id: int, 
+    content_data: PageContentUpdate, 
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user), 
+    db: AnySession = Depends(get_db)
+):
+    try:
+        content = await crud_async.update_page_content(db, content_id, content_data, if_match_versions(request))
+    except VersionConflict as exc:
+        raise _precondition_failed(exc)
+    if not content:
+        raise HTTPException(status_code=404, detail="Content not found")
+    response.headers["ETag"] = version_etag(content.version)
+    return content
+
+@router.delete("/api/admin/content/{content_id}")
+async def delete_content(
+    content_id: int, 
+    request: Request,
+    current_user: User = Depends(get_current_user), 
+    db: AnySession = Depends(get_db)
+):
+    try:
+        success = await crud_async.delete_page_content(db, content_id, if_match_versions(request))
+    except VersionConflict as exc:
+        raise _precondition_failed(exc)
+    if not success:
+        raise HTTPException(status_code=404, detail="Content not found")
+    return {"message": "Content deleted successfully"}
+
+@router.get("/api/admin/contacts", response_model=List[ContactSubmissionResponse])
+async def get_all_contacts(
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user), 
+    db: AnySession = Depends(get_db)
+):
+    if ingest.MODE == "queue" and cursor is None and skip == 0:
+        # Serverless instances may never run their flusher; make sure the
+        # inbox shows everything accepted so far
+        await ingest.flush_async()
+    contacts = await crud_async.get_all_contact_submissions(
+        db, skip=skip, limit=limit, after=decode_cursor(cursor, 2, datetime_fields=(0,))
+    )
+    set_next_cursor(response, contacts, limit, contact_key)
+    return contacts
+
+# The inbox as a CSV or NDJSON download, streamed (api.export). Large
+# exports come in pages of up to CONTACT_EXPORT_PAGE_ROWS rows, chained with
+# the X-Next-Cursor header; only the first CSV page has the header row.
+@router.get("/api/admin/contacts/export", response_class=StreamingResponse)
+async def export_contacts(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    is_read: Optional[bool] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(export.PAGE_ROWS, ge=1, le=export.PAGE_ROWS),
+    current_user: User = Depends(get_current_user),
+    db: AnySession = Depends(get_db)
+):
+    after = decode_cursor(cursor, 2, datetime_fields=(0,))
+    if ingest.MODE == "queue" and cursor is None:
+        await ingest.flush_async()
+    through = await crud_async.get_contact_export_boundary(
+        db, limit, since=since, until=until, is_read=is_read, after=after
+    )
+    media_type, extension = export.FORMATS[format]
+    headers = {
+        "Content-Disposition": f'attachment; filename="contacts.{extension}"',
+        "Cache-Control": "no-store",
+    }
+    if through is not None:
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(*through)
+    statement = contact_export_statement(since, until, is_read, after, through)
+    return StreamingResponse(
+        export.stream_contacts(statement, format, header=cursor is None), media_type=media_type, headers=headers
+    )
+
+@router.post("/api/admin/contacts/flush")
+async def flush_contacts(current_user: User = Depends(get_current_user)):
+    # Store spooled / queued submissions now instead of on the next flusher tick
+    return await ingest.flush_async()
+
+# Server-sent events for the dashboard (api.feed). A stream ends after
+# CHANGE_FEED_STREAM_SECONDS; EventSource reconnects with Last-Event-ID and
+# is sent what it missed. The browser opens it with a short-lived stream
+# token in the URL (see api.auth.create_stream_token), asked for here with
+# its admin token.
+@router.post("/api/admin/events/token", response_model=StreamTokenResponse)
+async def change_events_token(current_user: User = Depends(get_current_user)):
+    if not feed.ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Change feed is disabled")
+    return {"token": create_stream_token(current_user), "expires_in": STREAM_TOKEN_SECONDS}
+
+@router.get("/api/admin/events", response_class=StreamingResponse)
+async def change_events(
+    request: Request,
+    last_event_id: Optional[int] = None,
+    current_user: User = Depends(get_stream_user),
+):
+    if not feed.ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Change feed is disabled")
+    header = request.headers.get("last-event-id", "")
+    if header.isdigit():
+        last_event_id = int(header)
+    return StreamingResponse(
+        feed.stream(last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/api/admin/cache")
+async def get_cache_stats(current_user: User = Depends(get_current_user)):
+    return response_cache.stats()
+
+@router.delete("/api/admin/cache")
+async def clear_cache(current_user: User = Depends(get_current_user)):
+    response_cache.clear()
+    return {"message": "Cache cleared successfully"}
+
+@router.get("/api/admin/auth/hashing")
+async def get_hashing_stats(current_user: User = Depends(get_current_user)):
+    return hashing_stats()
+
+@router.get("/api/admin/auth/cache")
+async def get_auth_cache_stats(current_user: User = Depends(get_current_user)):
+    return {"mode": AUTH_MODE, **user_state_cache.stats()}
+
+@router.get("/api/admin/db/pool")
+async def get_pool_stats(current_user: User = Depends(get_current_user)):
+    return pool_stats()
+
+# Per-route latency percentiles, DB time and query counts since the instance
+# started, plus the stats above in one place
+@router.get("/api/admin/metrics")
+async def get_metrics(current_user: User = Depends(get_current_user)):
+    return {
+        **metrics_snapshot(),
+        "db_pool": pool_stats(),
+        "response_cache": response_cache.stats(),
+        "auth_cache": {"mode": AUTH_MODE, **user_state_cache.stats()},
+        "hashing": hashing_stats(),
+        "contact_ingest": ingest.stats(),
+        "change_feed": feed.hub.stats(),
+        "routers": mounted(),
+    }
+
+@router.delete("/api/admin/metrics")
+async def clear_metrics(current_user: User = Depends(get_current_user)):
+    reset_metrics()
+    return {"message": "Metrics reset successfully"}
+
+@router.get("/api/admin/products", response_model=List[ProductResponse])
+async def admin_get_products(
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    category: Optional[str] = None,
+    is_featured: Optional[bool] = None,
+    current_user: User = Depends(get_current_user), 
+    db: AnySession = Depends(get_db)
+):
+    # Admins also see inactive products so they can re-enable them
+    products = await crud_async.get_all_products(
+        db, skip=skip, limit=limit, after=decode_cursor(cursor, 2), include_inactive=True,
+        categories=filter_values(category), is_featured=is_featured
+    )
+    set_next_cursor(response, products, limit, product_key)
+    return products
+
+@router.post("/api/admin/products", response_model=ProductResponse)
+async def create_product(
+    product_data: ProductCreate, 
+    current_user: User = Depends(get_current_user), 
+    db: AnySession = Depends(get_db)
+):
+    return await crud_async.create_product(db, product_data)
+
+@router.post("/api/admin/products/bulk", response_model=BulkResponse)
+async def bulk_products(
+    request: ProductBulkRequest,
+    current_user: User = Depends(get_current_user),
+    db: AnySession = Depends(get_db)
+):
+    try:
+        return {"results": await crud_async.bulk_products(db, request)}
+    except IntegrityError as exc:
+        raise _bulk_conflict(exc)
+
+@router.post("/api/admin/products/reorder", response_model=BulkResponse)
+async def reorder_products(
+    request: ReorderRequest,
+    current_user: User = Depends(get_current_user),
+    db: AnySession = Depends(get_db)
+):
+    return {"results": await crud_async.reorder_products(db, request.items)}
+
+@router.put("/api/admin/products/{product_id}", response_model=ProductResponse)
+async def update_product(
+    product_id: int, 
+    product_data: ProductUpdate, 
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user), 
+    db: AnySession = Depends(get_db)
+):
+    try:
+        product = await crud_async.update_product(db, product_id, product_data, if_match_versions(request))
+    except VersionConflict as exc:
+        raise _precondition_failed(exc)
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+    response.headers["ETag"] = version_etag(product.version)
+    return product
+
+@router.delete("/api/admin/products/{product_id}")
+async def delete_product(
+    product_id: int, 
+    request: Request,
+    current_user: User = Depends(get_current_user), 
+    db: AnySession = Depends(get_db)
+):
+    try:
+        success = await crud_async.delete_product(db, product_id, if_match_versions(request))
+    except VersionConflict as exc:
+        raise _precondition_failed(exc)
+    if not success:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return {"message": "Product deleted successfully"}
+
+@router.get("/api/admin/cases", response_model=List[ApplicationCaseResponse])
+async def admin_get_cases(
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    industry: Optional[str] = None,
+    is_featured: Optional[bool] = None,
+    current_user: User = Depends(get_current_user), 
+    db: AnySession = Depends(get_db)
+):
+    cases = await crud_async.get_all_application_cases(
+        db, skip=skip, limit=limit, after=decode_cursor(cursor, 2), include_inactive=True,
+        industries=filter_values(industry), is_featured=is_featured
+    )
+    set_next_cursor(response, cases, limit, case_key)
+    return cases
+
+@router.post("/api/admin/cases", response_model=ApplicationCaseResponse)
+async def create_case(
+    case_data: ApplicationCaseCreate, 
+    current_user: User = Depends(get_current_user), 
+    db: AnySession = Depends(get_db)
+):
+    return await crud_async.create_application_case(db, case_data)
+
+@router.post("/api/admin/cases/bulk", response_model=BulkResponse)
+async def bulk_cases(
+    request: ApplicationCaseBulkRequest,
+    current_user: User = Depends(get_current_user),
+    db: AnySession = Depends(get_db)
+):
+    try:
+        return {"results": await crud_async.bulk_application_cases(db, request)}
+    except IntegrityError as exc:
+        raise _bulk_conflict(exc)
+
+@router.post("/api/admin/cases/reorder", response_model=BulkResponse)
+async def reorder_cases(
+    request: ReorderRequest,
+    current_user: User = Depends(get_current_user),
+    db: AnySession = Depends(get_db)
+):
+    return {"results": await crud_async.reorder_application_cases(db, request.items)}
+
+@router.put("/api/admin/cases/{case_id}", response_model=ApplicationCaseResponse)
+async def update_case(
+    case_id: int, 
+    case_data: ApplicationCaseUpdate, 
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user), 
+    db: AnySession = Depends(get_db)
+):
+    try:
+        case = await crud_async.update_application_case(db, case_id, case_data, if_match_versions(request))
+    except VersionConflict as exc:
+        raise _precondition_failed(exc)
+    if not case:
+        raise HTTPException(status_code=404, detail="Application case not found")
+    response.headers["ETag"] = version_etag(case.version)
+    return case
+
+@router.delete("/api/admin/cases/{case_id}")
+async def delete_case(
+    case_id: int, 
+    request: Request,
+    current_user: User = Depends(get_current_user), 
+    db: AnySession = Depends(get_db)
+):
+    try:
+        success = await crud_async.delete_application_case(db, case_id, if_match_versions(request))
+    except VersionConflict as exc:
+        raise _precondition_failed(exc)
+    if not success:
+        raise HTTPException(status_code=404, detail="Application case not found")
+    return {"message": "Application case deleted successfully"}
+
+# Uploads are the raw request body (e.g. fetch(url, {method: "POST", body:
+# file})), streamed to storage; ``filename`` is the name shown in the media
+# library. The type is detected from the content. Uploading a file that is
+# already stored returns the existing item with 200 instead of 201.
+@router.post("/api/admin/media", response_model=MediaItemResponse, status_code=status.HTTP_201_CREATED)
+async def upload_media(
+    request: Request,
+    response: Response,
+    filename: str = Query(..., min_length=1, max_length=255),
+    alt_text: Optional[str] = Query(None, max_length=255),
+    current_user: User = Depends(get_current_user),
+    db: AnySession = Depends(get_db)
+):
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > media.MEDIA_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"File exceeds {media.MEDIA_MAX_BYTES} bytes")
+    try:
+        upload = await media.receive(request.stream())
+    except media.MediaTooLarge as exc:
+        raise HTTPException(status_code=413, detail=str(exc))
+    except media.UnsupportedMedia as exc:
+        raise HTTPException(status_code=415, detail=str(exc))
+
+    existing = await crud_async.get_media_item_by_hash(db, upload.content_hash)
+    if existing is not None:
+        media.discard(upload.temp_path)
+        response.status_code = status.HTTP_200_OK
+        return media.describe(existing)
+    try:
+        values = await media.ingest(upload)
+    except media.UnsupportedMedia as exc:
+        raise HTTPException(status_code=415, detail=str(exc))
+    item, created = await crud_async.create_media_item(
+        db, {**values, "original_filename": os.path.basename(filename), "alt_text": alt_text}
+    )
+    if not created:
+        response.status_code = status.HTTP_200_OK
+    return media.describe(item)
+
+@router.put("/api/admin/media/{media_id}", response_model=MediaItemResponse)
+async def update_media_item(
+    media_id: int,
+    media_data: MediaItemUpdate,
+    current_user: User = Depends(get_current_user),
+    db: AnySession = Depends(get_db)
+):
+    item = await crud_async.update_media_item(db, media_id, media_data)
+    if item is None:
+        raise HTTPException(status_code=404, detail="Media item not found")
+    return media.describe(item)
+
+@router.delete("/api/admin/media/{media_id}")
+async def delete_media_item(
+    media_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AnySession = Depends(get_db)
+):
+    deleted = await crud_async.delete_media_item(db, media_id)
+    if deleted is None:
+        raise HTTPException(status_code=404, detail="Media item not found")
+    # Product / case image_urls still pointing at the files will 404
+    await run_in_threadpool(media.delete_objects, deleted.file_path, deleted.variants)
+    return {"message": "Media item deleted successfully"}
@@ -0,0 +1,76 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+
+from .. import crud_async
+from ..auth import (
+    HashingOverloaded,
+    TokenUser,
+    create_access_token,
+    token_claims,
+    user_state_cache,
+    verify_password_async,
+)
+from ..database import AnySession, get_db
+from ..models import User
+from ..ratelimit import client_ip, login_limiter
+from ..schemas import TokenResponse, UserLogin, UserResponse
+from .common import get_current_user, too_many_requests, unauthorized
+
+router = APIRouter()
+
+# Auth endpoints
+@router.post("/api/auth/login", response_model=TokenResponse)
+async def login(
+    user_credentials: UserLogin,
+    request: Request,
+    db: AnySession = Depends(get_db)
+):
+    # Only failed attempts count towards the limit
+    ip = client_ip(request)
+    if await login_limiter.is_limited(ip):
+        raise too_many_requests(login_limiter, "Too many login attempts. Please try again later.")
+    user = await crud_async.get_user_by_email(db, user_credentials.email)
+    try:
+        # Unknown emails still pay for a (dummy) bcrypt check
+        valid, new_hash = await verify_password_async(
+            user_credentials.password, user.password_hash if user else None
+        )
+    except HashingOverloaded:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Login is temporarily busy. Please try again.",
+            headers={"Retry-After": "1"},
+        )
+    if not valid:
+        await login_limiter.hit(ip)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect email or password"
+        )
+    if new_hash:
+        await crud_async.update_user_password_hash(db, user.id, new_hash)
+    # Reset attempts on successful login
+    await login_limiter.reset(ip)
+    access_token = create_access_token(data=token_claims(user))
+    return {"access_token": access_token, "token_type": "bearer"}
+
+@router.get("/api/auth/me", response_model=UserResponse)
+async def get_current_user_info(
+    current_user: User = Depends(get_current_user),
+    db: AnySession = Depends(get_db)
+):
+    # The token only carries id/email/role; the profile comes from the DB
+    if isinstance(current_user, TokenUser):
+        current_user = await crud_async.get_user_by_id(db, current_user.id)
+        if current_user is None:
+            raise unauthorized("User not found")
+    return current_user
+
+@router.post("/api/auth/logout-all")
+async def logout_all_sessions(
+    current_user: User = Depends(get_current_user),
+    db: AnySession = Depends(get_db)
+):
+    # Bumping the token version invalidates every token issued so far
+    await crud_async.revoke_user_tokens(db, current_user.id)
+    user_state_cache.discard(("user", current_user.id))
+    return {"message": "All sessions have been signed out"}
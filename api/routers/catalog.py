@@ -0,0 +1,138 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from typing import List, Optional
+
+from .. import crud_async
+from ..cache import MISSING
+from ..database import AnySession, get_read_db
+from ..http_cache import build_resource, combine_resources, conditional_response
+from ..pagination import case_key, decode_cursor, product_key, set_next_cursor
+from ..schemas import (
+    CASE_SUMMARY_FIELDS,
+    PRODUCT_SUMMARY_FIELDS,
+    ApplicationCaseResponse,
+    CaseFacetsResponse,
+    PageBootstrapResponse,
+    PageContentResponse,
+    ProductFacetsResponse,
+    ProductResponse,
+)
+from .common import cache_lookup, cache_store, cached_facets, cached_resource, filter_values
+
+router = APIRouter()
+
+# Public endpoints: page content, products, application cases and the page
+# bootstrap. All of them are served through response_cache, and misses read
+# from a read replica when one is configured (database.get_read_db).
+
+@router.get("/api/content/{page_name}", response_model=PageContentResponse)
+async def get_page_content(page_name: str, request: Request, response: Response, db: AnySession = Depends(get_read_db)):
+    resource = await cached_resource(
+        ("content", page_name), PageContentResponse, crud_async.get_page_content_by_name, db, page_name
+    )
+    if not resource:
+        raise HTTPException(status_code=404, detail="Page content not found")
+    return conditional_response(request, response, resource)
+
+# List endpoints page with an opaque ``cursor`` (from the X-Next-Cursor header
+# of the previous page); ``skip`` still works for offset paging.
+@router.get("/api/products", response_model=List[ProductResponse])
+async def get_products(
+    request: Request,
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    category: Optional[str] = None,
+    is_featured: Optional[bool] = None,
+    db: AnySession = Depends(get_read_db)
+):
+    after = decode_cursor(cursor, 2)
+    categories = filter_values(category)
+    resource = await cached_resource(
+        ("products", "list", skip, limit, cursor, categories, is_featured), ProductResponse,
+        crud_async.get_all_products, db, skip=skip, limit=limit, after=after, categories=categories, is_featured=is_featured
+    )
+    set_next_cursor(response, resource.data, limit, product_key)
+    return conditional_response(request, response, resource)
+
+# Counts per category (and how many of them are featured) for the catalog
+# filters. Declared before /api/products/{product_id} so "facets" is not
+# taken for an id.
+@router.get("/api/products/facets", response_model=ProductFacetsResponse)
+async def get_product_facets(request: Request, response: Response, db: AnySession = Depends(get_read_db)):
+    resource = await cached_facets(("products", "facets"), crud_async.get_product_facets, db)
+    return conditional_response(request, response, resource)
+
+@router.get("/api/products/{product_id}", response_model=ProductResponse)
+async def get_product(product_id: int, request: Request, response: Response, db: AnySession = Depends(get_read_db)):
+    resource = await cached_resource(
+        ("products", "detail", product_id), ProductResponse, crud_async.get_product_by_id, db, product_id
+    )
+    if not resource:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return conditional_response(request, response, resource)
+
+@router.get("/api/cases", response_model=List[ApplicationCaseResponse])
+async def get_application_cases(
+    request: Request,
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    industry: Optional[str] = None,
+    is_featured: Optional[bool] = None,
+    db: AnySession = Depends(get_read_db)
+):
+    after = decode_cursor(cursor, 2)
+    industries = filter_values(industry)
+    resource = await cached_resource(
+        ("cases", "list", skip, limit, cursor, industries, is_featured), ApplicationCaseResponse,
+        crud_async.get_all_application_cases, db, skip=skip, limit=limit, after=after, industries=industries, is_featured=is_featured
+    )
+    set_next_cursor(response, resource.data, limit, case_key)
+    return conditional_response(request, response, resource)
+
+@router.get("/api/cases/facets", response_model=CaseFacetsResponse)
+async def get_case_facets(request: Request, response: Response, db: AnySession = Depends(get_read_db)):
+    resource = await cached_facets(("cases", "facets"), crud_async.get_application_case_facets, db)
+    return conditional_response(request, response, resource)
+
+# One request (one invocation, one connection) for everything a public page
+# needs. ``product_fields`` / ``case_fields`` pick the columns returned per
+# item, comma-separated or "all"; the defaults leave out the long descriptions.
+def _parse_fields(value: Optional[str], schema, default):
+    if value is None:
+        return default
+    if value.strip() == "all":
+        return tuple(schema.model_fields)
+    fields = tuple(dict.fromkeys(field.strip() for field in value.split(",") if field.strip()))
+    unknown = [field for field in fields if field not in schema.model_fields]
+    if unknown or not fields:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown) or '(none given)'}")
+    return fields
+
+@router.get("/api/bootstrap/{page_name}", response_model=PageBootstrapResponse)
+async def get_page_bootstrap(
+    page_name: str,
+    request: Request,
+    response: Response,
+    product_fields: Optional[str] = None,
+    case_fields: Optional[str] = None,
+    products_limit: int = Query(100, ge=0, le=500),
+    cases_limit: int = Query(100, ge=0, le=500),
+    db: AnySession = Depends(get_read_db)
+):
+    product_fields = _parse_fields(product_fields, ProductResponse, PRODUCT_SUMMARY_FIELDS)
+    case_fields = _parse_fields(case_fields, ApplicationCaseResponse, CASE_SUMMARY_FIELDS)
+    key = ("bootstrap", page_name, product_fields, case_fields, products_limit, cases_limit)
+    resource = cache_lookup(key, db)
+    if resource is MISSING:
+        result = await crud_async.get_page_bootstrap(
+            db, page_name, product_fields, case_fields, products_limit=products_limit, cases_limit=cases_limit
+        )
+        data = PageBootstrapResponse.from_result(page_name, result, product_fields, case_fields)
+        resource = combine_resources(data, [
+            build_resource(data.content), build_resource(result["products"]), build_resource(result["cases"])
+        ])
+        cache_store(key, resource, db)
+    return conditional_response(request, response, resource)
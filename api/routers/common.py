@@ -0,0 +1,132 @@
+from fastapi import Depends, HTTPException, Query, status
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from typing import Optional
+
+from .. import crud_async
+from ..auth import AUTH_MODE, STREAM_TOKEN_SCOPE, TokenUser, user_state_cache, verify_token
+from ..cache import MISSING, response_cache
+from ..database import AnySession, get_db, release
+from ..http_cache import build_resource, digest_resource
+from ..replicas import cache_bypassed, cacheable
+from ..serialization import row_to_dict, rows_to_dicts
+
+# Dependencies and helpers shared by the routers
+
+security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
+
+def unauthorized(detail: str = "Invalid authentication credentials"):
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+def too_many_requests(limiter, detail):
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=detail,
+        headers={"Retry-After": str(limiter.retry_after())},
+    )
+
+async def _user_state(db: AnySession, user_id: int):
+    key = ("user", user_id)
+    state = user_state_cache.get(key)
+    if state is MISSING:
+        row = await crud_async.get_user_auth_state(db, user_id)
+        state = (row.token_version, row.is_active) if row is not None else None
+        user_state_cache.set(key, state)
+    return state
+
+# Dependency to get current user. In stateless mode a cache hit answers
+# without touching the session, so no connection is checked out.
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AnySession = Depends(get_db)
+):
+    return await _authenticate(credentials.credentials, db)
+
+# For event streams: EventSource can't send an Authorization header, so a
+# stream token (POST /api/admin/events/token) may come as ?token= instead.
+# The connection used to check it is released before the stream starts
+# rather than held for its whole length.
+async def get_stream_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+    token: Optional[str] = Query(None),
+    db: AnySession = Depends(get_db)
+):
+    if credentials is None and not token:
+        raise unauthorized("Not authenticated")
+    try:
+        if credentials is not None:
+            return await _authenticate(credentials.credentials, db)
+        return await _authenticate(token, db, scope=STREAM_TOKEN_SCOPE)
+    finally:
+        await release(db)
+
+async def _authenticate(token: str, db: AnySession, scope: Optional[str] = None):
+    payload = verify_token(token)
+    # A stream token only opens the stream, and only a stream token goes in a URL
+    if payload is None or payload.get("scope") != scope:
+        raise unauthorized()
+    if AUTH_MODE == "stateless" and "uid" in payload and "tv" in payload:
+        state = await _user_state(db, payload["uid"])
+        if state is None:
+            raise unauthorized("User not found")
+        token_version, is_active = state
+        if token_version != payload["tv"] or not is_active:
+            raise unauthorized("Token has been revoked")
+        return TokenUser.from_claims(payload)
+    # AUTH_MODE=db, or a token issued before the uid/tv claims existed
+    user = await crud_async.get_user_by_email(db, payload.get("sub"))
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found"
+        )
+    if "tv" in payload and (payload["tv"] != user.token_version or not user.is_active):
+        raise unauthorized("Token has been revoked")
+    return user
+
+# response_cache lookups for routes reading through ``db``; see
+# api.replicas for why a read session can skip the cache or not fill it
+def cache_lookup(key, db):
+    if cache_bypassed(db.info):
+        return MISSING
+    return response_cache.get(key)
+
+def cache_store(key, resource, db):
+    if cacheable(db.info):
+        response_cache.set(key, resource)
+
+# Reads are served from response_cache; the DB session is only opened (and a
+# connection checked out) on a miss. Cached values are response models plus
+# their ETag/Last-Modified validators, so a revalidating client gets a 304
+# without the payload being serialized or the database being touched.
+async def cached_resource(key, schema, query, db, *args, **kwargs):
+    resource = cache_lookup(key, db)
+    if resource is MISSING:
+        result = await query(db, *args, **kwargs)
+        if isinstance(result, list):
+            resource = build_resource(rows_to_dicts(result, schema))
+        else:
+            resource = build_resource(row_to_dict(result, schema))
+        # Misses (e.g. unknown page names) are not cached
+        if resource is not None:
+            cache_store(key, resource, db)
+    return resource
+
+# Facet counts (per category, industry, media type) are hashed for their ETag
+async def cached_facets(key, query, db):
+    resource = cache_lookup(key, db)
+    if resource is MISSING:
+        resource = digest_resource(await query(db))
+        cache_store(key, resource, db)
+    return resource
+
+# ``category`` / ``industry`` filters take one value or a comma-separated list
+def filter_values(value: Optional[str]):
+    if value is None:
+        return None
+    values = tuple(sorted({part.strip() for part in value.split(",") if part.strip()}))
+    return values or None
@@ -0,0 +1,35 @@
+from fastapi import APIRouter, BackgroundTasks, Depends, Request, status
+from fastapi.responses import JSONResponse
+
+from .. import ingest
+from ..database import AnySession, get_db
+from ..ratelimit import client_ip, contact_limiter
+from ..schemas import ContactAcceptedResponse, ContactSubmissionCreate, ContactSubmissionResponse
+from .common import too_many_requests
+
+router = APIRouter()
+
+@router.post(
+    "/api/contact",
+    response_model=ContactSubmissionResponse,
+    responses={202: {"model": ContactAcceptedResponse, "description": "Accepted for batched storage (CONTACT_INGEST=spool|queue)"}},
+)
+async def submit_contact(
+    contact_data: ContactSubmissionCreate,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: AnySession = Depends(get_db),
+):
+    # Every submission counts, so a script can't flood the inbox
+    if await contact_limiter.hit(client_ip(request)) > contact_limiter.limit:
+        raise too_many_requests(contact_limiter, "Too many messages. Please try again later.")
+    receipt = await ingest.submit(db, contact_data)
+    if receipt.row is None:
+        return JSONResponse(
+            ContactAcceptedResponse(reference=receipt.reference).model_dump(), status_code=status.HTTP_202_ACCEPTED
+        )
+    if receipt.created:
+        # Listeners run after the response is sent
+        background_tasks.add_task(ingest.notify, [receipt.row])
+    # A resubmission returns the row stored the first time
+    return receipt.row
@@ -0,0 +1,80 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse
+from typing import List, Optional
+import os
+
+from .. import crud_async, media
+from ..cache import MISSING
+from ..database import AnySession, get_db
+from ..http_cache import PRIVATE_CACHE_CONTROL, build_resource, conditional_response
+from ..models import User
+from ..schemas import MediaItemResponse, MediaTypeCount
+from .common import cache_lookup, cache_store, cached_facets, get_current_user
+
+router = APIRouter()
+
+# Media library. Items list their variants as URLs and srcset strings; the
+# files themselves are content-addressed and never change, so
+# /api/media/files is served with an immutable Cache-Control.
+#
+# The library itself is for the admin: it lists every upload, documents
+# included, and a content-addressed key stays private only as long as
+# nothing publishes it. /api/media/files stays public for the image URLs
+# products and cases embed.
+@router.get("/api/media", response_model=List[MediaItemResponse])
+async def get_media_items(
+    request: Request,
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    type: Optional[str] = Query(None, pattern="^(image|document)$"),
+    current_user: User = Depends(get_current_user),
+    db: AnySession = Depends(get_db)
+):
+    key = ("media", "list", skip, limit, type)
+    resource = cache_lookup(key, db)
+    if resource is MISSING:
+        items = await crud_async.get_all_media_items(db, skip=skip, limit=limit, kind=type)
+        resource = build_resource([media.describe(item) for item in items])
+        cache_store(key, resource, db)
+    return conditional_response(request, response, resource, PRIVATE_CACHE_CONTROL)
+
+@router.get("/api/media/types", response_model=List[MediaTypeCount])
+async def get_media_types(
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    db: AnySession = Depends(get_db)
+):
+    resource = await cached_facets(("media", "types"), crud_async.get_media_types, db)
+    return conditional_response(request, response, resource, PRIVATE_CACHE_CONTROL)
+
+@router.get("/api/media/files/{key:path}")
+async def get_media_file(key: str):
+    try:
+        path = media.storage.path(key)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="File not found")
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="File not found")
+    # Already compressed formats; the CompressionMiddleware leaves them alone
+    return FileResponse(path, headers={"Cache-Control": media.IMMUTABLE_CACHE_CONTROL})
+
+@router.get("/api/media/{media_id}", response_model=MediaItemResponse)
+async def get_media_item(
+    media_id: int,
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    db: AnySession = Depends(get_db)
+):
+    key = ("media", "detail", media_id)
+    resource = cache_lookup(key, db)
+    if resource is MISSING:
+        item = await crud_async.get_media_item_by_id(db, media_id)
+        resource = build_resource(media.describe(item)) if item is not None else None
+        if resource is not None:
+            cache_store(key, resource, db)
+    if not resource:
+        raise HTTPException(status_code=404, detail="Media item not found")
+    return conditional_response(request, response, resource, PRIVATE_CACHE_CONTROL)
@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Optional
+
+from .. import crud_async
+from ..database import AnySession, get_read_db
+from ..schemas import SEARCH_TYPES, SearchResponse
+
+router = APIRouter()
+
+# Full-text search over active products, active cases and published pages.
+# ``type`` is a comma-separated subset of product,case,page; ``category``
+# narrows to products, ``industry`` to cases. Facet counts ignore the
+# category / industry filter so the UI can offer the other values.
+@router.get("/api/search", response_model=SearchResponse)
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    type: Optional[str] = None,
+    category: Optional[str] = None,
+    industry: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=50),
+    offset: int = Query(0, ge=0, le=500),
+    db: AnySession = Depends(get_read_db)
+):
+    types = SEARCH_TYPES
+    if type:
+        types = tuple(dict.fromkeys(name.strip() for name in type.split(",") if name.strip()))
+        unknown = [name for name in types if name not in SEARCH_TYPES]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown search types: {', '.join(unknown)}")
+    result = await crud_async.search(
+        db, q, types, category=category, industry=industry, limit=limit, offset=offset
+    )
+    return {"query": q, **result}
@@ -1,6 +1,16 @@
-from pydantic import BaseModel, EmailStr
+import pydantic
+from pydantic import ConfigDict, EmailStr, Field
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, List, Optional
+
+# Schemas are only turned into validators / serializers when first used (in
+# practice, when the router that declares them is mounted), so a cold start
+# builds the handful a request needs rather than all of them.
+class BaseModel(pydantic.BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
+# Upper bound on operations per bulk request
+BULK_MAX_ITEMS = 500
 
 # User schemas
 class UserBase(BaseModel):
@@ -28,6 +38,11 @@ class TokenResponse(BaseModel):
     access_token: str
     token_type: str
 
+class StreamTokenResponse(BaseModel):
+    # For GET /api/admin/events?token=; see api.auth.create_stream_token
+    token: str
+    expires_in: int
+
 # Page Content schemas
 class PageContentBase(BaseModel):
     page_name: str
@@ -47,8 +62,17 @@ class PageContentUpdate(BaseModel):
     meta_keywords: Optional[str] = None
     is_published: Optional[bool] = None
 
+class PageContentBulkUpdate(PageContentUpdate):
+    id: int
+
+class PageContentBulkRequest(BaseModel):
+    create: List[PageContentCreate] = Field(default_factory=list, max_length=BULK_MAX_ITEMS)
+    update: List[PageContentBulkUpdate] = Field(default_factory=list, max_length=BULK_MAX_ITEMS)
+    delete: List[int] = Field(default_factory=list, max_length=BULK_MAX_ITEMS)
+
 class PageContentResponse(PageContentBase):
     id: int
+    version: int
     created_at: datetime
     updated_at: Optional[datetime]
     
@@ -79,8 +103,17 @@ class ProductUpdate(BaseModel):
     is_active: Optional[bool] = None
     sort_order: Optional[int] = None
 
+class ProductBulkUpdate(ProductUpdate):
+    id: int
+
+class ProductBulkRequest(BaseModel):
+    create: List[ProductCreate] = Field(default_factory=list, max_length=BULK_MAX_ITEMS)
+    update: List[ProductBulkUpdate] = Field(default_factory=list, max_length=BULK_MAX_ITEMS)
+    delete: List[int] = Field(default_factory=list, max_length=BULK_MAX_ITEMS)
+
 class ProductResponse(ProductBase):
     id: int
+    version: int
     created_at: datetime
     updated_at: Optional[datetime]
     
@@ -99,6 +132,11 @@ class ContactSubmissionBase(BaseModel):
 class ContactSubmissionCreate(ContactSubmissionBase):
     pass
 
+class ContactAcceptedResponse(BaseModel):
+    # 202 from POST /api/contact when CONTACT_INGEST is spool or queue
+    status: str = "queued"
+    reference: str
+
 class ContactSubmissionResponse(ContactSubmissionBase):
     id: int
     is_read: bool
@@ -129,10 +167,131 @@ class ApplicationCaseUpdate(BaseModel):
     is_active: Optional[bool] = None
     sort_order: Optional[int] = None
 
+class ApplicationCaseBulkUpdate(ApplicationCaseUpdate):
+    id: int
+
+class ApplicationCaseBulkRequest(BaseModel):
+    create: List[ApplicationCaseCreate] = Field(default_factory=list, max_length=BULK_MAX_ITEMS)
+    update: List[ApplicationCaseBulkUpdate] = Field(default_factory=list, max_length=BULK_MAX_ITEMS)
+    delete: List[int] = Field(default_factory=list, max_length=BULK_MAX_ITEMS)
+
 class ApplicationCaseResponse(ApplicationCaseBase):
     id: int
+    version: int
     created_at: datetime
     updated_at: Optional[datetime]
     
     class Config:
         from_attributes = True
+
+# Media schemas (rows are rendered by api.media.describe)
+class MediaVariant(BaseModel):
+    width: int
+    height: int
+    format: str
+    key: str
+    size: int
+    url: str
+
+class MediaItemResponse(BaseModel):
+    id: int
+    filename: str
+    original_filename: str
+    mime_type: Optional[str]
+    file_size: Optional[int]
+    alt_text: Optional[str]
+    width: Optional[int]
+    height: Optional[int]
+    content_hash: Optional[str]
+    # The uploaded original
+    url: str
+    # Display-size WebP; what Product / ApplicationCase image_url should point at
+    image_url: Optional[str]
+    # format ("webp", "jpeg", "png") -> srcset attribute value
+    srcset: Dict[str, str]
+    variants: List[MediaVariant]
+    created_at: datetime
+    updated_at: Optional[datetime]
+
+class MediaItemUpdate(BaseModel):
+    alt_text: Optional[str] = None
+
+class MediaTypeCount(BaseModel):
+    mime_type: Optional[str]
+    count: int
+
+# Catalog facet schemas
+class FacetValue(BaseModel):
+    value: Optional[str]
+    count: int
+    featured: int
+
+class ProductFacetsResponse(BaseModel):
+    total: int
+    featured: int
+    categories: List[FacetValue]
+
+class CaseFacetsResponse(BaseModel):
+    total: int
+    featured: int
+    industries: List[FacetValue]
+
+# Bulk operation schemas
+class ReorderItem(BaseModel):
+    id: int
+    sort_order: int
+
+class ReorderRequest(BaseModel):
+    items: List[ReorderItem] = Field(max_length=BULK_MAX_ITEMS)
+
+class BulkItemResult(BaseModel):
+    op: str
+    index: int
+    id: Optional[int] = None
+    status: str
+
+class BulkResponse(BaseModel):
+    results: List[BulkItemResult]
+
+# Page bootstrap schemas
+# Products and cases carry only the fields asked for (see PRODUCT_SUMMARY_FIELDS)
+PRODUCT_SUMMARY_FIELDS = ("id", "name", "short_description", "category", "image_url", "is_featured", "sort_order")
+CASE_SUMMARY_FIELDS = ("id", "title", "industry", "image_url", "is_featured", "sort_order")
+
+class PageBootstrapResponse(BaseModel):
+    page_name: str
+    content: Optional[PageContentResponse] = None
+    products: List[Dict[str, Any]]
+    cases: List[Dict[str, Any]]
+
+    @classmethod
+    def from_result(cls, page_name: str, result: dict, product_fields, case_fields) -> "PageBootstrapResponse":
+        """Build the payload from crud.get_page_bootstrap output."""
+        content = result["content"]
+        return cls(
+            page_name=page_name,
+            content=PageContentResponse.model_validate(content) if content is not None else None,
+            products=[{field: row[field] for field in product_fields} for row in result["products"]],
+            cases=[{field: row[field] for field in case_fields} for row in result["cases"]],
+        )
+
+# Search schemas
+SEARCH_TYPES = ("product", "case", "page")
+
+class SearchHit(BaseModel):
+    type: str
+    id: int
+    title: str
+    # HTML-escaped text with the matched terms wrapped in <mark>
+    snippet: str
+    rank: float
+    category: Optional[str] = None
+    industry: Optional[str] = None
+    page_name: Optional[str] = None
+
+class SearchResponse(BaseModel):
+    query: str
+    total: int
+    results: List[SearchHit]
+    # facet name ("type", "category", "industry") -> value -> matching documents
+    facets: Dict[str, Dict[str, int]]
@@ -0,0 +1,485 @@
+import bisect
+import heapq
+import html
+import math
+import operator
+import re
+import threading
+import time
+from collections import Counter, namedtuple
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import func, inspect, literal_column, select
+
+from .config import settings
+from .events import on_change
+from .models import ApplicationCase, PageContent, Product
+
+# Full-text search over products, application cases and published pages.
+#
+# On Postgres every searchable table has a ``search_vector`` tsvector column
+# (migration 0007). It is a generated column, so the database keeps it in
+# step with every insert and update, and a GIN index serves the match.
+# Ranking is ts_rank_cd, highlighting is ts_headline on the page of hits only.
+#
+# SQLite (local development, the perf scripts) has no tsvector, so an
+# in-memory inverted index stands in: one segment per table, built on the
+# first search. After admin writes (api.events), or every
+# SEARCH_INDEX_TTL_SECONDS so that edits made on other instances show up,
+# the segment compares row versions and re-indexes only the changed rows.
+# The first build reads the whole table (~20 s per 100k rows); production
+# search belongs on Postgres.
+#
+# Both backends return the same shape: hits ranked best first, a highlighted
+# snippet with matches in <mark> (the rest HTML-escaped), and facet counts.
+# The last query term matches as a prefix so the box can search as you type.
+
+SEARCH_BACKEND = settings.search_backend  # auto | postgres | memory
+INDEX_TTL_SECONDS = settings.search_index_ttl_seconds
+# Must match the configuration the generated columns in migration 0007 use
+TEXT_CONFIG = "english"
+MAX_TERMS = 8
+MAX_PREFIX_EXPANSIONS = 64
+# In-memory index: when a query matches more documents than this per term,
+# only each term's highest-weighted postings are scored (see _Segment.search)
+CANDIDATES_PER_TERM = 1000
+
+Source = namedtuple("Source", "model namespace title fields snippet facet visible")
+
+# Field weights follow the tsvector weights of migration 0007 (A=3, B=2, C=1)
+SOURCES = {
+    "product": Source(
+        Product, "products", "name",
+        (("name", 3.0), ("category", 2.0), ("short_description", 2.0), ("description", 1.0)),
+        ("short_description", "description"), "category", Product.is_active,
+    ),
+    "case": Source(
+        ApplicationCase, "cases", "title",
+        (("title", 3.0), ("industry", 2.0), ("description", 1.0)),
+        ("description",), "industry", ApplicationCase.is_active,
+    ),
+    "page": Source(
+        PageContent, "content", "title",
+        (("title", 3.0), ("meta_description", 2.0), ("meta_keywords", 2.0), ("content", 1.0)),
+        ("meta_description", "content"), None, PageContent.is_published,
+    ),
+}
+
+_TOKEN = re.compile(r"\w+")
+_TAG = re.compile(r"<[^>]+>")
+_SPACE = re.compile(r"\s+")
+# Roughly what Postgres' english configuration drops
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with".split()
+)
+# Highlight markers that cannot occur in stored text
+START_SEL, STOP_SEL = "\ue000", "\ue001"
+SNIPPET_WORDS = 30
+
+
+def _normalize(token: str) -> str:
+    # Light plural folding, enough for "valves" to find "valve"
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+
+def query_terms(q: str) -> List[str]:
+    terms = [token for token in _TOKEN.findall(q.lower()) if token not in STOPWORDS]
+    return terms[:MAX_TERMS]
+
+
+def _mark_up(text: str) -> str:
+    # Escape everything, then turn the markers into <mark>
+    return html.escape(text).replace(START_SEL, "<mark>").replace(STOP_SEL, "</mark>")
+
+
+def _plain(text: str) -> str:
+    # Page content may hold markup; snippets are plain text
+    return _SPACE.sub(" ", _TAG.sub(" ", text)).strip()
+
+
+def _snippet_source(row, source: Source) -> str:
+    return _plain(" ".join(row[field] for field in source.snippet if row.get(field)))
+
+
+def _visible_types(types: Iterable[str], category: Optional[str], industry: Optional[str]) -> List[str]:
+    # A category filter narrows the search to products, an industry filter
+    # to cases; with both, products of that category and cases of that industry
+    types = [name for name in SOURCES if name in set(types)]
+    if category or industry:
+        types = [name for name in types if (name == "product" and category) or (name == "case" and industry)]
+    return types
+
+
+def _facet_filter(source: Source, category: Optional[str], industry: Optional[str]) -> Optional[str]:
+    return {"category": category, "industry": industry}.get(source.facet)
+
+
+def _hit(kind: str, source: Source, row_id: int, title: str, facet_value, rank: float, snippet: str, page_name=None) -> dict:
+    hit = {"type": kind, "id": row_id, "title": title, "snippet": snippet, "rank": round(rank, 6)}
+    if source.facet:
+        hit[source.facet] = facet_value
+    if page_name is not None:
+        hit["page_name"] = page_name
+    return hit
+
+
+# Postgres
+
+def _tsquery(terms: List[str]):
+    # Terms are \w+ only, so they are safe inside to_tsquery syntax
+    return func.to_tsquery(TEXT_CONFIG, " & ".join(terms[:-1] + [terms[-1] + ":*"]))
+
+
+HEADLINE_OPTIONS = f"StartSel={START_SEL}, StopSel={STOP_SEL}, MaxWords={SNIPPET_WORDS}, MinWords=15, MaxFragments=1"
+
+
+def _search_postgres(db, kind: str, terms, facet_filter, limit: int):
+    source = SOURCES[kind]
+    model = source.model
+    vector = literal_column("search_vector")
+    tsquery = _tsquery(terms)
+    matches = [source.visible, vector.op("@@")(tsquery)]
+
+    facet_column = getattr(model, source.facet) if source.facet else None
+    if facet_column is not None:
+        facets = {value: count for value, count in db.execute(
+            select(facet_column, func.count()).where(*matches).group_by(facet_column)
+        ).all()}
+        total = facets.get(facet_filter, 0) if facet_filter else sum(facets.values())
+    else:
+        facets = None
+        total = db.execute(select(func.count()).select_from(model).where(*matches)).scalar()
+    if facet_filter:
+        matches.append(facet_column == facet_filter)
+
+    extra = [model.page_name] if kind == "page" else []
+    rank = func.ts_rank_cd(vector, tsquery).label("rank")
+    top = (
+        select(model.id, getattr(model, source.title).label("title"), rank, *extra,
+               *([facet_column.label("facet")] if facet_column is not None else []),
+               *[getattr(model, field) for field in source.snippet])
+        .where(*matches)
+        .order_by(rank.desc(), model.id)
+        .limit(limit)
+        .subquery()
+    )
+    # ts_headline re-parses the document, so it only runs on the page of hits
+    text = func.coalesce(top.c[source.snippet[0]], "")
+    for field in source.snippet[1:]:
+        text = text.op("||")(" ").op("||")(func.coalesce(top.c[field], ""))
+    rows = db.execute(
+        select(top, func.ts_headline(TEXT_CONFIG, text, tsquery, HEADLINE_OPTIONS).label("headline"))
+        .order_by(top.c.rank.desc(), top.c.id)
+    ).mappings().all()
+    hits = [
+        _hit(kind, source, row["id"], row["title"], row.get("facet"), row["rank"],
+             _mark_up(_plain(row["headline"])), row.get("page_name"))
+        for row in rows
+    ]
+    return total, facets, hits
+
+
+# In-memory fallback
+
+def _field_weights(row, source: Source) -> Counter:
+    weights = Counter()
+    for field, weight in source.fields:
+        value = row[field]
+        if value:
+            for token, count in Counter(_TOKEN.findall(_TAG.sub(" ", value).lower())).items():
+                if token not in STOPWORDS:
+                    weights[_normalize(token)] += weight * count
+    return weights
+
+
+class _Segment:
+    """Inverted index over one table.
+
+    ``postings`` maps a term to {row id: saturated field-weighted tf}; idf
+    is applied at query time so it follows the document count. Rows carry
+    their ``version``, so a refresh only re-reads rows that changed.
+    """
+
+    def __init__(self, source: Source):
+        self.source = source
+        self.postings: Dict[str, Dict[int, float]] = {}
+        self.terms: List[str] = []
+        self.versions: Dict[int, int] = {}
+        self.doc_terms: Dict[int, tuple] = {}
+        self.docs: Dict[int, tuple] = {}
+        self.facet_docs: Dict[str, set] = {}
+        self._ranked: Dict[str, List[int]] = {}
+        self.checked_at = None
+        self.refreshing = False
+        # Guards the in-memory index; never held across a query
+        self.lock = threading.Lock()
+
+    def stale(self) -> bool:
+        return self.checked_at is None or time.monotonic() - self.checked_at > INDEX_TTL_SECONDS
+
+    def invalidate(self) -> None:
+        self.checked_at = None
+
+    def _remove(self, row_id: int) -> None:
+        for term in self.doc_terms.pop(row_id, ()):
+            postings = self.postings[term]
+            del postings[row_id]
+            if not postings:
+                del self.postings[term]
+        title, facet_value, page_name = self.docs.pop(row_id)
+        if facet_value is not None:
+            self.facet_docs[facet_value].discard(row_id)
+        del self.versions[row_id]
+
+    def _add(self, row) -> None:
+        source = self.source
+        row_id = row["id"]
+        weights = _field_weights(row, source)
+        for term, weight in weights.items():
+            self.postings.setdefault(term, {})[row_id] = weight / (weight + 1.2)
+        self.doc_terms[row_id] = tuple(weights)
+        facet_value = row[source.facet] if source.facet else None
+        if facet_value is not None:
+            self.facet_docs.setdefault(facet_value, set()).add(row_id)
+        self.docs[row_id] = (row[source.title], facet_value, row.get("page_name"))
+        self.versions[row_id] = row["version"]
+
+    def refresh(self, db) -> None:
+        # The queries run without the lock: with an AsyncSession this runs
+        # in a greenlet on the event loop thread, which is handed back to
+        # the loop during each query, and a search waiting on a held
+        # threading.Lock there would block the loop for good. Only the
+        # in-memory update below takes the lock.
+        source = self.source
+        model = source.model
+        with self.lock:
+            if self.refreshing and self.checked_at is not None:
+                return  # searches use the current index meanwhile
+            self.refreshing = True
+            versions = dict(self.versions)
+        try:
+            current = dict(db.execute(select(model.id, model.version).where(source.visible)).all())
+            changed = [row_id for row_id, version in current.items() if versions.get(row_id) != version]
+            rows = []
+            if changed:
+                names = {field for field, _ in source.fields} | {source.title} | ({source.facet} if source.facet else set())
+                if model is PageContent:
+                    names.add("page_name")
+                columns = [model.id, model.version, *[getattr(model, name) for name in sorted(names)]]
+                # A first build reads the whole table; later refreshes only what changed
+                if len(changed) == len(current):
+                    rows = db.execute(select(*columns).where(source.visible)).mappings().all()
+                else:
+                    rows = [
+                        row for start in range(0, len(changed), 500)
+                        for row in db.execute(select(*columns).where(model.id.in_(changed[start:start + 500]))).mappings()
+                    ]
+            with self.lock:
+                self._apply(current, rows)
+        finally:
+            with self.lock:
+                self.refreshing = False
+
+    def _apply(self, current: Dict[int, int], rows) -> None:
+        # Deleted, hidden or edited since the last refresh
+        for row_id in [row_id for row_id, version in self.versions.items() if current.get(row_id) != version]:
+            self._remove(row_id)
+        for row in rows:
+            if self.versions.get(row["id"]) == row["version"]:
+                continue  # applied by a concurrent refresh
+            if row["id"] in self.versions:
+                self._remove(row["id"])
+            self._add(row)
+        self.terms = sorted(self.postings)
+        self._ranked = {}
+        self.checked_at = time.monotonic()
+
+    def _top_postings(self, term: str) -> List[int]:
+        ranked = self._ranked.get(term)
+        if ranked is None:
+            postings = self.postings[term]
+            ranked = self._ranked[term] = heapq.nlargest(CANDIDATES_PER_TERM, postings, key=postings.__getitem__)
+        return ranked
+
+    def _expand(self, prefix: str):
+        # Last term as a prefix: union of the postings of every term it starts
+        start = bisect.bisect_left(self.terms, prefix)
+        expansions = [term for term in self.terms[start:start + MAX_PREFIX_EXPANSIONS] if term.startswith(prefix)]
+        folded = _normalize(prefix)
+        # A complete plural ("valves") still finds the folded term
+        if folded != prefix and folded in self.postings:
+            expansions.append(folded)
+        if len(expansions) <= 1:
+            return (self.postings[expansions[0]] if expansions else {}), expansions
+        merged: Dict[int, float] = {}
+        for term in expansions:
+            for row_id, weight in self.postings[term].items():
+                if weight > merged.get(row_id, 0.0):
+                    merged[row_id] = weight
+        return merged, expansions
+
+    def search(self, terms: List[str], facet_filter, limit: int):
+        sources = [[_normalize(term)] for term in terms[:-1]]
+        lists = [self.postings.get(term[0], {}) for term in sources]
+        merged, expansions = self._expand(terms[-1])
+        lists.append(merged)
+        sources.append(expansions)
+        by_size = sorted(lists, key=len)
+        matched = set(by_size[0])
+        for postings in by_size[1:]:
+            if not matched:
+                break
+            matched.intersection_update(postings)
+
+        facets = None
+        if self.source.facet:
+            # A handful of facet values: one set intersection each
+            facets = {value: len(matched & docs) for value, docs in self.facet_docs.items() if docs}
+            facets = {value: count for value, count in facets.items() if count}
+            if facet_filter:
+                matched &= self.facet_docs.get(facet_filter, set())
+        total = len(matched)
+        if not matched:
+            return total, facets, []
+
+        # Broad queries (common words) match most of the table. Scoring every
+        # match would cost ~1us each, so only documents among some term's
+        # highest-weighted postings are ranked; the count and facets stay exact
+        ids = matched
+        if len(matched) > CANDIDATES_PER_TERM * len(lists):
+            candidates = set()
+            for term_sources in sources:
+                for term in term_sources:
+                    if term in self.postings:
+                        candidates.update(self._top_postings(term))
+            candidates &= matched
+            if len(candidates) >= limit:
+                ids = candidates
+        ids = list(ids)
+
+        # BM25-style: idf times the saturated term weight, summed with
+        # map() so the per-document work stays in C
+        count = len(self.docs)
+        scores = None
+        for postings in lists:
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            term_scores = map(idf.__mul__, map(postings.__getitem__, ids))
+            scores = list(term_scores) if scores is None else list(map(operator.add, scores, term_scores))
+        top = heapq.nlargest(limit, zip(scores, map(operator.neg, ids)))
+        return total, facets, [(score, -negated) for score, negated in top]
+
+
+_segments = {kind: _Segment(source) for kind, source in SOURCES.items()}
+_namespaces = {source.namespace: _segments[kind] for kind, source in SOURCES.items()}
+
+
+@on_change
+def _invalidate_segment(namespace: str) -> None:
+    segment = _namespaces.get(namespace)
+    if segment is not None:
+        segment.invalidate()
+
+
+def _highlight(text: str, terms: List[str]) -> str:
+    exact = {_normalize(term) for term in terms[:-1]}
+    prefix = terms[-1]
+    tokens = list(_TOKEN.finditer(text))
+
+    def matches(token: str) -> bool:
+        token = token.lower()
+        return token.startswith(prefix) or _normalize(token) in exact
+
+    first = next((index for index, token in enumerate(tokens) if matches(token.group())), 0)
+    start = max(0, first - SNIPPET_WORDS // 3)
+    window = tokens[start:start + SNIPPET_WORDS]
+    if not window:
+        return ""
+    parts = ["…" if start > 0 else ""]
+    cursor = window[0].start()
+    for token in window:
+        parts.append(text[cursor:token.start()])
+        parts.append(START_SEL + token.group() + STOP_SEL if matches(token.group()) else token.group())
+        cursor = token.end()
+    if start + SNIPPET_WORDS < len(tokens):
+        parts.append(" …")
+    return _mark_up("".join(parts))
+
+
+def _search_memory(db, kind: str, terms, facet_filter, limit: int):
+    segment = _segments[kind]
+    source = segment.source
+    if segment.stale():
+        segment.refresh(db)
+    with segment.lock:
+        total, facets, scored = segment.search(terms, facet_filter, limit)
+        hits = [_hit(kind, source, row_id, *segment.docs[row_id][:2], score, None, segment.docs[row_id][2])
+                for score, row_id in scored]
+    return total, facets, hits
+
+
+def _attach_snippets(db, hits: List[dict], terms: List[str]) -> None:
+    # The index only keeps terms, so snippets are read back from the rows,
+    # for the returned page of hits only
+    for kind, source in SOURCES.items():
+        wanted = {hit["id"]: hit for hit in hits if hit["type"] == kind}
+        if not wanted:
+            continue
+        model = source.model
+        for row in db.execute(
+            select(model.id, *[getattr(model, field) for field in source.snippet]).where(model.id.in_(wanted))
+        ).mappings():
+            wanted[row["id"]]["snippet"] = _highlight(_snippet_source(row, source), terms)
+    for hit in hits:
+        if hit["snippet"] is None:
+            hit["snippet"] = ""
+
+
+_postgres_ready: Optional[bool] = None
+
+
+def _use_postgres(db) -> bool:
+    global _postgres_ready
+    if SEARCH_BACKEND in ("memory", "postgres"):
+        return SEARCH_BACKEND == "postgres"
+    if _postgres_ready is None:
+        connection = db.connection()
+        _postgres_ready = connection.dialect.name == "postgresql" and any(
+            column["name"] == "search_vector" for column in inspect(connection).get_columns("products")
+        )
+    return _postgres_ready
+
+
+def backend_name(db) -> str:
+    return "postgres" if _use_postgres(db) else "memory"
+
+
+def search(db, q: str, types: Iterable[str] = tuple(SOURCES), category: Optional[str] = None,
+           industry: Optional[str] = None, limit: int = 20, offset: int = 0) -> dict:
+    """Ranked hits for ``q`` plus type/category/industry facet counts."""
+    terms = query_terms(q)
+    result = {"total": 0, "results": [], "facets": {"type": {}, "category": {}, "industry": {}}}
+    if not terms:
+        return result
+    postgres = _use_postgres(db)
+    run = _search_postgres if postgres else _search_memory
+    hits = []
+    for kind in _visible_types(types, category, industry):
+        source = SOURCES[kind]
+        total, facets, kind_hits = run(db, kind, terms, _facet_filter(source, category, industry), offset + limit)
+        result["facets"]["type"][kind] = total
+        result["total"] += total
+        if facets:
+            result["facets"][source.facet] = {
+                value: count for value, count in sorted(facets.items(), key=lambda item: (-item[1], str(item[0])))
+                if value is not None
+            }
+        hits.extend(kind_hits)
+    hits.sort(key=lambda hit: (-hit["rank"], hit["type"], hit["id"]))
+    result["results"] = hits[offset:offset + limit]
+    if not postgres:
+        _attach_snippets(db, result["results"], terms)
+    return result
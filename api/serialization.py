@@ -0,0 +1,52 @@
+import functools
+import json
+from datetime import date, datetime
+from typing import Any, Iterable, List, Optional
+
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # stdlib json fallback
+    orjson = None
+
+# Fast path for public read payloads. Rows straight from the database are
+# trusted: instead of validating each ORM object into a response model and
+# then encoding the model, the declared response fields are copied into
+# plain dicts and encoded once with orjson. The output matches what the
+# response models would produce (datetimes as ISO 8601, UTC as "Z").
+
+
+@functools.lru_cache(maxsize=None)
+def response_fields(schema) -> tuple:
+    return tuple(schema.model_fields)
+
+
+def row_to_dict(row, schema) -> Optional[dict]:
+    if row is None:
+        return None
+    return {field: getattr(row, field) for field in response_fields(schema)}
+
+
+def rows_to_dicts(rows: Iterable, schema) -> List[dict]:
+    fields = response_fields(schema)
+    return [{field: getattr(row, field) for field in fields} for row in rows]
+
+
+def _default(value: Any):
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def _json_default(value: Any):
+    if isinstance(value, (datetime, date)):
+        text = value.isoformat()
+        return text[:-6] + "Z" if text.endswith("+00:00") else text
+    return _default(value)
+
+
+def dumps(data: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data, default=_default, option=orjson.OPT_UTC_Z)
+    return json.dumps(data, default=_json_default, separators=(",", ":")).encode()
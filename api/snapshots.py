@@ -0,0 +1,223 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import urllib.request
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional, Set
+
+from . import crud
+from .config import settings
+from .database import SessionLocal
+from .events import on_change
+from .schemas import (
+    CASE_SUMMARY_FIELDS,
+    PRODUCT_SUMMARY_FIELDS,
+    ApplicationCaseResponse,
+    PageBootstrapResponse,
+    PageContentResponse,
+    ProductResponse,
+)
+from .serialization import dumps, row_to_dict, rows_to_dicts
+
+logger = logging.getLogger(__name__)
+
+# Static snapshots of the published catalog.
+#
+# `python -m api.manage publish` renders what the public GET endpoints return
+# into JSON files under SNAPSHOT_DIR (default frontend/snapshots), which
+# Vercel serves as static assets. File names carry a hash of their contents
+# (products.3f9a1c2b7d40.json) so they can be cached forever; manifest.json
+# maps the API path each file stands in for ("/products", "/content/home") to
+# its current file and is the only thing clients revalidate.
+# frontend/js/api.js reads the manifest first and falls back to the API for
+# anything that is not in it.
+#
+# Publishing is incremental: only the groups that depend on the changed
+# tables are rendered again, and a file is only written when its contents
+# changed.
+
+API_DIR = os.path.dirname(os.path.abspath(__file__))
+SNAPSHOT_DIR = settings.snapshot_dir or os.path.join(os.path.dirname(API_DIR), "frontend", "snapshots")
+MANIFEST_FILE = "manifest.json"
+MANIFEST_FORMAT = 1
+
+# Table namespace (as emitted by api.crud) -> snapshot groups built from it
+GROUPS_BY_NAMESPACE = {
+    "content": ("content", "bootstrap"),
+    "products": ("products", "bootstrap"),
+    "cases": ("cases", "bootstrap"),
+}
+ALL_GROUPS = ("content", "products", "cases", "bootstrap")
+
+
+def _render_group(db, group: str):
+    """Yield (api_path, file_stem, body) for every snapshot in ``group``.
+
+    Bodies use the API's own encoder, so a snapshot is byte-for-byte what
+    the endpoint it stands in for returns.
+    """
+    if group == "content":
+        for page in crud.get_all_page_content(db, limit=None):
+            if page.is_published:
+                yield f"/content/{page.page_name}", f"content/{page.page_name}", dumps(row_to_dict(page, PageContentResponse))
+    elif group == "products":
+        # Same rows as the API's default page (GET /api/products)
+        products = rows_to_dicts(crud.get_all_products(db), ProductResponse)
+        yield "/products", "products", dumps(products)
+        for product in products:
+            yield f"/products/{product['id']}", f"products/{product['id']}", dumps(product)
+    elif group == "cases":
+        cases = rows_to_dicts(crud.get_all_application_cases(db), ApplicationCaseResponse)
+        yield "/cases", "cases", dumps(cases)
+    elif group == "bootstrap":
+        for page in crud.get_all_page_content(db, limit=None):
+            if page.is_published:
+                result = crud.get_page_bootstrap(db, page.page_name, PRODUCT_SUMMARY_FIELDS, CASE_SUMMARY_FIELDS)
+                payload = PageBootstrapResponse.from_result(page.page_name, result, PRODUCT_SUMMARY_FIELDS, CASE_SUMMARY_FIELDS)
+                yield f"/bootstrap/{page.page_name}", f"bootstrap/{page.page_name}", dumps(payload)
+    else:
+        raise ValueError(f"Unknown snapshot group {group!r}")
+
+
+def _safe_stem(stem: str) -> str:
+    # Page names come from the admin UI; keep them inside SNAPSHOT_DIR
+    return "/".join(
+        "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in part) for part in stem.split("/")
+    )
+
+
+def read_manifest(directory: str = SNAPSHOT_DIR) -> dict:
+    try:
+        with open(os.path.join(directory, MANIFEST_FILE)) as fh:
+            manifest = json.load(fh)
+    except (OSError, ValueError):
+        return {"format": MANIFEST_FORMAT, "files": {}}
+    if manifest.get("format") != MANIFEST_FORMAT:
+        return {"format": MANIFEST_FORMAT, "files": {}}
+    return manifest
+
+
+def _write_atomic(path: str, body: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(body)
+    os.replace(tmp, path)
+
+
+def _prune(directory: str, keep: Set[str]) -> int:
+    removed = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            relative = os.path.relpath(os.path.join(root, name), directory).replace(os.sep, "/")
+            if relative != MANIFEST_FILE and relative not in keep:
+                os.remove(os.path.join(root, name))
+                removed += 1
+    return removed
+
+
+def publish(namespaces: Optional[Iterable[str]] = None, directory: str = SNAPSHOT_DIR, db=None) -> dict:
+    """Regenerate the snapshots that depend on ``namespaces`` (all if None)."""
+    if namespaces is None:
+        groups = set(ALL_GROUPS)
+    else:
+        groups = {group for namespace in namespaces for group in GROUPS_BY_NAMESPACE.get(namespace, ())}
+    previous = read_manifest(directory)
+    # Entries of groups that are not being rebuilt carry over unchanged
+    files: Dict[str, dict] = {
+        path: entry for path, entry in previous["files"].items() if entry.get("group") not in groups
+    }
+    written = unchanged = 0
+    own_session = db is None
+    db = SessionLocal() if own_session else db
+    try:
+        for group in sorted(groups):
+            for api_path, stem, body in _render_group(db, group):
+                name = f"{_safe_stem(stem)}.{hashlib.sha256(body).hexdigest()[:12]}.json"
+                target = os.path.join(directory, *name.split("/"))
+                if os.path.exists(target):
+                    unchanged += 1
+                else:
+                    _write_atomic(target, body)
+                    written += 1
+                files[api_path] = {"file": name, "group": group}
+    finally:
+        if own_session:
+            db.close()
+
+    manifest = {
+        "format": MANIFEST_FORMAT,
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "files": dict(sorted(files.items())),
+    }
+    _write_atomic(os.path.join(directory, MANIFEST_FILE), json.dumps(manifest, indent=1).encode())
+    # Keep the previous generation too: a client may have loaded the old
+    # manifest a moment ago
+    keep = {entry["file"] for entry in files.values()} | {entry["file"] for entry in previous["files"].values()}
+    removed = _prune(directory, keep)
+    return {"groups": sorted(groups), "written": written, "unchanged": unchanged, "removed": removed}
+
+
+# Republishing after admin writes (SNAPSHOT_AUTO_PUBLISH):
+#   off     - snapshots only change when `python -m api.manage publish` runs (default)
+#   local   - regenerate the affected snapshots in-process; for hosts where
+#             SNAPSHOT_DIR is the served directory (self-hosted, `vercel dev`)
+#   webhook - POST the changed namespaces to SNAPSHOT_WEBHOOK_URL, e.g. a CI
+#             job that runs the publish command and redeploys
+# Writes are coalesced for SNAPSHOT_DEBOUNCE_SECONDS so a bulk edit triggers
+# one publish. The work runs on a timer thread, never in the request.
+AUTO_PUBLISH = settings.snapshot_auto_publish
+WEBHOOK_URL = settings.snapshot_webhook_url
+DEBOUNCE_SECONDS = settings.snapshot_debounce_seconds
+
+
+class _DebouncedPublisher:
+    def __init__(self, mode: str, delay: float):
+        self.mode = mode
+        self.delay = delay
+        self._pending: Set[str] = set()
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+
+    def __call__(self, namespace: str) -> None:
+        if namespace not in GROUPS_BY_NAMESPACE:
+            return
+        with self._lock:
+            self._pending.add(namespace)
+            if self._timer is None:
+                self._timer = threading.Timer(self.delay, self._flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _flush(self) -> None:
+        with self._lock:
+            namespaces, self._pending = self._pending, set()
+            self._timer = None
+        try:
+            if self.mode == "local":
+                summary = publish(namespaces)
+                logger.info("Republished snapshots for %s: %s", sorted(namespaces), summary)
+            elif self.mode == "webhook":
+                body = json.dumps({"namespaces": sorted(namespaces)}).encode()
+                request = urllib.request.Request(
+                    WEBHOOK_URL, data=body, method="POST", headers={"Content-Type": "application/json"}
+                )
+                urllib.request.urlopen(request, timeout=10).close()
+        except Exception:
+            logger.exception("Snapshot republish for %s failed", sorted(namespaces))
+
+
+_publisher: Optional[_DebouncedPublisher] = None
+
+
+def install_auto_publish() -> bool:
+    """Subscribe to admin writes according to SNAPSHOT_AUTO_PUBLISH."""
+    global _publisher
+    if AUTO_PUBLISH == "off" or _publisher is not None:
+        return _publisher is not None
+    if AUTO_PUBLISH == "webhook" and not WEBHOOK_URL:
+        raise RuntimeError("SNAPSHOT_AUTO_PUBLISH=webhook needs SNAPSHOT_WEBHOOK_URL")
+    _publisher = on_change(_DebouncedPublisher(AUTO_PUBLISH, DEBOUNCE_SECONDS))
+    return True
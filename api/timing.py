@@ -0,0 +1,241 @@
+import json
+import logging
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import settings
+from .metrics import LatencyStats
+
+# Per-request timing, split by phase.
+#
+# TimingMiddleware puts a RequestTimings object in a context variable for the
+# duration of each request. Code anywhere below it adds to that object:
+# database.py's engine events (query count and time, connection checkout),
+# http_cache (serialization) and compression. Context variables follow the
+# request into the threadpool (anyio copies the context) and into
+# SQLAlchemy's async greenlets (which inherit the parent's gr_context), and
+# since every copy points at the same object, all the phases land on it.
+#
+# Each response gets a Server-Timing header, per-route histograms feed
+# /api/admin/metrics, and slow or query-heavy requests are logged as JSON.
+#
+# A streamed response (the body sent in more than one message: the SSE change
+# feed, the CSV export, file downloads) stays open as long as the client
+# reads, so for those the histograms and the slow log use the time to the
+# first body chunk instead of the whole duration.
+
+PROCESS_STARTED = time.perf_counter()
+
+SERVER_TIMING_ENABLED = settings.server_timing
+# all - one JSON line per request; slow - only slow / query-heavy requests; off
+REQUEST_LOG = settings.request_log
+SLOW_REQUEST_MS = settings.slow_request_ms
+# More statements than this in one request, or one statement repeated this
+# often, is reported as a likely N+1
+QUERY_WARN_THRESHOLD = settings.query_warn_threshold
+
+logger = logging.getLogger("api.requests")
+if not logger.handlers:
+    # Plain JSON lines on stdout, which is what Vercel's log drain collects
+    _handler = logging.StreamHandler(sys.stdout)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+class RequestTimings:
+    __slots__ = ("started", "phases", "queries", "query_ms", "statements", "cold_start_ms", "first_byte_ms")
+
+    def __init__(self, cold_start_ms: Optional[float] = None):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.queries = 0
+        self.query_ms = 0.0
+        self.statements: Counter = Counter()
+        self.cold_start_ms = cold_start_ms
+        # Set when the body is streamed
+        self.first_byte_ms: Optional[float] = None
+
+    def add(self, phase: str, ms: float) -> None:
+        self.phases[phase] = self.phases.get(phase, 0.0) + ms
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def most_repeated(self):
+        return self.statements.most_common(1)[0] if self.statements else (None, 0)
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    return _current.get()
+
+
+def record_phase(phase: str, ms: float) -> None:
+    timings = _current.get()
+    if timings is not None:
+        timings.add(phase, ms)
+
+
+def record_query(statement: str, ms: float) -> None:
+    timings = _current.get()
+    if timings is not None:
+        timings.queries += 1
+        timings.query_ms += ms
+        timings.statements[statement] += 1
+
+
+class RouteMetrics:
+    def __init__(self):
+        self.duration = LatencyStats()
+        self.db = LatencyStats()
+        self.queries = LatencyStats()
+        self.errors = 0
+
+    def snapshot(self) -> dict:
+        queries = self.queries.snapshot()
+        return {
+            "latency": self.duration.snapshot(),
+            "db_time": self.db.snapshot(),
+            "queries": {"mean": queries["mean_ms"], "p95": queries["p95_ms"], "max": queries["max_ms"]},
+            "server_errors": self.errors,
+        }
+
+
+_routes: Dict[str, RouteMetrics] = {}
+_routes_lock = threading.Lock()
+_process = {"requests": 0, "cold_start_ms": None, "startup_ms": None}
+
+
+def _route_metrics(key: str) -> RouteMetrics:
+    metrics = _routes.get(key)
+    if metrics is None:
+        with _routes_lock:
+            metrics = _routes.setdefault(key, RouteMetrics())
+    return metrics
+
+
+def record_startup(ms: float) -> None:
+    _process["startup_ms"] = round(ms, 3)
+
+
+def metrics_snapshot() -> dict:
+    with _routes_lock:
+        routes = {key: metrics.snapshot() for key, metrics in _routes.items()}
+    return {
+        "process": {
+            **_process,
+            "uptime_s": round(time.perf_counter() - PROCESS_STARTED, 1),
+        },
+        # Slowest first
+        "routes": dict(sorted(routes.items(), key=lambda item: item[1]["latency"]["p95_ms"], reverse=True)),
+    }
+
+
+def reset_metrics() -> None:
+    with _routes_lock:
+        _routes.clear()
+
+
+def server_timing_header(timings: RequestTimings) -> str:
+    parts = [f"total;dur={timings.elapsed_ms():.1f}"]
+    if timings.queries:
+        parts.append(f'db;dur={timings.query_ms:.1f};desc="{timings.queries} queries"')
+    for phase, ms in timings.phases.items():
+        parts.append(f"{phase};dur={ms:.1f}")
+    if timings.cold_start_ms is not None:
+        parts.append(f'cold-start;dur={timings.cold_start_ms:.1f};desc="first request"')
+    return ", ".join(parts)
+
+
+def _route_label(scope: Scope) -> str:
+    route = scope.get("route")
+    return f"{scope['method']} {getattr(route, 'path', 'unmatched')}"
+
+
+class TimingMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._first_request = True
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        cold_start_ms = None
+        if self._first_request:
+            self._first_request = False
+            cold_start_ms = (time.perf_counter() - PROCESS_STARTED) * 1000
+            _process["cold_start_ms"] = round(cold_start_ms, 3)
+        timings = RequestTimings(cold_start_ms)
+        token = _current.set(timings)
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if SERVER_TIMING_ENABLED:
+                    MutableHeaders(raw=message["headers"]).append("Server-Timing", server_timing_header(timings))
+            elif message["type"] == "http.response.body" and timings.first_byte_ms is None and message.get("more_body"):
+                timings.first_byte_ms = timings.elapsed_ms()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            self._finish(scope, timings, status_code)
+
+    def _finish(self, scope: Scope, timings: RequestTimings, status_code: int) -> None:
+        total_ms = timings.elapsed_ms()
+        streamed = timings.first_byte_ms is not None
+        duration_ms = timings.first_byte_ms if streamed else total_ms
+        key = _route_label(scope)
+        metrics = _route_metrics(key)
+        metrics.duration.record(duration_ms)
+        metrics.db.record(timings.query_ms)
+        metrics.queries.record(timings.queries)
+        if status_code >= 500:
+            metrics.errors += 1
+        _process["requests"] += 1
+
+        if REQUEST_LOG == "off":
+            return
+        statement, repeats = timings.most_repeated()
+        slow = duration_ms >= SLOW_REQUEST_MS
+        query_heavy = timings.queries > QUERY_WARN_THRESHOLD or repeats >= QUERY_WARN_THRESHOLD
+        if REQUEST_LOG != "all" and not (slow or query_heavy):
+            return
+        record = {
+            "event": "request",
+            "route": key,
+            "path": scope.get("path"),
+            "status": status_code,
+            "duration_ms": round(duration_ms, 2),
+            "db_queries": timings.queries,
+            "db_ms": round(timings.query_ms, 2),
+            **{f"{phase}_ms": round(ms, 2) for phase, ms in timings.phases.items()},
+        }
+        if streamed:
+            record["streamed"] = True
+            record["total_ms"] = round(total_ms, 2)
+        if timings.cold_start_ms is not None:
+            record["cold_start_ms"] = round(timings.cold_start_ms, 2)
+        if slow:
+            record["slow"] = True
+        if query_heavy:
+            record["suspect_n_plus_one"] = True
+            record["most_repeated_statement"] = {"sql": statement[:200], "count": repeats}
+        logger.log(logging.WARNING if (slow or query_heavy) else logging.INFO, json.dumps(record))
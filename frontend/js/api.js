@@ -20,24 +20,91 @@ class AsatecAPI {
         this.headers = {
             'Content-Type': 'application/json'
         };
+        // Last good GET response per URL, kept for conditional revalidation
+        this.validators = new Map();
+        // Pre-rendered JSON published by `python -m api.manage publish`
+        this.snapshotBaseURL = (typeof window !== 'undefined' ? window.location.origin : '') + '/snapshots';
+        this.useSnapshots = true;
+        this.manifest = null;
+    }
+
+    // The manifest maps API paths ("/products", "/content/home") to
+    // content-hashed static files. It is fetched once per page load; a
+    // missing manifest just means everything comes from the API.
+    loadManifest() {
+        if (!this.manifest) {
+            this.manifest = fetch(`${this.snapshotBaseURL}/manifest.json`, { cache: 'no-cache' })
+                .then(response => response.ok ? response.json() : null)
+                .catch(() => null);
+        }
+        return this.manifest;
+    }
+
+    async fromSnapshot(endpoint) {
+        const manifest = await this.loadManifest();
+        const entry = manifest && manifest.files && manifest.files[endpoint];
+        if (!entry) return undefined;
+        try {
+            const response = await fetch(`${this.snapshotBaseURL}/${entry.file}`);
+            if (response.ok) return await response.json();
+        } catch (error) {
+            // Fall through to the API
+        }
+        return undefined;
     }
 
     // Generic API request method
     async request(endpoint, options = {}) {
         const url = `${this.baseURL}${endpoint}`;
+        const method = (options.method || 'GET').toUpperCase();
+        const cached = method === 'GET' ? this.validators.get(url) : null;
+        const headers = { ...this.headers, ...(options.headers || {}) };
+
+        // Plain public GETs are served from the static snapshots when published
+        if (method === 'GET' && this.useSnapshots && !endpoint.includes('?') && !headers.Authorization) {
+            const snapshot = await this.fromSnapshot(endpoint);
+            if (snapshot !== undefined) return snapshot;
+        }
+
+        // Revalidate instead of refetching: an unchanged resource comes back
+        // as an empty 304 and we reuse the body we already have.
+        if (cached) {
+            if (cached.etag) {
+                headers['If-None-Match'] = cached.etag;
+            } else if (cached.lastModified) {
+                headers['If-Modified-Since'] = cached.lastModified;
+            }
+        }
+
         const config = {
-            headers: this.headers,
-            ...options
+            ...options,
+            headers
         };
 
         try {
             const response = await fetch(url, config);
-            
+
+            if (response.status === 304 && cached) {
+                return cached.data;
+            }
+
             if (!response.ok) {
                 throw new Error(`HTTP error! status: ${response.status}`);
             }
 
             const data = await response.json();
+
+            if (method === 'GET') {
+                const etag = response.headers.get('ETag');
+                const lastModified = response.headers.get('Last-Modified');
+                if (etag || lastModified) {
+                    this.validators.set(url, { etag, lastModified, data });
+                }
+            } else {
+                // Writes may change anything we have cached
+                this.validators.clear();
+            }
+
             return data;
         } catch (error) {
             console.error('API request failed. Please try again later.');
@@ -79,6 +146,7 @@ class AsatecAPI {
     }
 
     // Products API
+    // filters: category (comma-separated for several), is_featured, skip, limit
     async getProducts(filters = {}) {
         return this.get('/products', filters);
     }
@@ -87,11 +155,20 @@ class AsatecAPI {
         return this.get(`/products/${id}`);
     }
 
+    // { total, featured, categories: [{ value, count, featured }] }
+    async getProductFacets() {
+        return this.get('/products/facets');
+    }
+
     async getProductCategories() {
-        return this.get('/products/categories');
+        const facets = await this.getProductFacets();
+        return facets.categories.map(facet => facet.value).filter(Boolean);
     }
 
     // Media API
+    // filters: type ('image' or 'document'), skip, limit. Items carry
+    // image_url (display-size WebP) and srcset strings per format; use those
+    // rather than url, which is the full-size original.
     async getMediaItems(filters = {}) {
         return this.get('/media', filters);
     }
@@ -114,10 +191,16 @@ class AsatecAPI {
     }
 
     // Application Cases API
+    // filters: industry (comma-separated for several), is_featured, skip, limit
     async getApplicationCases(filters = {}) {
         return this.get('/cases', filters);
     }
 
+    // { total, featured, industries: [{ value, count, featured }] }
+    async getApplicationCaseFacets() {
+        return this.get('/cases/facets');
+    }
+
     async getApplicationCase(id) {
         return this.get(`/cases/${id}`);
     }
@@ -127,9 +210,23 @@ class AsatecAPI {
         return this.get(`/content/${pageName}`);
     }
 
+    // Page content, products and cases for a page in one request.
+    // options: productFields / caseFields (arrays or 'all'), productsLimit, casesLimit
+    async getPageBootstrap(pageName, options = {}) {
+        const params = {};
+        const fields = (value) => Array.isArray(value) ? value.join(',') : value;
+        if (options.productFields) params.product_fields = fields(options.productFields);
+        if (options.caseFields) params.case_fields = fields(options.caseFields);
+        if (options.productsLimit !== undefined) params.products_limit = options.productsLimit;
+        if (options.casesLimit !== undefined) params.cases_limit = options.casesLimit;
+        return this.get(`/bootstrap/${pageName}`, params);
+    }
+
     // Search API
+    // filters: type ('product,case,page'), category, industry, limit, offset.
+    // Result snippets are HTML with the matches in <mark>.
     async search(query, filters = {}) {
-        return this.get('/search', { query, ...filters });
+        return this.get('/search', { q: query, ...filters });
     }
 }
 
@@ -361,6 +458,16 @@ class ContentLoader {
         }
     }
 
+    // Everything a page needs in one call; products and cases come back as
+    // summaries (no long descriptions) unless other fields are requested
+    async loadPageData(pageName, options = {}) {
+        const cacheKey = `bootstrap-${pageName}-${JSON.stringify(options)}`;
+        if (!this.cache.has(cacheKey)) {
+            this.cache.set(cacheKey, await this.api.getPageBootstrap(pageName, options));
+        }
+        return this.cache.get(cacheKey);
+    }
+
     async loadMediaItems(container, filters = {}) {
         if (!container) return;
         
@@ -408,7 +515,7 @@ class ContentLoader {
         
         container.innerHTML = products.map(product => `
             <div class="card product-card" data-product-id="${product.id}">
-                <img src="${product.imageUrl}" alt="${product.title}" class="card-image">
+                <img src="${product.imageUrl}" alt="${product.title}" class="card-image" loading="lazy" decoding="async">
                 <div class="card-body">
                     <h3 class="card-title">${product.title}</h3>
                     <p class="card-text">${product.description}</p>
@@ -427,7 +534,8 @@ class ContentLoader {
         container.innerHTML = mediaItems.map(item => `
             <div class="video-card" data-media-id="${item.id}">
                 <div class="video-thumbnail">
-                    <img src="${item.thumbnailUrl}" alt="${item.title}">
+                    <img src="${item.image_url || item.thumbnailUrl}" srcset="${(item.srcset && item.srcset.webp) || ''}"
+                         sizes="(max-width: 768px) 100vw, 33vw" alt="${item.alt_text || item.title}" loading="lazy" decoding="async">
                     <div class="play-button">
                         <svg width="24" height="24" viewBox="0 0 24 24" fill="none">
                             <path d="M8 5V19L19 12L8 5Z" fill="currentColor"/>
@@ -14,9 +14,23 @@ class AsatecWebsite {
         this.initializeNavigation();
         this.initializeHeroSection();
         this.initializeScrollEffects();
+        this.loadPageData();
         this.loadFeaturedVideos();
     }
 
+    // One bootstrap request for the page's content, products and cases.
+    // Page scripts listen for 'asatec:pagedata' instead of fetching each.
+    async loadPageData() {
+        if (!window.contentLoader) return;
+        const pageName = document.body.dataset.page || 'home';
+        try {
+            this.pageData = await window.contentLoader.loadPageData(pageName);
+            document.dispatchEvent(new CustomEvent('asatec:pagedata', { detail: this.pageData }));
+        } catch (error) {
+            console.error('Error loading page data:', error);
+        }
+    }
+
     initializeEventListeners() {
         // Mobile menu toggle
         const mobileToggle = document.querySelector('.mobile-menu-toggle');
@@ -0,0 +1,2 @@
+# Performance tooling: dataset seeding, query-plan checks and benchmarks.
+# Nothing in here is deployed; see perf/README.md.
@@ -0,0 +1,352 @@
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import httpx
+
+from api.metrics import percentile
+
+# Load test: seed a scratch database, start the API under uvicorn once per
+# configuration, drive a weighted mix of public and admin requests with
+# concurrent clients and report throughput and latency percentiles per route.
+#
+#   DATABASE_URL=sqlite:///loadtest.db SECRET_KEY=dev python -m perf.loadtest --seed
+#   python -m perf.loadtest --matrix pool=queue,null cache=on,off async=false,true -o results.json
+#   python -m perf.loadtest -o new.json --compare results.json
+#
+# Every combination of the --matrix values is a separate server process, so
+# settings that are read at import time (pool mode, async engine) really
+# change. Results are JSON; --compare exits non-zero when a route's p95 or
+# throughput regressed by more than --threshold against an earlier run.
+# The client runs in one process: on a small machine it saturates before a
+# cached route does, so compare runs made on the same machine only.
+
+ADMIN_EMAIL = "loadtest@example.com"
+ADMIN_PASSWORD = "loadtest-password"
+
+# Environment variable for each matrix dimension, and what each value sets it to
+MATRIX_SETTINGS = {
+    "pool": ("DB_POOL_MODE", {"queue": "queue", "null": "null", "pgbouncer": "pgbouncer"}),
+    "cache": ("CACHE_ENABLED", {"on": "true", "off": "false"}),
+    "async": ("DB_ASYNC", {"true": "true", "false": "false"}),
+    "auth": ("AUTH_MODE", {"stateless": "stateless", "db": "db"}),
+    "compress": ("COMPRESS_ENABLED", {"on": "true", "off": "false"}),
+    "ingest": ("CONTACT_INGEST", {"sync": "sync", "queue": "queue", "spool": "spool"}),
+}
+
+# (route, weight, admin, method, path); route matches the labels of
+# /api/admin/metrics, {product} and {page} are filled in per request
+SCENARIO = [
+    ("GET /api/products", 25, False, "GET", "/api/products?limit=20"),
+    ("GET /api/products/{product_id}", 20, False, "GET", "/api/products/{product}"),
+    ("GET /api/cases", 10, False, "GET", "/api/cases?limit=20"),
+    ("GET /api/content/{page_name}", 15, False, "GET", "/api/content/{page}"),
+    ("GET /api/bootstrap/{page_name}", 15, False, "GET", "/api/bootstrap/{page}"),
+    ("POST /api/contact", 3, False, "POST", "/api/contact"),
+    ("GET /api/admin/products", 4, True, "GET", "/api/admin/products?limit=50"),
+    ("GET /api/admin/contacts", 4, True, "GET", "/api/admin/contacts?limit=50"),
+    ("PUT /api/admin/products/{product_id}", 4, True, "PUT", "/api/admin/products/{product}"),
+]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _base_env(database_url: str) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": database_url,
+        "SECRET_KEY": env.get("SECRET_KEY", "loadtest"),
+        "ADMIN_EMAIL": ADMIN_EMAIL,
+        "ADMIN_PASSWORD": ADMIN_PASSWORD,
+        # The scenario posts contact forms from one address
+        "CONTACT_RATE_LIMIT": "1000000000",
+        "REQUEST_LOG": "off",
+        "PYTHONPATH": os.getcwd() + os.pathsep + env.get("PYTHONPATH", ""),
+    })
+    return env
+
+
+def prepare_database(database_url: str, products: int, cases: int, contacts: int, pages: int) -> None:
+    env = _base_env(database_url)
+    subprocess.run([sys.executable, "-m", "api.manage", "migrate"], env=env, check=True)
+    subprocess.run([
+        sys.executable, "-m", "perf.seed",
+        "--products", str(products), "--cases", str(cases), "--contacts", str(contacts), "--pages", str(pages),
+    ], env=env, check=True)
+
+
+def expand_matrix(specs) -> list:
+    """['pool=queue,null', 'cache=on,off'] -> one settings dict per combination."""
+    dimensions = []
+    for spec in specs or []:
+        name, _, values = spec.partition("=")
+        if name not in MATRIX_SETTINGS:
+            raise SystemExit(f"Unknown matrix dimension {name!r}; choose from {', '.join(MATRIX_SETTINGS)}")
+        choices = MATRIX_SETTINGS[name][1]
+        for value in values.split(","):
+            if value not in choices:
+                raise SystemExit(f"{name} must be one of {', '.join(choices)}; got {value!r}")
+        dimensions.append([(name, value) for value in values.split(",")])
+    return [dict(combination) for combination in itertools.product(*dimensions)] or [{}]
+
+
+def config_name(config: dict) -> str:
+    return " ".join(f"{name}={value}" for name, value in config.items()) or "default"
+
+
+class Server:
+    def __init__(self, database_url: str, config: dict, workers: int):
+        self.port = _free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        env = _base_env(database_url)
+        for name, value in config.items():
+            variable, values = MATRIX_SETTINGS[name]
+            env[variable] = values[value]
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "api.main:app", "--port", str(self.port),
+             "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+            env=env,
+        )
+
+    def wait_ready(self, timeout: float = 30) -> None:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Server exited with status {self.process.returncode}")
+            try:
+                if httpx.get(self.base_url + "/api/health", timeout=1).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            time.sleep(0.2)
+        raise RuntimeError("Server did not become ready")
+
+    def stop(self) -> None:
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.recording = False
+
+    def record(self, label: str, ms: float, ok: bool) -> None:
+        if not self.recording:
+            return
+        self.latencies[label].append(ms)
+        if not ok:
+            self.errors[label] += 1
+
+    def summary(self, seconds: float) -> dict:
+        def stats(samples, errors):
+            ordered = sorted(samples)
+            return {
+                "requests": len(ordered),
+                "errors": errors,
+                "rps": round(len(ordered) / seconds, 1),
+                "mean_ms": round(sum(ordered) / len(ordered), 3) if ordered else 0.0,
+                "p50_ms": round(percentile(ordered, 50), 3),
+                "p95_ms": round(percentile(ordered, 95), 3),
+                "p99_ms": round(percentile(ordered, 99), 3),
+                "max_ms": round(ordered[-1], 3) if ordered else 0.0,
+            }
+
+        routes = {label: stats(samples, self.errors[label]) for label, samples in sorted(self.latencies.items())}
+        everything = [ms for samples in self.latencies.values() for ms in samples]
+        return {"total": stats(everything, sum(self.errors.values())), "routes": routes}
+
+
+def _request_args(path: str, method: str, rng: random.Random, fixtures: dict, counter) -> dict:
+    path = path.format(product=rng.choice(fixtures["products"]), page=rng.choice(fixtures["pages"]))
+    if method == "POST":
+        n = next(counter)
+        return {"url": path, "json": {
+            "name": "Load Test", "email": f"load{n}@example.com", "subject": "Quote request",
+            "message": f"Load test message {n}",
+        }}
+    if method == "PUT":
+        return {"url": path, "json": {"sort_order": rng.randint(0, 1000)}}
+    return {"url": path}
+
+
+async def _client(client, headers, rng, fixtures, recorder, deadline, counter):
+    weights = [entry[1] for entry in SCENARIO]
+    while time.monotonic() < deadline:
+        label, _, admin, method, path = rng.choices(SCENARIO, weights)[0]
+        args = _request_args(path, method, rng, fixtures, counter)
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, headers=headers if admin else None, **args)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        recorder.record(label, (time.perf_counter() - start) * 1000, ok)
+
+
+async def _fixtures(client, headers) -> dict:
+    products = (await client.get("/api/admin/products?limit=200", headers=headers)).json()
+    pages = (await client.get("/api/admin/content", headers=headers)).json()
+    fixtures = {
+        "products": [row["id"] for row in products if row["is_active"]],
+        "pages": [row["page_name"] for row in pages if row["is_published"]],
+    }
+    if not fixtures["products"] or not fixtures["pages"]:
+        raise RuntimeError("No published pages or active products; run with --seed first")
+    return fixtures
+
+
+async def drive(base_url: str, concurrency: int, duration: float, warmup: float, seed_value: int) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        login = await client.post("/api/auth/login", json={"email": ADMIN_EMAIL, "password": ADMIN_PASSWORD})
+        login.raise_for_status()
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+        fixtures = await _fixtures(client, headers)
+
+        recorder = Recorder()
+        counter = itertools.count()
+        deadline = time.monotonic() + warmup + duration
+        clients = [
+            asyncio.create_task(_client(client, headers, random.Random(seed_value + i), fixtures, recorder, deadline, counter))
+            for i in range(concurrency)
+        ]
+        await asyncio.sleep(warmup)
+        # Server-side numbers (query counts, DB time) cover the measured window only
+        await client.delete("/api/admin/metrics", headers=headers)
+        recorder.recording = True
+        started = time.monotonic()
+        await asyncio.gather(*clients)
+        elapsed = time.monotonic() - started
+        server = (await client.get("/api/admin/metrics", headers=headers)).json()
+
+    result = recorder.summary(elapsed)
+    result["seconds"] = round(elapsed, 2)
+    result["server"] = {
+        "routes": {
+            route: {"queries_mean": stats["queries"]["mean"], "db_mean_ms": stats["db_time"]["mean_ms"]}
+            for route, stats in server["routes"].items()
+        },
+        "db_pool": server["db_pool"],
+        "response_cache": server["response_cache"],
+    }
+    return result
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """Routes whose p95 rose, or whose throughput fell, by more than ``threshold``."""
+    regressions = []
+    previous_runs = {run["config"]: run for run in baseline["runs"]}
+    for run in current["runs"]:
+        previous = previous_runs.get(run["config"])
+        if previous is None:
+            continue
+        for route, stats in run["routes"].items():
+            before = previous["routes"].get(route)
+            if not before:
+                continue
+            if before["p95_ms"] and stats["p95_ms"] > before["p95_ms"] * (1 + threshold):
+                regressions.append((run["config"], route, "p95_ms", before["p95_ms"], stats["p95_ms"]))
+            if before["rps"] and stats["rps"] < before["rps"] * (1 - threshold):
+                regressions.append((run["config"], route, "rps", before["rps"], stats["rps"]))
+    return regressions
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _print_run(run: dict) -> None:
+    print(f"\n== {run['config']}  ({run['seconds']}s)")
+    print(f"{'route':<40}{'req':>8}{'err':>6}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'queries':>9}")
+    server_routes = run["server"]["routes"]
+    for route, stats in list(run["routes"].items()) + [("total", run["total"])]:
+        queries = server_routes.get(route, {}).get("queries_mean", "")
+        print(
+            f"{route:<40}{stats['requests']:>8}{stats['errors']:>6}{stats['rps']:>9.1f}"
+            f"{stats['p50_ms']:>9.2f}{stats['p95_ms']:>9.2f}{stats['p99_ms']:>9.2f}{queries:>9}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m perf.loadtest", description="Concurrent load test of the API")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL", "sqlite:///loadtest.db"))
+    parser.add_argument("--seed", action="store_true", help="migrate and seed the database before running")
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--cases", type=int, default=2000)
+    parser.add_argument("--contacts", type=int, default=100000)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--matrix", nargs="*", metavar="NAME=V1,V2", help=f"dimensions: {', '.join(MATRIX_SETTINGS)}")
+    parser.add_argument("-c", "--concurrency", type=int, default=20)
+    parser.add_argument("-d", "--duration", type=float, default=15, help="measured seconds per configuration")
+    parser.add_argument("--warmup", type=float, default=3)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--random-seed", type=int, default=42)
+    parser.add_argument("-o", "--output", help="write results as JSON")
+    parser.add_argument("--compare", metavar="BASELINE", help="earlier JSON results to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed regression, as a fraction")
+    args = parser.parse_args(argv)
+
+    if args.seed:
+        prepare_database(args.database_url, args.products, args.cases, args.contacts, args.pages)
+
+    results = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "revision": _git_revision(),
+        "database": args.database_url.split("://")[0],
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "workers": args.workers,
+        "runs": [],
+    }
+    for config in expand_matrix(args.matrix):
+        server = Server(args.database_url, config, args.workers)
+        try:
+            server.wait_ready()
+            run = asyncio.run(drive(server.base_url, args.concurrency, args.duration, args.warmup, args.random_seed))
+        finally:
+            server.stop()
+        run = {"config": config_name(config), "settings": config, **run}
+        results["runs"].append(run)
+        _print_run(run)
+
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(results, fh, indent=1)
+        print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as fh:
+            baseline = json.load(fh)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\nRegressions against {args.compare} (threshold {args.threshold:.0%}):")
+            for config, route, metric, before, after in regressions:
+                print(f"  [{config}] {route}: {metric} {before} -> {after}")
+            return 1
+        print(f"\nNo regressions against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
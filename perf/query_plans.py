@@ -0,0 +1,181 @@
+import argparse
+import json
+import re
+import sys
+
+from sqlalchemy import event, func, select, text
+
+from api import crud
+from api.database import SessionLocal, engine
+from api.models import ApplicationCase, ContactSubmission, PageContent, Product, User
+from api.schemas import (
+    CASE_SUMMARY_FIELDS,
+    PRODUCT_SUMMARY_FIELDS,
+    ApplicationCaseUpdate,
+    ProductCreate,
+    ProductUpdate,
+)
+from perf.seed import seed
+
+# Query-plan check: run every CRUD function in api/crud.py against a seeded
+# database, EXPLAIN each statement it issues and fail if any of them reads a
+# table without an index (Seq Scan / bare SCAN) or sorts instead of walking
+# an index in order.
+#
+#   DATABASE_URL=postgresql://localhost/asatec_plans python -m perf.query_plans
+#   DATABASE_URL=sqlite:///plans.db python -m perf.query_plans --products 5000
+#
+# Use a scratch database: the write functions really run.
+
+SQLITE_BAD = [
+    (re.compile(r"^SCAN (TABLE )?\w+$"), "full table scan"),
+    (re.compile(r"USE TEMP B-TREE FOR (ORDER BY|RIGHT PART OF ORDER BY)"), "sort not served by an index"),
+]
+SKIPPED_STATEMENTS = ("INSERT", "BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE", "PRAGMA", "SET", "ANALYZE")
+
+
+def _capture(fn):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith(SKIPPED_STATEMENTS):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    db = SessionLocal()
+    try:
+        fn(db)
+    finally:
+        db.close()
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return statements
+
+
+def _explain_sqlite(conn, statement, parameters):
+    rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+    details = [row[3] for row in rows]
+    problems = [reason + ": " + detail for detail in details for pattern, reason in SQLITE_BAD if pattern.search(detail)]
+    return details, problems
+
+
+def _walk(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _walk(child)
+
+
+def _explain_postgresql(conn, statement, parameters):
+    plan = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    nodes = list(_walk(plan[0]["Plan"]))
+    details = [f"{node['Node Type']} {node.get('Index Name') or node.get('Relation Name') or ''}".strip() for node in nodes]
+    problems = []
+    for node in nodes:
+        if node["Node Type"] == "Seq Scan":
+            problems.append(f"full table scan: Seq Scan on {node.get('Relation Name')}")
+        elif node["Node Type"] in ("Sort", "Incremental Sort"):
+            problems.append(f"sort not served by an index: {node['Node Type']}")
+    return details, problems
+
+
+def _checks(db):
+    """(name, callable) pairs covering every function in api.crud."""
+    first_product = db.execute(
+        select(Product).where(Product.is_active == True).order_by(Product.sort_order, Product.id).offset(50).limit(1)
+    ).scalar_one()
+    first_case = db.execute(
+        select(ApplicationCase).where(ApplicationCase.is_active == True).order_by(ApplicationCase.sort_order, ApplicationCase.id).offset(50).limit(1)
+    ).scalar_one()
+    contact = db.execute(
+        select(ContactSubmission).order_by(ContactSubmission.created_at.desc(), ContactSubmission.id.desc()).offset(50).limit(1)
+    ).scalar_one()
+    page_name = db.execute(select(PageContent.page_name).where(PageContent.is_published == True).limit(1)).scalar_one()
+    admin_email = db.execute(select(User.email).limit(1)).scalar()
+    max_product = db.execute(select(func.max(Product.id))).scalar()
+    max_case = db.execute(select(func.max(ApplicationCase.id))).scalar()
+
+    checks = [
+        ("get_page_content_by_name", lambda s: crud.get_page_content_by_name(s, page_name)),
+        ("get_all_page_content", lambda s: crud.get_all_page_content(s)),
+        ("get_all_products", lambda s: crud.get_all_products(s)),
+        ("get_all_products (keyset page)", lambda s: crud.get_all_products(s, after=(first_product.sort_order, first_product.id))),
+        ("get_all_products (admin)", lambda s: crud.get_all_products(s, include_inactive=True)),
+        ("get_all_products (category)", lambda s: crud.get_all_products(s, categories=[first_product.category])),
+        ("get_all_products (category, keyset page)", lambda s: crud.get_all_products(
+            s, categories=[first_product.category], after=(first_product.sort_order, first_product.id))),
+        ("get_all_products (featured)", lambda s: crud.get_all_products(s, is_featured=True)),
+        ("get_product_facets", lambda s: crud.get_product_facets(s)),
+        ("get_product_by_id", lambda s: crud.get_product_by_id(s, first_product.id)),
+        ("create_product", lambda s: crud.create_product(s, ProductCreate(name="Plan check"))),
+        ("update_product", lambda s: crud.update_product(s, first_product.id, ProductUpdate(short_description="checked"))),
+        ("delete_product", lambda s: crud.delete_product(s, max_product)),
+        ("get_all_application_cases", lambda s: crud.get_all_application_cases(s)),
+        ("get_all_application_cases (keyset page)", lambda s: crud.get_all_application_cases(s, after=(first_case.sort_order, first_case.id))),
+        ("get_all_application_cases (industry)", lambda s: crud.get_all_application_cases(s, industries=[first_case.industry])),
+        ("get_all_application_cases (featured)", lambda s: crud.get_all_application_cases(s, is_featured=True)),
+        ("get_application_case_facets", lambda s: crud.get_application_case_facets(s)),
+        ("get_application_case_by_id", lambda s: crud.get_application_case_by_id(s, first_case.id)),
+        ("update_application_case", lambda s: crud.update_application_case(s, first_case.id, ApplicationCaseUpdate(industry="energy"))),
+        ("delete_application_case", lambda s: crud.delete_application_case(s, max_case)),
+        ("get_all_contact_submissions", lambda s: crud.get_all_contact_submissions(s)),
+        ("get_all_contact_submissions (keyset page)", lambda s: crud.get_all_contact_submissions(s, after=(contact.created_at, contact.id))),
+        ("mark_contact_as_read", lambda s: crud.mark_contact_as_read(s, contact.id)),
+        ("get_page_bootstrap", lambda s: crud.get_page_bootstrap(s, page_name, PRODUCT_SUMMARY_FIELDS, CASE_SUMMARY_FIELDS)),
+    ]
+    if admin_email:
+        checks.append(("get_user_by_email", lambda s: crud.get_user_by_email(s, admin_email)))
+        checks.append(("get_user_by_id", lambda s: crud.get_user_by_id(s, 1)))
+    return checks
+
+
+def run(verbose=False):
+    explain = _explain_postgresql if engine.dialect.name == "postgresql" else _explain_sqlite
+    db = SessionLocal()
+    try:
+        checks = _checks(db)
+    finally:
+        db.close()
+
+    failures = 0
+    for name, fn in checks:
+        statements = _capture(fn)
+        problems = []
+        with engine.connect() as conn:
+            for statement, parameters in statements:
+                details, found = explain(conn, statement, parameters)
+                problems.extend(found)
+                if verbose:
+                    print(f"  {' '.join(statement.split())[:120]}")
+                    for detail in details:
+                        print(f"    {detail}")
+        status = "FAIL" if problems else "ok"
+        failures += bool(problems)
+        print(f"{status:4}  {name}  ({len(statements)} statements)")
+        for problem in problems:
+            print(f"      {problem}")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m perf.query_plans", description="Check that CRUD queries use indexes")
+    parser.add_argument("--products", type=int, default=20000)
+    parser.add_argument("--cases", type=int, default=5000)
+    parser.add_argument("--contacts", type=int, default=50000)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--no-seed", action="store_true", help="reuse the rows already in the database")
+    parser.add_argument("-v", "--verbose", action="store_true", help="print every statement and its plan")
+    args = parser.parse_args(argv)
+
+    if not args.no_seed:
+        seed(args.products, args.cases, args.contacts, args.pages)
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+
+    failures = run(args.verbose)
+    print(f"\n{failures} function(s) with unindexed access paths" if failures else "\nAll CRUD queries use indexes")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
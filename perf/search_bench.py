@@ -0,0 +1,82 @@
+import argparse
+import statistics
+import sys
+import time
+
+from sqlalchemy import func, select
+
+from api import search
+from api.database import SessionLocal, init_db
+from api.metrics import percentile
+from api.models import ApplicationCase, PageContent, Product
+from perf.seed import seed
+
+# Search latency at scale. Tops the database up to --documents searchable
+# rows (products, cases and pages, 10:2:1 as in perf.seed) and times
+# api.search.search over a fixed set of queries: single terms, conjunctions,
+# prefixes and facet filters.
+#
+#   DATABASE_URL=sqlite:///search.db SECRET_KEY=dev python -m perf.search_bench --documents 100000
+#   DATABASE_URL=postgresql://localhost/asatec_bench SECRET_KEY=dev python -m perf.search_bench
+#
+# On Postgres run `python -m api.manage migrate` first so the search_vector
+# columns exist; otherwise the in-memory index is measured.
+
+QUERIES = [
+    {"q": "valve"},
+    {"q": "stainless pump"},
+    {"q": "pressure sensor monitoring"},
+    {"q": "corr"},
+    {"q": "smart connected contr"},
+    {"q": "pump", "category": "pumps"},
+    {"q": "safety", "industry": "energy"},
+    {"q": "reliable", "types": ("page",)},
+]
+
+
+def _documents(db) -> int:
+    return sum(db.execute(select(func.count()).select_from(model)).scalar() for model in (Product, ApplicationCase, PageContent))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m perf.search_bench", description="Time api.search at scale")
+    parser.add_argument("--documents", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    init_db()
+    db = SessionLocal()
+    try:
+        missing = args.documents - _documents(db)
+        if missing > 0:
+            print(f"Seeding {missing} documents...")
+            seed(products=missing * 10 // 13, cases=missing * 2 // 13, contacts=0, pages=missing // 13)
+        backend = search.backend_name(db)
+        print(f"{_documents(db)} documents, backend: {backend}\n")
+
+        start = time.perf_counter()
+        search.search(db, "warmup")
+        if backend == "memory":
+            print(f"index build: {(time.perf_counter() - start) * 1000:.0f} ms\n")
+
+        print(f"{'query':<44}{'hits':>8}{'p50 ms':>9}{'p95 ms':>9}")
+        medians = []
+        for query in QUERIES:
+            params = dict(query)
+            samples = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                result = search.search(db, **params)
+                samples.append((time.perf_counter() - start) * 1000)
+            samples.sort()
+            medians.append(statistics.median(samples))
+            label = " ".join(f"{key}={value}" for key, value in query.items())
+            print(f"{label:<44}{result['total']:>8}{percentile(samples, 50):>9.2f}{percentile(samples, 95):>9.2f}")
+        print(f"\nmedian over queries: {statistics.median(medians):.2f} ms")
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
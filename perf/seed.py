@@ -0,0 +1,132 @@
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, insert, select
+
+from api.database import SessionLocal, init_db
+from api.models import ApplicationCase, ContactSubmission, PageContent, Product
+
+# Seed the models at a configurable scale for benchmarks and plan checks.
+#
+#   DATABASE_URL=sqlite:///bench.db python -m perf.seed --products 10000 --contacts 1000000
+#
+# Tables are created from the models if missing. Rows are inserted in
+# executemany batches; re-running adds more rows on top of what is there.
+
+CATEGORIES = ["hydraulics", "pneumatics", "sensors", "controllers", "valves", "pumps", "motors", "cables"]
+INDUSTRIES = ["automotive", "energy", "food", "pharma", "logistics", "mining", "water", "aerospace"]
+WORDS = (
+    "precision industrial automation modular compact robust sensor valve pump motor controller "
+    "pressure flow temperature torque efficient reliable certified stainless corrosion resistant "
+    "high performance low maintenance integrated smart connected monitoring safety"
+).split()
+BATCH_SIZE = 5000
+
+
+def _text(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def _batched(rows, size=BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _insert(db, model, rows):
+    count = 0
+    for batch in _batched(rows):
+        db.execute(insert(model), batch)
+        db.commit()
+        count += len(batch)
+    return count
+
+
+def seed(products=1000, cases=500, contacts=10000, pages=20, seed_value=42):
+    rng = random.Random(seed_value)
+    now = datetime.now(timezone.utc)
+    init_db()
+    db = SessionLocal()
+    try:
+        existing_pages = db.execute(select(func.count()).select_from(PageContent)).scalar()
+        counts = {}
+        counts["pages"] = _insert(db, PageContent, (
+            {
+                "page_name": f"page-{existing_pages + i}",
+                "title": _text(rng, 4).title(),
+                "content": _text(rng, 200),
+                "meta_description": _text(rng, 12),
+                "is_published": rng.random() < 0.9,
+            }
+            for i in range(pages)
+        ))
+        counts["products"] = _insert(db, Product, (
+            {
+                "name": _text(rng, 3).title(),
+                "description": _text(rng, 150),
+                "short_description": _text(rng, 20),
+                "category": rng.choice(CATEGORIES),
+                "image_url": f"/images/products/{i}.jpg",
+                "is_featured": rng.random() < 0.1,
+                "is_active": rng.random() < 0.9,
+                "sort_order": rng.randint(0, 1000),
+                "created_at": now - timedelta(days=rng.randint(0, 720)),
+            }
+            for i in range(products)
+        ))
+        counts["cases"] = _insert(db, ApplicationCase, (
+            {
+                "title": _text(rng, 5).title(),
+                "description": _text(rng, 120),
+                "industry": rng.choice(INDUSTRIES),
+                "image_url": f"/images/cases/{i}.jpg",
+                "is_featured": rng.random() < 0.1,
+                "is_active": rng.random() < 0.9,
+                "sort_order": rng.randint(0, 1000),
+                "created_at": now - timedelta(days=rng.randint(0, 720)),
+            }
+            for i in range(cases)
+        ))
+        counts["contacts"] = _insert(db, ContactSubmission, (
+            {
+                "name": _text(rng, 2).title(),
+                "email": f"visitor{i}@example.com",
+                "company": _text(rng, 2).title(),
+                "subject": _text(rng, 6),
+                "message": _text(rng, 60),
+                "is_read": rng.random() < 0.7,
+                "created_at": now - timedelta(seconds=rng.randint(0, 730 * 86400)),
+            }
+            for i in range(contacts)
+        ))
+        return counts
+    finally:
+        db.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m perf.seed", description="Seed the ASATEC models for benchmarks")
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--cases", type=int, default=500)
+    parser.add_argument("--contacts", type=int, default=10000)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42, help="random seed, for reproducible datasets")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    counts = seed(args.products, args.cases, args.contacts, args.pages, args.seed)
+    elapsed = time.perf_counter() - start
+    print(", ".join(f"{count} {name}" for name, count in counts.items()) + f" inserted in {elapsed:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
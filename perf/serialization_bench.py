@@ -0,0 +1,106 @@
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from api.compression import brotli, compress
+from api.models import Product
+from api.schemas import ProductResponse
+from api.serialization import dumps, orjson, rows_to_dicts
+from perf.seed import CATEGORIES, WORDS
+
+# Serialization benchmark for the public list responses: the default FastAPI
+# path (validate each ORM row into ProductResponse, validate the list against
+# response_model again, jsonable_encoder, json.dumps) against api.serialization
+# (copy the response fields into dicts, one orjson call), plus the size of the
+# body under each content coding.
+#
+#   SECRET_KEY=dev python -m perf.serialization_bench --rows 1000
+#
+# No database is needed: the rows are unsaved Product instances.
+
+
+def _rows(count: int, seed: int = 42):
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    rows = []
+    for index in range(count):
+        rows.append(Product(
+            id=index + 1,
+            name=f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} {index}",
+            description=" ".join(rng.choice(WORDS) for _ in range(rng.randint(60, 200))),
+            short_description=" ".join(rng.choice(WORDS) for _ in range(12)),
+            category=rng.choice(CATEGORIES),
+            image_url=f"/images/products/{index + 1}.jpg",
+            is_featured=rng.random() < 0.1,
+            is_active=True,
+            sort_order=index,
+            version=1,
+            created_at=start + timedelta(minutes=index),
+            updated_at=start + timedelta(days=1, minutes=index),
+        ))
+    return rows
+
+
+def _fastapi_default(rows) -> bytes:
+    field = create_response_field(name="Response_products", type_=List[ProductResponse])
+    models = [ProductResponse.model_validate(row) for row in rows]
+    content = asyncio.run(serialize_response(field=field, response_content=models))
+    return JSONResponse(content).body
+
+
+def _fast_path(rows) -> bytes:
+    return dumps(rows_to_dicts(rows, ProductResponse))
+
+
+def _time(fn, rows, repeat: int):
+    samples = []
+    body = b""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = fn(rows)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), body
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m perf.serialization_bench", description="Compare response serialization paths")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    rows = _rows(args.rows)
+    print(f"{args.rows} product rows, median of {args.repeat} runs (orjson: {'yes' if orjson else 'no'})\n")
+    print(f"{'path':<34}{'total ms':>10}{'us/row':>10}")
+    results = {}
+    for name, fn in (("FastAPI default (validate + json)", _fastapi_default), ("api.serialization (dicts + orjson)", _fast_path)):
+        seconds, body = _time(fn, rows, args.repeat)
+        results[name] = (seconds, body)
+        print(f"{name:<34}{seconds * 1000:>10.2f}{seconds * 1e6 / args.rows:>10.2f}")
+    baseline, fast = results.values()
+    print(f"\nspeed-up: {baseline[0] / fast[0]:.1f}x")
+
+    body = fast[1]
+    print(f"\n{'content coding':<34}{'bytes/request':>14}{'encode ms':>10}")
+    print(f"{'identity':<34}{len(body):>14}{0:>10.2f}")
+    for encoding in ("gzip", "br"):
+        if encoding == "br" and brotli is None:
+            print(f"{'br':<34}{'(pip install brotli)':>24}")
+            continue
+        start = time.perf_counter()
+        compressed = compress(body, encoding)
+        print(f"{encoding:<34}{len(compressed):>14}{(time.perf_counter() - start) * 1000:>10.2f}")
+    print("\nCached responses are encoded and compressed once per cache entry; a hit only copies bytes.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
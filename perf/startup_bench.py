@@ -0,0 +1,202 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from perf.loadtest import prepare_database
+
+# Cold start benchmark: every run is a fresh interpreter, like a new
+# serverless instance. It imports api.main, runs the startup handlers and
+# sends one request (in-process, over httpx's ASGI transport) to one path,
+# then a second one to the same path for comparison.
+#
+#   DATABASE_URL=sqlite:///startup.db SECRET_KEY=dev python -m perf.startup_bench --seed
+#   python -m perf.startup_bench --path /api/health --path /api/bootstrap/page-1 --runs 10 -o startup.json
+#
+# Reported per path (median over --runs): process start to first response,
+# the `import api.main` time, startup handlers, the first and second
+# response. One extra run per path under `python -X importtime` breaks the
+# import time down by module, split into what `import api.main` loads and
+# what the first request loads (the routers it mounts and their
+# dependencies). -X importtime slows imports down, so its numbers are only
+# comparable with each other.
+
+# perf.seed names its pages page-0, page-1, ...
+DEFAULT_PATHS = ["/api/health", "/api/products", "/api/cases", "/api/bootstrap/page-1"]
+
+# Written to stderr between the -X importtime lines of each phase
+IMPORT_MARKER = "-- import api.main --"
+REQUEST_MARKER = "-- first request --"
+
+CHILD = r"""
+import asyncio, json, sys, time
+import httpx
+
+sys.stderr.write(%(import_marker)r + "\n")
+started = time.perf_counter()
+from api.main import app
+imported = time.perf_counter()
+sys.stderr.write(%(request_marker)r + "\n")
+
+async def run(path):
+    await app.router.startup()
+    ready = time.perf_counter()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://startup-bench") as client:
+        first = await client.get(path)
+        responded = time.perf_counter()
+        responded_at = time.time()
+        second = await client.get(path)
+        second_ms = (time.perf_counter() - responded) * 1000
+    await app.router.shutdown()
+    return {
+        "status": first.status_code,
+        "import_ms": (imported - started) * 1000,
+        "startup_ms": (ready - imported) * 1000,
+        "first_response_ms": (responded - ready) * 1000,
+        "second_response_ms": second_ms,
+        "responded_at": responded_at,
+        "server_timing": first.headers.get("server-timing"),
+    }
+
+print(json.dumps(asyncio.run(run(sys.argv[1]))))
+""" % {"import_marker": IMPORT_MARKER, "request_marker": REQUEST_MARKER}
+
+
+def _env(database_url: str) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": database_url,
+        "SECRET_KEY": env.get("SECRET_KEY", "startup-bench"),
+        "REQUEST_LOG": "off",
+        "PYTHONPATH": os.getcwd() + os.pathsep + env.get("PYTHONPATH", ""),
+    })
+    return env
+
+
+def run_once(path: str, env: dict, importtime: bool = False):
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", CHILD, path]
+    spawned = time.time()
+    process = subprocess.run(command, env=env, capture_output=True, text=True)
+    if process.returncode != 0:
+        raise RuntimeError(f"{path}: child exited with status {process.returncode}\n{process.stderr[-2000:]}")
+    result = json.loads(process.stdout.strip().splitlines()[-1])
+    result["process_to_response_ms"] = (result.pop("responded_at") - spawned) * 1000
+    return result, process.stderr
+
+
+def parse_importtime(stderr: str):
+    """-X importtime output -> (modules imported by `import api.main`, by the first request).
+
+    Each is a list of (module, self_us) in import order.
+    """
+    phases = ([], [])
+    phase = None  # the interpreter's and the benchmark's own imports
+    for line in stderr.splitlines():
+        if line in (IMPORT_MARKER, REQUEST_MARKER):
+            phase = 0 if line == IMPORT_MARKER else 1
+            continue
+        if phase is None or not line.startswith("import time:"):
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        phases[phase].append((name.strip(), int(self_us)))
+    return phases
+
+
+def _package(module: str) -> str:
+    parts = module.split(".")
+    # The app's own modules individually, everything else by distribution
+    return ".".join(parts[:2]) if parts[0] == "api" else parts[0]
+
+
+def summarize_imports(modules, top: int) -> dict:
+    by_package = defaultdict(int)
+    for name, self_us in modules:
+        by_package[_package(name)] += self_us
+    slowest = sorted(modules, key=lambda module: module[1], reverse=True)[:top]
+    return {
+        "total_ms": round(sum(module[1] for module in modules) / 1000, 1),
+        "modules": len(modules),
+        "by_package_ms": {
+            package: round(us / 1000, 1)
+            for package, us in sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:top]
+        },
+        "slowest_self_ms": {name: round(self_us / 1000, 1) for name, self_us in slowest},
+    }
+
+
+def bench_path(path: str, env: dict, runs: int, top: int) -> dict:
+    samples = [run_once(path, env)[0] for _ in range(runs)]
+    _, stderr = run_once(path, env, importtime=True)
+    app_imports, request_imports = parse_importtime(stderr)
+    median = {
+        key: round(statistics.median(sample[key] for sample in samples), 1)
+        for key in ("process_to_response_ms", "import_ms", "startup_ms", "first_response_ms", "second_response_ms")
+    }
+    return {
+        "path": path,
+        "runs": runs,
+        "status": sorted({sample["status"] for sample in samples}),
+        **median,
+        "server_timing": samples[-1]["server_timing"],
+        "importtime": {
+            "import_api_main": summarize_imports(app_imports, top),
+            "first_request": summarize_imports(request_imports, top),
+        },
+    }
+
+
+def _print_imports(title: str, summary: dict) -> None:
+    print(f"  {title}: {summary['modules']} modules, {summary['total_ms']} ms under -X importtime")
+    print("    " + ", ".join(f"{package} {ms}" for package, ms in summary["by_package_ms"].items()))
+
+
+def _print_result(result: dict) -> None:
+    print(f"\n== GET {result['path']}  (status {', '.join(map(str, result['status']))}, median of {result['runs']})")
+    for key, label in (
+        ("process_to_response_ms", "process start -> first response"),
+        ("import_ms", "import api.main"),
+        ("startup_ms", "startup handlers"),
+        ("first_response_ms", "first response"),
+        ("second_response_ms", "second response"),
+    ):
+        print(f"  {label:<34}{result[key]:>9.1f} ms")
+    print(f"  Server-Timing: {result['server_timing']}")
+    _print_imports("import api.main", result["importtime"]["import_api_main"])
+    if result["importtime"]["first_request"]["modules"]:
+        _print_imports("imported by the first request", result["importtime"]["first_request"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m perf.startup_bench", description="Measure cold start import time and time to first response")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL", "sqlite:///startup.db"))
+    parser.add_argument("--seed", action="store_true", help="migrate and seed a small database first")
+    parser.add_argument("--path", action="append", dest="paths", help=f"GET path to time (repeatable; default {' '.join(DEFAULT_PATHS)})")
+    parser.add_argument("--runs", type=int, default=5, help="cold starts per path")
+    parser.add_argument("--top", type=int, default=12, help="packages / modules listed in the import breakdown")
+    parser.add_argument("-o", "--output", help="write results as JSON")
+    args = parser.parse_args(argv)
+
+    if args.seed:
+        prepare_database(args.database_url, products=200, cases=50, contacts=0, pages=5)
+
+    env = _env(args.database_url)
+    results = {"python": sys.version.split()[0], "paths": []}
+    for path in args.paths or DEFAULT_PATHS:
+        result = bench_path(path, env, args.runs, args.top)
+        results["paths"].append(result)
+        _print_result(result)
+
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(results, fh, indent=1)
+        print(f"\nResults written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
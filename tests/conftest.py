@@ -0,0 +1,59 @@
+import os
+import subprocess
+import sys
+import tempfile
+
+import pytest
+
+# The app reads its settings at import time: point it at a throwaway SQLite
+# database, migrated once per test session, before anything imports api.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_directory = tempfile.mkdtemp(prefix="asatec-tests-")
+
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{os.path.join(_directory, 'test.db')}",
+    "SECRET_KEY": "test-secret",
+    "REQUEST_LOG": "off",
+    "SEARCH_BACKEND": "memory",
+    "CHANGE_FEED": "memory",
+    "MEDIA_ROOT": os.path.join(_directory, "media"),
+})
+os.environ.pop("DATABASE_REPLICA_URLS", None)
+
+subprocess.run([sys.executable, "-m", "api.manage", "migrate"], cwd=ROOT, check=True, capture_output=True)
+
+
+@pytest.fixture(scope="session")
+def admin_headers():
+    from api import crud
+    from api.auth import create_access_token, token_claims
+    from api.database import SessionLocal
+    from api.schemas import UserCreate
+
+    with SessionLocal() as db:
+        user = crud.get_user_by_email(db, "admin@example.com") or crud.create_user(db, UserCreate(
+            email="admin@example.com", first_name="Test", last_name="Admin", password="test-password"))
+        token = create_access_token(token_claims(user))
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _dispose_engines():
+    # What the app's shutdown does; pooled aiosqlite connections would
+    # otherwise keep the test process alive
+    yield
+    import asyncio
+
+    from api import database
+
+    asyncio.run(database.dispose_engines())
+
+
+@pytest.fixture
+def client():
+    # No lifespan: shutdown disposes the engines the other tests share
+    from fastapi.testclient import TestClient
+
+    from api.main import app
+
+    return TestClient(app)
@@ -0,0 +1,107 @@
+from sqlalchemy.dialects import postgresql
+
+from api import crud
+from api.database import SessionLocal
+from api.models import PageContent, Product
+
+MISSING_ID = 999999
+
+
+def _product(client, headers, name, **fields):
+    return client.post("/api/admin/products", json={"name": name, **fields}, headers=headers).json()
+
+
+def _row(model, row_id):
+    with SessionLocal() as db:
+        return db.get(model, row_id)
+
+
+def _statuses(response):
+    assert response.status_code == 200
+    return [(item["op"], item["index"], item["id"], item["status"]) for item in response.json()["results"]]
+
+
+def test_bulk_reports_each_item(client, admin_headers):
+    # Not the highest id, which SQLite would hand out again to the creates
+    doomed = _product(client, admin_headers, "Check valve")
+    kept = _product(client, admin_headers, "Ball valve")
+    response = client.post("/api/admin/products/bulk", headers=admin_headers, json={
+        "delete": [doomed["id"], MISSING_ID],
+        "update": [{"id": kept["id"], "category": "valves"}, {"id": MISSING_ID, "name": "Nothing"}],
+        "create": [{"name": "Plug valve"}, {"name": "Globe valve"}],
+    })
+    results = _statuses(response)
+    assert results[:4] == [
+        ("delete", 0, doomed["id"], "deleted"),
+        ("delete", 1, MISSING_ID, "not_found"),
+        ("update", 0, kept["id"], "updated"),
+        ("update", 1, MISSING_ID, "not_found"),
+    ]
+    created = results[4:]
+    assert [(op, index, status) for op, index, _, status in created] == [("create", 0, "created"), ("create", 1, "created")]
+    assert [_row(Product, item_id).name for _, _, item_id, _ in created] == ["Plug valve", "Globe valve"]
+    assert _row(Product, doomed["id"]) is None
+    assert _row(Product, kept["id"]).category == "valves"
+
+
+def test_the_last_update_for_an_id_wins_and_bumps_the_version_once(client, admin_headers):
+    product = _product(client, admin_headers, "Butterfly valve")
+    response = client.post("/api/admin/products/bulk", headers=admin_headers, json={"update": [
+        {"id": product["id"], "name": "First"},
+        {"id": product["id"], "name": "Last", "is_featured": True},
+    ]})
+    assert [status for *_, status in _statuses(response)] == ["updated", "updated"]
+    row = _row(Product, product["id"])
+    assert (row.name, row.is_featured, row.version) == ("Last", True, product["version"] + 1)
+
+
+def test_an_update_without_changes_still_reports_whether_the_id_exists(client, admin_headers):
+    product = _product(client, admin_headers, "Needle valve")
+    response = client.post("/api/admin/products/bulk", headers=admin_headers, json={
+        "update": [{"id": product["id"]}, {"id": MISSING_ID}],
+    })
+    assert [status for *_, status in _statuses(response)] == ["updated", "not_found"]
+    assert _row(Product, product["id"]).version == product["version"]
+
+
+def test_an_integrity_error_rolls_back_the_whole_batch(client, admin_headers):
+    page = client.post("/api/admin/content", headers=admin_headers, json={
+        "page_name": "bulk-rollback", "title": "Before", "content": "..."}).json()
+    response = client.post("/api/admin/content/bulk", headers=admin_headers, json={
+        "update": [{"id": page["id"], "title": "After"}],
+        "create": [{"page_name": "bulk-duplicate", "title": "A", "content": "..."},
+                   {"page_name": "bulk-duplicate", "title": "B", "content": "..."}],
+    })
+    assert response.status_code == 409
+    assert _row(PageContent, page["id"]).title == "Before"
+    with SessionLocal() as db:
+        assert crud.get_page_content_by_name(db, "bulk-duplicate") is None
+
+
+def test_reorder_sets_sort_order_and_reports_unknown_ids(client, admin_headers):
+    first = _product(client, admin_headers, "Relief valve", sort_order=1)
+    second = _product(client, admin_headers, "Safety valve", sort_order=2)
+    response = client.post("/api/admin/products/reorder", headers=admin_headers, json={"items": [
+        {"id": first["id"], "sort_order": 20},
+        {"id": second["id"], "sort_order": 10},
+        {"id": MISSING_ID, "sort_order": 30},
+    ]})
+    assert _statuses(response) == [
+        ("reorder", 0, first["id"], "updated"),
+        ("reorder", 1, second["id"], "updated"),
+        ("reorder", 2, MISSING_ID, "not_found"),
+    ]
+    assert (_row(Product, first["id"]).sort_order, _row(Product, first["id"]).version) == (20, first["version"] + 1)
+    assert _row(Product, second["id"]).sort_order == 10
+
+
+def test_postgres_updates_a_group_in_one_statement():
+    table = Product.__table__
+    statement = crud._update_from_values(table, ("name", "sort_order"), [
+        {"id": 1, "name": "A", "sort_order": 2},
+        {"id": 3, "name": "B", "sort_order": 4},
+    ])
+    sql = " ".join(str(statement.compile(dialect=postgresql.dialect())).split())
+    assert sql.startswith("UPDATE products SET name=v.name, sort_order=v.sort_order, version=(products.version +")
+    assert "FROM (VALUES" in sql
+    assert "AS v (id, name, sort_order) WHERE products.id = v.id RETURNING products.id" in sql
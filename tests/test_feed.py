@@ -0,0 +1,59 @@
+from api import crud, feed
+from api.database import SessionLocal
+from api.schemas import ProductCreate
+
+
+def _received():
+    return feed.hub.stats()["received"]
+
+
+def test_events_go_out_when_the_write_commits():
+    with SessionLocal() as db:
+        before = _received()
+        feed.publish(db, "products", "bulk", ids=[1])
+        assert _received() == before
+        db.commit()
+        assert _received() == before + 1
+
+
+def test_rolled_back_writes_publish_nothing():
+    with SessionLocal() as db:
+        before = _received()
+        feed.publish(db, "products", "bulk", ids=[1])
+        db.rollback()
+        db.commit()
+        assert _received() == before
+
+
+def test_crud_writes_publish_their_rows():
+    with SessionLocal() as db:
+        before = _received()
+        product = crud.create_product(db, ProductCreate(name="Feed check"))
+        assert _received() == before + 1
+        # Committed and detached, with the refreshed values still loaded
+        assert product not in db
+        assert product.id is not None
+
+
+def test_the_stream_takes_a_stream_token_in_the_url(client, admin_headers, monkeypatch):
+    monkeypatch.setattr(feed, "STREAM_SECONDS", 0)
+    api_token = admin_headers["Authorization"].split()[1]
+    assert client.get("/api/admin/events").status_code == 401
+    # An API token never goes in a URL
+    assert client.get("/api/admin/events", params={"token": api_token}).status_code == 401
+
+    assert client.post("/api/admin/events/token").status_code in (401, 403)
+    response = client.post("/api/admin/events/token", headers=admin_headers)
+    assert response.status_code == 200
+    stream_token = response.json()["token"]
+    response = client.get("/api/admin/events", params={"token": stream_token})
+    assert response.status_code == 200
+    assert response.text.startswith("retry: ")
+    # The header still works for clients that can send it
+    assert client.get("/api/admin/events", headers=admin_headers).status_code == 200
+
+
+def test_a_stream_token_is_not_an_api_token(client, admin_headers):
+    stream_token = client.post("/api/admin/events/token", headers=admin_headers).json()["token"]
+    response = client.get("/api/admin/cache", headers={"Authorization": f"Bearer {stream_token}"})
+    assert response.status_code == 401
@@ -0,0 +1,93 @@
+import json
+import uuid
+
+import pytest
+from sqlalchemy import func, select
+
+from api import ingest
+from api.database import SessionLocal
+from api.models import ContactQueueEntry, ContactSubmission
+from api.ratelimit import contact_limiter
+
+
+@pytest.fixture(autouse=True)
+def no_rate_limit(monkeypatch):
+    monkeypatch.setattr(contact_limiter, "limit", 10 ** 6)
+
+
+@pytest.fixture
+def contact():
+    return {"name": "Ann", "email": "ann@example.com", "subject": "Quote", "message": f"Hello {uuid.uuid4()}"}
+
+
+def _stored(message):
+    with SessionLocal() as db:
+        return db.execute(select(func.count()).select_from(ContactSubmission).where(ContactSubmission.message == message)).scalar()
+
+
+def _queued():
+    with SessionLocal() as db:
+        return db.execute(select(func.count()).select_from(ContactQueueEntry)).scalar()
+
+
+def test_a_double_submit_returns_the_first_row(client, contact):
+    first = client.post("/api/contact", json=contact)
+    # Same content with different spacing and case is the same submission
+    second = client.post("/api/contact", json={**contact, "email": "ANN@example.com", "message": f"  {contact['message']} "})
+    assert first.status_code == second.status_code == 200
+    assert first.json()["id"] == second.json()["id"]
+    assert _stored(contact["message"]) == 1
+
+
+def test_the_spool_is_sealed_and_inserted_on_flush(client, contact, monkeypatch, tmp_path):
+    monkeypatch.setattr(ingest, "MODE", "spool")
+    monkeypatch.setattr(ingest, "_spool", ingest._Spool(str(tmp_path)))
+    for _ in range(2):
+        response = client.post("/api/contact", json=contact)
+        assert response.status_code == 202
+    assert _stored(contact["message"]) == 0
+
+    assert ingest.flush()["drained"] == 2
+    assert _stored(contact["message"]) == 1
+    assert not list(tmp_path.iterdir())
+
+
+def test_a_spool_left_by_an_exited_process_is_replayed(contact, monkeypatch, tmp_path):
+    monkeypatch.setattr(ingest, "MODE", "spool")
+    monkeypatch.setattr(ingest, "_spool", ingest._Spool(str(tmp_path)))
+    monkeypatch.setattr(ingest, "_alive", lambda pid: False)
+    record = {"contact": contact, "dedup_hash": uuid.uuid4().hex, "received_at": "2024-05-01T12:00:00+00:00"}
+    line = json.dumps(record) + "\n"
+    # The same record twice (a replay after a crash) and a line torn mid-append
+    (tmp_path / "spool-999999.jsonl").write_text(line + line + '{"contact": {"na')
+
+    result = ingest.flush()
+    assert (result["drained"], result["inserted"], result["duplicates"]) == (2, 1, 1)
+    assert _stored(contact["message"]) == 1
+    assert not list(tmp_path.iterdir())
+    # Flushing again adds nothing
+    assert ingest.flush()["drained"] == 0
+
+
+def test_the_queue_is_drained_in_batches(client, contact, monkeypatch):
+    monkeypatch.setattr(ingest, "MODE", "queue")
+    monkeypatch.setattr(ingest, "BATCH_SIZE", 2)
+    ingest.flush()
+    messages = [f"{contact['message']} #{number}" for number in range(3)]
+    for message in [*messages, messages[0]]:
+        assert client.post("/api/contact", json={**contact, "message": message}).status_code == 202
+    assert _queued() == 4
+
+    result = ingest.flush()
+    assert (result["drained"], result["inserted"], result["duplicates"]) == (4, 3, 1)
+    assert [_stored(message) for message in messages] == [1, 1, 1]
+    assert _queued() == 0
+
+
+def test_concurrent_drainers_skip_each_others_batches():
+    from sqlalchemy.dialects import postgresql
+
+    from api import crud
+
+    sql = str(crud._queue_batch(500).compile(dialect=postgresql.dialect()))
+    assert sql.endswith("FOR UPDATE SKIP LOCKED")
@@ -0,0 +1,48 @@
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api import media
+from api.main import app
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return media.LocalStorage(str(tmp_path))
+
+
+@pytest.mark.parametrize("key", [
+    ".incoming/upload.tmp",
+    "originals/../.incoming/upload.tmp",
+    "originals/./../.incoming",
+    "../outside.txt",
+    "originals/../../outside.txt",
+])
+def test_keys_outside_the_stored_objects_are_rejected(storage, key):
+    with pytest.raises(KeyError):
+        storage.path(key)
+
+
+def test_stored_keys_resolve_under_the_root(storage):
+    assert storage.path("originals/ab/cd.jpg") == os.path.join(storage.root, "originals", "ab", "cd.jpg")
+
+
+def test_in_progress_uploads_are_not_served():
+    with media.storage.temp_file() as temp:
+        temp.write(b"partial upload")
+    name = os.path.basename(temp.name)
+    client = TestClient(app)
+    for path in (f"originals/../.incoming/{name}", f"originals/%2E%2E/.incoming/{name}"):
+        response = client.get(f"/api/media/files/{path}")
+        assert response.status_code == 404
+        assert b"partial upload" not in response.content
+
+
+@pytest.mark.parametrize("path", ["/api/media", "/api/media/types", "/api/media/1", "/api/media?type=document"])
+def test_the_media_library_needs_an_admin(client, admin_headers, path):
+    assert client.get(path).status_code in (401, 403)
+    response = client.get(path, headers=admin_headers)
+    assert response.status_code in (200, 404)
+    if response.status_code == 200:
+        assert response.headers["cache-control"] == "private, no-cache"
@@ -0,0 +1,42 @@
+import base64
+import json
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from api.main import app
+from api.pagination import decode_cursor, encode_cursor
+
+
+def _raw_cursor(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip("=")
+
+
+BAD_CURSORS = [[1], [1, 2, 3], [{"a": 1}, 2], [1, "2"], [True, 2], [1.5, 2], {"a": 1}, "not base64 json"]
+
+
+def test_cursors_round_trip():
+    assert decode_cursor(encode_cursor(3, 17), 2) == (3, 17)
+    created = datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)
+    assert decode_cursor(encode_cursor(created, 9), 2, datetime_fields=(0,)) == (created, 9)
+    assert decode_cursor(None, 2) is None
+
+
+@pytest.mark.parametrize("value", BAD_CURSORS)
+def test_malformed_cursors_are_rejected(value):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(_raw_cursor(value), 2)
+    assert error.value.status_code == 400
+
+
+def test_datetime_positions_need_an_iso_string():
+    with pytest.raises(HTTPException):
+        decode_cursor(_raw_cursor([5, 9]), 2, datetime_fields=(0,))
+
+
+@pytest.mark.parametrize("value", BAD_CURSORS)
+def test_public_lists_answer_400_to_malformed_cursors(value):
+    response = TestClient(app).get("/api/products", params={"cursor": _raw_cursor(value)})
+    assert response.status_code == 400
@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+from api import ratelimit
+from api.ratelimit import LocalRedis, MemoryRateLimiter, RedisRateLimiter
+
+WINDOW = 60
+START = 1_700_000_040.0  # the start of a window
+
+
+class Clock:
+    now = START
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    position = ratelimit._window_position
+    monkeypatch.setattr(ratelimit, "_window_position", lambda window, now=None: position(window, clock.now))
+    return clock
+
+
+@pytest.fixture(params=["memory", "redis"])
+def limiter(request):
+    if request.param == "memory":
+        return MemoryRateLimiter("test", limit=5, window=WINDOW)
+    return RedisRateLimiter("test", limit=5, window=WINDOW, client=LocalRedis())
+
+
+def _run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_hits_add_up_within_a_window(limiter, clock):
+    assert [_run(limiter.hit("1.2.3.4")) for _ in range(3)] == [1, 2, 3]
+    assert _run(limiter.count("1.2.3.4")) == 3
+    assert _run(limiter.count("5.6.7.8")) == 0
+    assert not _run(limiter.is_limited("1.2.3.4"))
+    _run(limiter.hit("1.2.3.4"))
+    _run(limiter.hit("1.2.3.4"))
+    assert _run(limiter.is_limited("1.2.3.4"))
+
+
+def test_the_previous_window_fades_out(limiter, clock):
+    for _ in range(4):
+        _run(limiter.hit("1.2.3.4"))
+    # A quarter into the next window, three quarters of the old count remain
+    clock.now = START + WINDOW * 1.25
+    assert _run(limiter.count("1.2.3.4")) == 3
+    assert _run(limiter.hit("1.2.3.4")) == 4
+    # Two windows on, the first one no longer counts
+    clock.now = START + WINDOW * 2.5
+    assert _run(limiter.count("1.2.3.4")) == 0.5
+
+
+def test_reset_forgets_a_key(limiter, clock):
+    _run(limiter.hit("1.2.3.4"))
+    clock.now = START + WINDOW
+    _run(limiter.hit("1.2.3.4"))
+    _run(limiter.reset("1.2.3.4"))
+    assert _run(limiter.count("1.2.3.4")) == 0
+
+
+def test_redis_counters_are_created_with_their_ttl(clock):
+    client = LocalRedis()
+    limiter = RedisRateLimiter("test", limit=5, window=WINDOW, client=client)
+    _run(limiter.hit("1.2.3.4"))
+    (key,) = client._data
+    _, expires = client._data[key]
+    assert expires is not None
+    # Later hits keep the expiry set by the first
+    _run(limiter.hit("1.2.3.4"))
+    assert client._data[key] == (2, expires)
@@ -0,0 +1,26 @@
+import pytest
+
+from api import replicas
+
+
+@pytest.fixture
+def no_recent_write(monkeypatch):
+    monkeypatch.setattr(replicas, "_last_write", None)
+
+
+def test_reads_that_must_see_the_primary_skip_the_cache(no_recent_write):
+    assert not replicas.cache_bypassed({})
+    assert not replicas.cache_bypassed({"primary_required": False})
+    assert replicas.cache_bypassed({"primary_required": True})
+
+
+def test_replica_results_are_not_cached_right_after_a_write(no_recent_write):
+    replica_session = {"replica": object()}
+    assert replicas.cacheable(replica_session)
+
+    replicas._note_write("products")
+
+    assert not replicas.cacheable(replica_session)
+    # The primary has the write already
+    assert replicas.cacheable({})
+    assert replicas.cacheable({"replica": None})
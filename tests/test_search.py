@@ -0,0 +1,40 @@
+import asyncio
+
+import httpx
+
+from api import search
+from api.database import SessionLocal
+from api.main import app
+from api.models import Product
+
+
+def _seed_products(count: int) -> None:
+    with SessionLocal() as db:
+        db.add_all(Product(name=f"Gate valve {index}", category="valves") for index in range(count))
+        db.commit()
+
+
+async def _concurrent_searches(requests: int):
+    await app.router.startup()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.wait_for(
+                asyncio.gather(*[client.get("/api/search", params={"q": "valve"}) for _ in range(requests)]),
+                timeout=20,
+            )
+    finally:
+        await app.router.shutdown()
+
+
+def test_concurrent_searches_against_a_stale_segment():
+    # Refreshing a stale index queries the database; concurrent searches
+    # must not wait for it on the event loop thread
+    _seed_products(50)
+    for segment in search._segments.values():
+        segment.invalidate()
+
+    responses = asyncio.run(_concurrent_searches(3))
+
+    assert [response.status_code for response in responses] == [200, 200, 200]
+    assert all(response.json()["total"] >= 50 for response in responses)
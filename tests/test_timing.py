@@ -0,0 +1,66 @@
+import asyncio
+
+from api import timing
+from api.timing import TimingMiddleware
+
+
+def _app(chunks, delay):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        for index, chunk in enumerate(chunks):
+            if index:
+                await asyncio.sleep(delay)
+            await send({"type": "http.response.body", "body": chunk, "more_body": index < len(chunks) - 1})
+
+    return TimingMiddleware(app)
+
+
+def _latency(app):
+    timing.reset_metrics()
+    scope = {"type": "http", "method": "GET", "path": "/stream", "headers": []}
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    asyncio.run(app(scope, receive, send))
+    return timing.metrics_snapshot()["routes"]["GET unmatched"]["latency"]
+
+
+def test_streamed_responses_record_time_to_first_byte():
+    latency = _latency(_app([b"retry: 1000\n\n", b": keepalive\n\n", b""], 0.3))
+    assert latency["max_ms"] < 200
+
+
+def test_whole_responses_record_the_full_duration():
+    async def app(scope, receive, send):
+        await asyncio.sleep(0.3)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    assert _latency(TimingMiddleware(app))["max_ms"] >= 300
+
+
+def test_failed_statements_leave_nothing_on_the_connection():
+    from sqlalchemy import text
+    from sqlalchemy.exc import OperationalError
+
+    from api.database import engine
+
+    with engine.connect() as conn:
+        before = dict(conn.info)
+        for _ in range(3):
+            try:
+                conn.execute(text("SELECT * FROM no_such_table"))
+            except OperationalError:
+                conn.rollback()
+        timings = timing.RequestTimings()
+        token = timing._current.set(timings)
+        try:
+            conn.execute(text("SELECT 1"))
+        finally:
+            timing._current.reset(token)
+        assert dict(conn.info) == before
+    assert timings.queries == 1
@@ -0,0 +1,72 @@
+import pytest
+
+MISSING_ID = 999999
+
+
+@pytest.fixture
+def product(client, admin_headers):
+    response = client.post("/api/admin/products", json={"name": "Gate valve"}, headers=admin_headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+def _update(client, headers, product_id, if_match=None, **changes):
+    if if_match is not None:
+        headers = {**headers, "If-Match": if_match}
+    return client.put(f"/api/admin/products/{product_id}", json=changes, headers=headers)
+
+
+def _delete(client, headers, product_id, if_match=None):
+    if if_match is not None:
+        headers = {**headers, "If-Match": if_match}
+    return client.delete(f"/api/admin/products/{product_id}", headers=headers)
+
+
+def test_a_matching_version_writes_and_returns_the_next_etag(client, admin_headers, product):
+    version = product["version"]
+    response = _update(client, admin_headers, product["id"], f'"v{version}"', name="Gate valve DN50")
+    assert response.status_code == 200
+    assert response.headers["etag"] == f'"v{version + 1}"'
+    assert response.json()["version"] == version + 1
+
+
+def test_a_stale_version_gets_412_with_the_current_etag(client, admin_headers, product):
+    version = product["version"]
+    assert _update(client, admin_headers, product["id"], f'"v{version}"', name="First edit").status_code == 200
+
+    response = _update(client, admin_headers, product["id"], f'"v{version}"', name="Second edit")
+    assert response.status_code == 412
+    assert response.headers["etag"] == f'"v{version + 1}"'
+    # The first edit is kept
+    current = _update(client, admin_headers, product["id"], f'"v{version + 1}"')
+    assert current.json()["name"] == "First edit"
+
+
+def test_any_listed_version_matches_but_weak_tags_never_do(client, admin_headers, product):
+    version = product["version"]
+    assert _update(client, admin_headers, product["id"], f'W/"v{version}"', name="Weak").status_code == 412
+    response = _update(client, admin_headers, product["id"], f'"v{version + 5}", "v{version}"', name="Listed")
+    assert response.status_code == 200
+
+
+def test_a_missing_row_is_404_even_with_if_match(client, admin_headers):
+    assert _update(client, admin_headers, MISSING_ID, '"v1"', name="Nothing").status_code == 404
+    assert _delete(client, admin_headers, MISSING_ID, '"v1"').status_code == 404
+
+
+@pytest.mark.parametrize("if_match", [None, "*"])
+def test_no_header_or_a_wildcard_is_unconditional(client, admin_headers, product, if_match):
+    assert _update(client, admin_headers, product["id"], '"v1"', name="Moved on").status_code == 200
+    response = _update(client, admin_headers, product["id"], if_match, name="Overwritten")
+    assert response.status_code == 200
+    assert response.json()["name"] == "Overwritten"
+    assert _delete(client, admin_headers, product["id"], if_match).status_code == 200
+
+
+def test_deletes_are_conditional_too(client, admin_headers, product):
+    version = product["version"]
+    response = _delete(client, admin_headers, product["id"], f'"v{version + 1}"')
+    assert response.status_code == 412
+    assert response.headers["etag"] == f'"v{version}"'
+    assert _delete(client, admin_headers, product["id"], f'"v{version}"').status_code == 200
+    assert _delete(client, admin_headers, product["id"]).status_code == 404